@@ -3,20 +3,23 @@ Base agent class for all agents in the SmartCart application.
 """
 from typing import Dict, Any
 from abc import ABC, abstractmethod
-import google.generativeai as genai
-from typing import Any, Dict, List
-import os
+import json
+from typing import Any, Callable, Dict, List, Optional
 from dotenv import load_dotenv
+from ..services.llm_cache import llm_cache
+from ..services.llm_gateway import llm_gateway
+from ..services.model_registry import model_registry
 
 load_dotenv()
 
 class BaseAgent(ABC):
     """Base class for all agents in the SmartCart application."""
     
+    # Gemini model used by this agent, resolved through the shared registry
+    model_name = 'gemini-2.0-flash-001'
+    
     def __init__(self):
-        # Initialize Gemini API
-        genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
-        self.model = genai.GenerativeModel('gemini-2.0-flash-001')
+        self.model = model_registry.get(self.model_name)
         
     @abstractmethod
     async def process(self, data: Dict[str, Any]) -> Dict[str, Any]:
@@ -47,12 +50,38 @@ class BaseAgent(ABC):
     async def generate_response(self, prompt: str) -> str:
         """Generate a response using Gemini API"""
         try:
-            response = self.model.generate_content(prompt)
-            return response.text
+            return await llm_gateway.generate(self.model, prompt)
         except Exception as e:
             print(f"Error generating response: {e}")
             return "I apologize, but I'm having trouble generating a response at the moment."
     
+    async def generate_cached_response(
+        self,
+        call_type: str,
+        template_version: str,
+        payload: Any,
+        prompt: str,
+        validate: Optional[Callable[[str], bool]] = None
+    ) -> str:
+        """Generate a response, reusing the cached output for identical input"""
+        return await llm_cache.get_or_generate(
+            call_type,
+            self.model_name,
+            template_version,
+            payload,
+            lambda: self.generate_response(prompt),
+            validate=validate
+        )
+    
+    @staticmethod
+    def is_json(text: str) -> bool:
+        """Check whether a response parses as JSON"""
+        try:
+            json.loads(text)
+            return True
+        except (TypeError, ValueError):
+            return False
+    
     def format_data(self, data: Dict[str, Any]) -> str:
         """Format data into a string for the LLM"""
         return str(data) 
\ No newline at end of file
@@ -4,10 +4,14 @@ import json
 from sqlalchemy.orm import Session
 from ..database.models import CustomerPersona, CustomerBehavior
 from ..services.gemini_service import GeminiService
+from ..services.recommendation_events import customer_changed
 from ..utils.logger import setup_logger
 
 logger = setup_logger(__name__)
 
+# Version of the persona prompt, part of the LLM cache key
+PERSONA_PROMPT_VERSION = "1"
+
 class CustomerAgent(BaseAgent):
     """Agent responsible for customer-related operations."""
     
@@ -76,6 +80,8 @@ class CustomerAgent(BaseAgent):
             # Note: In a real implementation, you would use a database session
             # and handle the actual storage of the behavior
             
+            customer_changed(self.db, customer_id, "behavior")
+            
             return {
                 "status": "success",
                 "message": "Behavior updated successfully"
@@ -153,7 +159,9 @@ class CustomerAgent(BaseAgent):
         }}
         """
         
-        response = await self.generate_response(prompt)
+        response = await self.generate_cached_response(
+            "persona", PERSONA_PROMPT_VERSION, customer_data, prompt, validate=self.is_json
+        )
         
         try:
             return json.loads(response)
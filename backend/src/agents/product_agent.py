@@ -2,19 +2,23 @@
 Product agent for handling product-related operations.
 """
 from .base_agent import BaseAgent
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 import json
 from ..services.gemini_service import GeminiService
+from ..services.persona_index import persona_index_service
 from ..utils.logger import setup_logger
 
 logger = setup_logger(__name__)
 
+# Changing the profile prompt requires bumping this to retire cached profiles
+PROFILE_PROMPT_VERSION = "1"
+
 class ProductAgent(BaseAgent):
     """Agent responsible for product-related operations."""
     
-    def __init__(self):
+    def __init__(self, gemini_service: Optional[GeminiService] = None):
         super().__init__()
-        self.gemini_service = GeminiService()
+        self.gemini_service = gemini_service or GeminiService()
     
     async def process(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -97,7 +101,9 @@ class ProductAgent(BaseAgent):
         }}
         """
         
-        response = await self.generate_response(prompt)
+        response = await self.generate_cached_response(
+            "product_profile", PROFILE_PROMPT_VERSION, product_data, prompt, validate=self.is_json
+        )
         
         try:
             return json.loads(response)
@@ -133,6 +139,25 @@ class ProductAgent(BaseAgent):
                 }
             }
     
+    def find_products_for_persona(self, customer_persona: Dict[str, Any], limit: int = 10) -> List[Dict[str, Any]]:
+        """
+        Retrieve the products closest to a persona from the local ANN index.
+        
+        Use this to shortlist products instead of calling match_with_persona
+        for every product; reserve the LLM analysis for the few shown in detail.
+        
+        Args:
+            customer_persona: Customer persona JSON
+            limit: Number of products to return
+            
+        Returns:
+            List of {"product_id", "compatibility_score"} ordered by similarity
+        """
+        return [
+            {"product_id": product_id, "compatibility_score": score}
+            for product_id, score in persona_index_service.nearest_products(customer_persona, limit)
+        ]
+    
     async def match_with_persona(self, product_profile: Dict[str, Any], customer_persona: Dict[str, Any]) -> Dict[str, Any]:
         """Generate compatibility analysis between product and customer persona"""
         prompt = f"""
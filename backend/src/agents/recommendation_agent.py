@@ -2,13 +2,23 @@
 Recommendation agent for handling product recommendations.
 """
 from .base_agent import BaseAgent
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Tuple
+import asyncio
 import json
-import google.generativeai as genai
 from datetime import datetime, timedelta
 from sqlalchemy.orm import Session
-from ..database.schema import Customer, Product, Recommendation, CustomerMood
+from ..config import settings
+from ..database import SessionLocal
+from ..database.models import CustomerMood
+from ..models import Customer, Product, Recommendation
+from ..services.explanation_engine import explanation_engine, explanation_enricher
 from ..services.gemini_service import GeminiService
+from ..services.llm_gateway import llm_gateway
+from ..services.model_registry import model_registry
+from ..services.mood_affinity import mood_affinity
+from ..services.ranking_model import ranking_model
+from ..services.recommendation_store import replace_live_recommendations
+from ..services.scoring_engine import build_customer_profile, get_scoring_engine, load_scored_products
 from ..utils.logger import setup_logger
 
 logger = setup_logger(__name__)
@@ -16,11 +26,20 @@ logger = setup_logger(__name__)
 class RecommendationAgent(BaseAgent):
     """Agent responsible for generating product recommendations."""
     
-    def __init__(self, api_key: str):
+    model_name = 'gemini-pro'
+    
+    def __init__(self, api_key: Optional[str] = None, gemini_service: Optional[GeminiService] = None):
+        if api_key:
+            model_registry.start(api_key)
         super().__init__()
-        genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel('gemini-pro')
-        self.gemini_service = GeminiService()
+        self._gemini_service = gemini_service
+    
+    @property
+    def gemini_service(self) -> GeminiService:
+        """Gemini client, created on first use so that the local ranking paths need no API key"""
+        if self._gemini_service is None:
+            self._gemini_service = GeminiService()
+        return self._gemini_service
     
     async def process(self, request_data: Dict[str, Any], db: Session) -> Dict[str, Any]:
         """
@@ -38,75 +57,165 @@ class RecommendationAgent(BaseAgent):
             if not customer_id:
                 raise ValueError("Customer ID is required")
             
-            # Get customer data
-            customer = db.query(Customer).filter(Customer.id == customer_id).first()
+            # Get customer data by its public ID, as the recommendation service does
+            customer = db.query(Customer).filter(Customer.customer_id == customer_id).first()
             if not customer:
                 raise ValueError("Customer not found")
             
             # Get recent mood
             recent_mood = db.query(CustomerMood)\
-                .filter(CustomerMood.customer_id == customer_id)\
+                .filter(CustomerMood.customer_id == customer.id)\
                 .order_by(CustomerMood.created_at.desc())\
                 .first()
             
-            # Get all products
-            products = db.query(Product).all()
-            
-            # Generate recommendations
-            recommendations = []
-            for product in products:
-                match_score = await self._calculate_match_score(customer, product, recent_mood)
-                if match_score > 0.5:  # Only include products with good match
-                    explanation = await self._generate_explanation(customer, product, match_score, recent_mood)
-                    recommendations.append({
-                        'product_id': product.id,
-                        'psychographic_match': match_score,
-                        'explanation': explanation
-                    })
-            
-            # Sort by match score
-            recommendations.sort(key=lambda x: x['psychographic_match'], reverse=True)
+            # Score the catalog and keep the top-k
+            if settings.RECOMMENDATION_SCORING_MODE == "llm":
+                top_products = await self._score_with_llm(customer, recent_mood, db)
+            else:
+                top_products = self._score_locally(customer, recent_mood, db)
             
-            # Store recommendations
-            for rec in recommendations:
-                db_rec = Recommendation(
-                    customer_id=customer_id,
-                    product_id=rec['product_id'],
-                    psychographic_match=rec['psychographic_match'],
-                    explanation=rec['explanation']
+            # Explanations are only generated for the final top-k
+            explanations = self._explain_locally(customer, recent_mood, top_products, db, request_data.get('locale'))
+            pending = set()
+            if settings.RECOMMENDATION_EXPLANATIONS == "llm":
+                # Template explanations stand in for LLM calls that miss the deadline
+                explanations, pending = await self._explain_with_llm(
+                    customer,
+                    recent_mood,
+                    top_products,
+                    explanations,
+                    request_data.get('explanation_deadline', settings.EXPLANATION_DEADLINE_SECONDS)
                 )
-                db.add(db_rec)
+            recommendations = [
+                {
+                    'product_id': product.product_id,
+                    'psychographic_match': match_score,
+                    'explanation': explanation,
+                    'explanation_pending': product.product_id in pending
+                }
+                for (product, match_score), explanation in zip(top_products, explanations)
+            ]
             
+            # Store recommendations in one statement, refreshing products recommended before.
+            # On-request rows have no batch generation; they replace the customer's
+            # previous live set, so they never pile up between batch runs.
+            replace_live_recommendations(
+                db,
+                customer.id,
+                [
+                    {
+                        'customer_id': customer.id,
+                        'product_id': product.id,
+                        'match_score': match_score,
+                        'explanation': explanation,
+                        'created_at': datetime.utcnow()
+                    }
+                    for (product, match_score), explanation in zip(top_products, explanations)
+                ]
+            )
             db.commit()
             
+            # Optionally rewrite the template explanations with the LLM in the background
+            if settings.RECOMMENDATION_EXPLANATIONS != "llm" and \
+                    request_data.get('enrich', settings.EXPLANATION_LLM_ENRICHMENT):
+                for product, match_score in top_products:
+                    self._enrich_explanation(customer, product, match_score, recent_mood)
+            
             return {
                 "status": "success",
-                "recommendations": recommendations[:10],  # Return top 10
+                "recommendations": recommendations,
                 "mood_considered": recent_mood.mood if recent_mood else None
             }
         except Exception as e:
             logger.error(f"Error processing recommendations: {str(e)}")
             raise
     
-    async def _calculate_match_score(
+    def _score_locally(
         self,
         customer: Customer,
-        product: Product,
+        recent_mood: CustomerMood,
+        db: Session
+    ) -> List[Tuple[Product, float]]:
+        """Score the whole catalog with the vectorized engine"""
+        engine = get_scoring_engine(db, Product)
+        profile = build_customer_profile(customer, recent_mood)
+        weights = ranking_model.weights_for(profile["segment"])
+        if recent_mood is None:
+            top = engine.top_k(profile, settings.RECOMMENDATION_TOP_K, weights=weights)
+        else:
+            base = engine.top_k(profile, settings.MOOD_CANDIDATES, weights=weights)
+            top = mood_affinity.rerank(engine, base, recent_mood, settings.RECOMMENDATION_TOP_K)
+        return load_scored_products(db, Product, engine, top)
+    
+    async def _score_with_llm(
+        self,
+        customer: Customer,
+        recent_mood: CustomerMood,
+        db: Session
+    ) -> List[Tuple[Product, float]]:
+        """Score every product with batched LLM prompts"""
+        products = db.query(Product).all()
+        match_scores = await self._calculate_match_scores(customer, products, recent_mood)
+        
+        # Only include products with good match
+        scored = [(product, score) for product, score in zip(products, match_scores) if score > 0.5]
+        scored.sort(key=lambda item: item[1], reverse=True)
+        return scored[:settings.RECOMMENDATION_TOP_K]
+    
+    async def _calculate_match_scores(
+        self,
+        customer: Customer,
+        products: List[Product],
+        recent_mood: CustomerMood
+    ) -> List[float]:
+        """
+        Score products in chunks with one LLM call per chunk.
+        
+        Chunk size and the number of chunks scored concurrently come from
+        settings. The returned scores are aligned with ``products``.
+        """
+        batch_size = max(1, settings.RECOMMENDATION_SCORING_BATCH_SIZE)
+        semaphore = asyncio.Semaphore(max(1, settings.RECOMMENDATION_SCORING_CONCURRENCY))
+        chunks = [products[i:i + batch_size] for i in range(0, len(products), batch_size)]
+        
+        async def score_chunk(chunk: List[Product]) -> List[float]:
+            async with semaphore:
+                try:
+                    return await self._calculate_match_score_batch(customer, chunk, recent_mood)
+                except Exception as e:
+                    logger.error(f"Error scoring product batch: {str(e)}")
+                    return [0.5] * len(chunk)
+        
+        chunk_scores = await asyncio.gather(*[score_chunk(chunk) for chunk in chunks])
+        return [score for scores in chunk_scores for score in scores]
+    
+    async def _calculate_match_score_batch(
+        self,
+        customer: Customer,
+        products: List[Product],
         recent_mood: CustomerMood
-    ) -> float:
+    ) -> List[float]:
+        product_lines = json.dumps([
+            {
+                "product_id": str(product.id),
+                "name": product.name,
+                "category": product.category,
+                "subcategory": product.subcategory,
+                "brand": product.brand,
+                "price": product.price
+            }
+            for product in products
+        ], default=str)
+        
         prompt = f"""
-        Calculate a psychographic match score (0-1) between this customer and product.
+        Calculate a psychographic match score (0-1) between this customer and each product.
         
         Customer Persona:
-        {customer.persona.psychographic_traits}
+        {self._persona_traits(customer)}
         Current Mood: {recent_mood.mood if recent_mood else 'neutral'}
         
-        Product:
-        Name: {product.name}
-        Category: {product.category}
-        Mood Tags: {product.mood_tags}
-        Price Point: {product.price_point}
-        Quality Level: {product.quality_level}
+        Products (JSON):
+        {product_lines}
         
         Consider:
         1. Personality alignment
@@ -115,15 +224,146 @@ class RecommendationAgent(BaseAgent):
         4. Quality preferences
         5. Category interests
         
-        Return only the score as a float between 0 and 1.
+        Return only a JSON array with one object per product, in the same order:
+        [{{"product_id": "string", "score": float}}]
         """
         
-        response = await self.model.generate_content(prompt)
+        response = await llm_gateway.generate(self.model, prompt)
+        return self._parse_batch_scores(response, products)
+    
+    @staticmethod
+    def _parse_batch_scores(response: str, products: List[Product]) -> List[float]:
+        """Map a JSON array of scores back onto products, defaulting to 0.5"""
+        text = response.strip()
+        if text.startswith("```"):
+            text = text.strip("`")
+            if text.startswith("json"):
+                text = text[4:]
+        
         try:
-            score = float(response.text.strip())
-            return max(0, min(1, score))  # Ensure score is between 0 and 1
-        except ValueError:
-            return 0.5  # Default score if parsing fails
+            items = json.loads(text)
+        except json.JSONDecodeError:
+            return [0.5] * len(products)
+        if not isinstance(items, list):
+            return [0.5] * len(products)
+        
+        by_id = {}
+        for position, item in enumerate(items):
+            if isinstance(item, dict):
+                key = str(item.get("product_id", position))
+                value = item.get("score")
+            else:
+                key = str(products[position].id) if position < len(products) else None
+                value = item
+            try:
+                by_id[key] = max(0, min(1, float(value)))
+            except (TypeError, ValueError):
+                continue
+        
+        return [by_id.get(str(product.id), 0.5) for product in products]
+    
+    def _explain_locally(
+        self,
+        customer: Customer,
+        recent_mood: CustomerMood,
+        top_products: List[Tuple[Product, float]],
+        db: Session,
+        locale: Optional[str] = None
+    ) -> List[str]:
+        """Render template explanations from the features that drove each score"""
+        engine = get_scoring_engine(db, Product)
+        profile = build_customer_profile(customer, recent_mood)
+        rows = [engine.matrix.row_by_id[product.id] for product, _ in top_products]
+        weights = ranking_model.weights_for(profile["segment"])
+        return explanation_engine.explain(engine, profile, rows, locale, weights=weights)
+    
+    def _enrich_explanation(
+        self,
+        customer: Customer,
+        product: Product,
+        match_score: float,
+        recent_mood: CustomerMood
+    ):
+        """Schedule an LLM explanation that replaces the stored template once ready"""
+        prompt = self._explanation_prompt(customer, product, match_score, recent_mood)
+        # Keyed by the public IDs that RecommendationService.explain_recommendation looks up
+        explanation_enricher.schedule(
+            self.model,
+            customer.customer_id,
+            product.product_id,
+            prompt,
+            on_ready=self._explanation_writer(customer.id, product.id)
+        )
+    
+    def _explanation_writer(self, customer_id: int, product_id: int):
+        """Callback that overwrites a stored on-request recommendation's explanation"""
+        def store(text: str):
+            db = SessionLocal()
+            try:
+                db.query(Recommendation)\
+                    .filter(
+                        Recommendation.customer_id == customer_id,
+                        Recommendation.product_id == product_id,
+                        Recommendation.generation.is_(None)
+                    )\
+                    .update({'explanation': text}, synchronize_session=False)
+                db.commit()
+            finally:
+                db.close()
+        return store
+    
+    async def _explain_with_llm(
+        self,
+        customer: Customer,
+        recent_mood: CustomerMood,
+        top_products: List[Tuple[Product, float]],
+        placeholders: List[str],
+        deadline: float
+    ) -> Tuple[List[str], set]:
+        """
+        Generate LLM explanations for the top-k concurrently within a deadline.
+        
+        Args:
+            customer: Customer the products are recommended to
+            recent_mood: Latest mood, if any
+            top_products: Ranked (product, score) pairs
+            placeholders: Explanations returned for calls that fail or miss the deadline
+            deadline: Seconds to wait for the whole fan-out
+            
+        Returns:
+            (explanations, public IDs of products whose explanation is still being generated)
+        """
+        semaphore = asyncio.Semaphore(settings.EXPLANATION_CONCURRENCY)
+        
+        async def explain(product: Product, match_score: float) -> str:
+            async with semaphore:
+                return await self._generate_explanation(customer, product, match_score, recent_mood)
+        
+        tasks = [asyncio.ensure_future(explain(product, score)) for product, score in top_products]
+        fan_out = asyncio.gather(*tasks, return_exceptions=True)
+        try:
+            # Shielded so that late calls keep running after the deadline
+            await asyncio.wait_for(asyncio.shield(fan_out), timeout=deadline)
+        except asyncio.TimeoutError:
+            pass
+        
+        explanations, pending = [], set()
+        for (product, _), task, placeholder in zip(top_products, tasks, placeholders):
+            if not task.done():
+                # Filled in later: fetchable from the enricher and written to the stored row
+                explanation_enricher.track(
+                    customer.customer_id,
+                    product.product_id,
+                    task,
+                    on_ready=self._explanation_writer(customer.id, product.id)
+                )
+                pending.add(product.product_id)
+                explanations.append(placeholder)
+            elif task.exception() is not None:
+                explanations.append(placeholder)
+            else:
+                explanations.append(task.result())
+        return explanations, pending
     
     async def _generate_explanation(
         self,
@@ -132,19 +372,30 @@ class RecommendationAgent(BaseAgent):
         match_score: float,
         recent_mood: CustomerMood
     ) -> str:
-        prompt = f"""
+        prompt = self._explanation_prompt(customer, product, match_score, recent_mood)
+        response = await llm_gateway.generate(self.model, prompt)
+        return response.strip()
+    
+    def _explanation_prompt(
+        self,
+        customer: Customer,
+        product: Product,
+        match_score: float,
+        recent_mood: CustomerMood
+    ) -> str:
+        return f"""
         Explain why this product is a good match for this customer.
         
         Customer Persona:
-        {customer.persona.psychographic_traits}
+        {self._persona_traits(customer)}
         Current Mood: {recent_mood.mood if recent_mood else 'neutral'}
         
         Product:
         Name: {product.name}
         Category: {product.category}
-        Mood Tags: {product.mood_tags}
-        Price Point: {product.price_point}
-        Quality Level: {product.quality_level}
+        Subcategory: {product.subcategory}
+        Brand: {product.brand}
+        Price: {product.price}
         
         Match Score: {match_score}
         
@@ -153,9 +404,11 @@ class RecommendationAgent(BaseAgent):
         2. Mood alignment
         3. Why this product suits their preferences
         """
-        
-        response = await self.model.generate_content(prompt)
-        return response.text.strip()
+    
+    @staticmethod
+    def _persona_traits(customer: Customer) -> Any:
+        persona = customer.persona if isinstance(customer.persona, dict) else {}
+        return persona.get("psychographic_traits")
     
     async def explain(self, data: Dict[str, Any]) -> str:
         """
@@ -189,8 +442,8 @@ class RecommendationAgent(BaseAgent):
         4. Suggests usage scenarios
         """
         
-        response = await self.model.generate_content(prompt)
-        return response.text.strip()
+        response = await llm_gateway.generate(self.model, prompt)
+        return response.strip()
     
     async def update_recommendation_feedback(self, recommendation: Dict[str, Any], feedback: Dict[str, Any]) -> Dict[str, Any]:
         """Update recommendation based on customer feedback"""
@@ -218,30 +471,42 @@ class RecommendationAgent(BaseAgent):
         except json.JSONDecodeError:
             return recommendation
     
-    async def generate_mood_based_recommendations(self, customer_data: Dict[str, Any], mood: str) -> List[Dict[str, Any]]:
-        """Generate recommendations based on customer's current mood"""
-        prompt = f"""
-        Generate product recommendations based on the customer's current mood:
-        
-        Customer Data:
-        {self.format_data(customer_data)}
-        
-        Current Mood: {mood}
-        
-        Please provide mood-appropriate recommendations that consider:
-        1. Emotional state and mood enhancement
-        2. Seasonal and geographical context
-        3. Price sensitivity and brand preferences
-        4. Customer sentiment and similar products
-        5. Personalization factors
+    async def generate_mood_based_recommendations(
+        self,
+        customer_data: Dict[str, Any],
+        mood: str,
+        db: Session,
+        limit: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
         """
+        Generate recommendations based on customer's current mood.
         
-        response = await self.generate_response(prompt)
+        The customer's base ranking comes from the scoring engine and is
+        re-ranked with the local mood affinity table; no LLM call is made.
         
-        try:
-            return json.loads(response)
-        except json.JSONDecodeError:
-            return []
+        Args:
+            customer_data: Customer fields (history, season, location, ...)
+            mood: Current mood, one of the Mood values
+            db: SQLAlchemy session
+            limit: Number of recommendations (defaults to RECOMMENDATION_TOP_K)
+            
+        Returns:
+            Ranked recommendations with their mood-adjusted scores
+        """
+        engine = get_scoring_engine(db, Product)
+        profile = build_customer_profile(customer_data, mood)
+        base = engine.top_k(profile, settings.MOOD_CANDIDATES, weights=ranking_model.weights_for(profile["segment"]))
+        top = mood_affinity.rerank(engine, base, mood, limit or settings.RECOMMENDATION_TOP_K)
+        return [
+            {
+                "product_id": product.product_id,
+                "name": product.name,
+                "category": product.category,
+                "subcategory": product.subcategory,
+                "match_score": score
+            }
+            for product, score in load_scored_products(db, Product, engine, top)
+        ]
     
     async def analyze_recommendation_performance(self, recommendations: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Analyze the performance and effectiveness of recommendations"""
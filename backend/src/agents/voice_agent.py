@@ -3,9 +3,10 @@ Voice agent for handling voice interactions.
 """
 from .base_agent import BaseAgent
 from typing import Dict, Any, Optional
-import google.generativeai as genai
 import speech_recognition as sr
 import pyttsx3
+from ..services.llm_gateway import llm_gateway
+from ..services.model_registry import model_registry
 from ..utils.logger import setup_logger
 
 logger = setup_logger(__name__)
@@ -13,10 +14,12 @@ logger = setup_logger(__name__)
 class VoiceAgent(BaseAgent):
     """Agent responsible for voice interactions."""
     
-    def __init__(self, api_key: str):
+    model_name = 'gemini-pro'
+    
+    def __init__(self, api_key: Optional[str] = None):
+        if api_key:
+            model_registry.start(api_key)
         super().__init__()
-        genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel('gemini-pro')
         self.recognizer = sr.Recognizer()
         self.engine = pyttsx3.init()
         
@@ -80,8 +83,8 @@ class VoiceAgent(BaseAgent):
             3. Maintains a friendly, conversational tone
             """
             
-            response = await self.model.generate_content(prompt)
-            return response.text.strip()
+            response = await llm_gateway.generate(self.model, prompt)
+            return response.strip()
         except Exception as e:
             logger.error(f"Error generating response: {str(e)}")
             raise
@@ -122,8 +125,8 @@ class VoiceAgent(BaseAgent):
             4. Maintains a professional, informative tone
             """
             
-            response = await self.model.generate_content(prompt)
-            return response.text.strip()
+            response = await llm_gateway.generate(self.model, prompt)
+            return response.strip()
         except Exception as e:
             logger.error(f"Error handling product query: {str(e)}")
             raise
@@ -146,8 +149,8 @@ class VoiceAgent(BaseAgent):
             4. Maintains a friendly, helpful tone
             """
             
-            response = await self.model.generate_content(prompt)
-            return response.text.strip()
+            response = await llm_gateway.generate(self.model, prompt)
+            return response.strip()
         except Exception as e:
             logger.error(f"Error handling recommendation query: {str(e)}")
             raise 
\ No newline at end of file
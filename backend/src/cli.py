@@ -0,0 +1,195 @@
+"""
+Offline maintenance commands for SmartCart.
+
+Usage (from the backend directory):
+    python -m src.cli train-cf [--incremental]
+    python -m src.cli build-similarity [--neighbours K]
+    python -m src.cli mine-baskets [--rules K] [--min-support N]
+    python -m src.cli build-persona-index
+    python -m src.cli materialize-recommendations [--workers N] [--incremental]
+    python -m src.cli compact-recommendations [--keep K]
+    python -m src.cli build-catalog-snapshot [--products CSV] [--force]
+"""
+import argparse
+import os
+from .config import settings
+from .database import SessionLocal, engine
+from .database.upgrade import upgrade_schema
+from .models import Product
+from .services.basket_rules import BasketRules, bought_together_service, load_purchase_histories
+from .services.catalog_snapshot import CatalogSnapshot
+from .services.collaborative_filtering import (
+    DEFAULT_CUSTOMER_DATA_PATH,
+    CollaborativeFilteringModel,
+    cf_service,
+    load_csv_interactions,
+    load_order_interactions,
+)
+from .services.item_similarity import ItemSimilarityIndex, item_similarity_service, load_order_baskets
+from .services.persona_index import PersonaProductIndex, persona_index_service
+from .services.product_service import DEFAULT_PRODUCT_DATA_PATH, read_product_csv
+from .services.recommendation_batch import materialize_recommendations
+from .services.recommendation_store import RecommendationCompactor
+from .services.scoring_engine import ProductMatrix
+from .utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+def train_cf(args: argparse.Namespace):
+    """Train (or warm-start retrain) the collaborative filtering model"""
+    interactions = load_csv_interactions(args.customers) if os.path.exists(args.customers) else []
+    db = SessionLocal()
+    try:
+        interactions += load_order_interactions(db)
+    finally:
+        db.close()
+
+    if not interactions:
+        logger.error("No interactions found; nothing to train")
+        return
+
+    initial = None
+    if args.incremental and os.path.exists(cf_service.path):
+        initial = CollaborativeFilteringModel.load(cf_service.path)
+
+    model = CollaborativeFilteringModel.fit(
+        interactions,
+        factors=args.factors,
+        iterations=args.iterations if args.iterations else (2 if initial else 10),
+        regularization=args.regularization,
+        alpha=args.alpha,
+        initial=initial
+    )
+    model.save(cf_service.path)
+    print(f"Saved collaborative filtering model to {cf_service.path}")
+
+def build_similarity(args: argparse.Namespace):
+    """Precompute the item-to-item similarity index"""
+    interactions = load_csv_interactions(args.customers) if os.path.exists(args.customers) else []
+    db = SessionLocal()
+    try:
+        matrix = ProductMatrix(db.query(Product).all())
+        baskets = load_order_baskets(db)
+    finally:
+        db.close()
+
+    index = ItemSimilarityIndex.build(matrix, interactions, baskets, k=args.neighbours)
+    index.save(item_similarity_service.path)
+    print(f"Saved item similarity index to {item_similarity_service.path}")
+
+def mine_baskets(args: argparse.Namespace):
+    """Mine "bought together" association rules from orders and purchase histories"""
+    histories = load_purchase_histories(args.customers) if os.path.exists(args.customers) else []
+    db = SessionLocal()
+    try:
+        matrix = ProductMatrix(db.query(Product).all())
+        baskets = load_order_baskets(db)
+    finally:
+        db.close()
+
+    rules = BasketRules.mine(
+        matrix,
+        baskets,
+        histories,
+        k=args.rules,
+        min_support=args.min_support,
+        min_lift=args.min_lift
+    )
+    rules.save(bought_together_service.path)
+    print(f"Saved {len(rules.products)} product and {len(rules.subcategories)} subcategory rules "
+          f"to {bought_together_service.path}")
+
+def build_persona_index(args: argparse.Namespace):
+    """Embed the catalog and build the persona-to-product ANN index"""
+    db = SessionLocal()
+    try:
+        products = db.query(Product).all()
+    finally:
+        db.close()
+
+    index = PersonaProductIndex.build(products, dim=args.dim, tables=args.tables, bits=args.bits)
+    index.save(persona_index_service.path)
+    print(f"Saved persona index to {persona_index_service.path}")
+
+def materialize(args: argparse.Namespace):
+    """Precompute top-N recommendations for every customer"""
+    summary = materialize_recommendations(
+        top_n=args.top_n,
+        workers=args.workers,
+        shard_size=args.shard_size,
+        incremental=args.incremental
+    )
+    print(f"Published recommendation generation {summary['generation']}: "
+          f"{summary['rows']} rows for {summary['customers']} customers in {summary['seconds']}s")
+
+def compact(args: argparse.Namespace):
+    """Prune materialized recommendations beyond the retention window"""
+    deleted = RecommendationCompactor(keep=args.keep, batch_size=args.batch_size).run_once()
+    print(f"Pruned {deleted} recommendation rows")
+
+def build_catalog_snapshot(args: argparse.Namespace):
+    """Compile the product CSV into the memory-mapped columnar snapshot"""
+    snapshot = CatalogSnapshot(args.products)
+    if not args.force and snapshot.is_current():
+        print(f"Catalog snapshot in {snapshot.directory} is up to date")
+        return
+    df = read_product_csv(args.products)
+    snapshot.save(df)
+    print(f"Compiled {len(df)} products to {snapshot.directory}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m src.cli", description="SmartCart offline jobs")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    cf = commands.add_parser("train-cf", help="Train the collaborative filtering model")
+    cf.add_argument("--customers", default=DEFAULT_CUSTOMER_DATA_PATH, help="Customer data CSV")
+    cf.add_argument("--incremental", action="store_true", help="Warm-start from the saved model")
+    cf.add_argument("--factors", type=int, default=16)
+    cf.add_argument("--iterations", type=int, default=None, help="ALS sweeps (default 10, or 2 when incremental)")
+    cf.add_argument("--regularization", type=float, default=0.1)
+    cf.add_argument("--alpha", type=float, default=10.0)
+    cf.set_defaults(handler=train_cf)
+
+    similarity = commands.add_parser("build-similarity", help="Precompute item-to-item similarities")
+    similarity.add_argument("--customers", default=DEFAULT_CUSTOMER_DATA_PATH, help="Customer data CSV")
+    similarity.add_argument("--neighbours", type=int, default=20, help="Similar products kept per product")
+    similarity.set_defaults(handler=build_similarity)
+
+    baskets = commands.add_parser("mine-baskets", help="Mine bought-together association rules")
+    baskets.add_argument("--customers", default=DEFAULT_CUSTOMER_DATA_PATH, help="Customer data CSV")
+    baskets.add_argument("--rules", type=int, default=settings.BASKET_RULES_PER_ITEM, help="Rules kept per item")
+    baskets.add_argument("--min-support", type=int, default=settings.BASKET_MIN_SUPPORT,
+                         help="Baskets that must contain both items")
+    baskets.add_argument("--min-lift", type=float, default=settings.BASKET_MIN_LIFT, help="Minimum rule lift")
+    baskets.set_defaults(handler=mine_baskets)
+
+    persona = commands.add_parser("build-persona-index", help="Build the persona-to-product ANN index")
+    persona.add_argument("--dim", type=int, default=512, help="Hashed TF-IDF dimensionality")
+    persona.add_argument("--tables", type=int, default=8, help="LSH hash tables")
+    persona.add_argument("--bits", type=int, default=10, help="Hyperplanes per table")
+    persona.set_defaults(handler=build_persona_index)
+
+    batch = commands.add_parser("materialize-recommendations", help="Precompute recommendations for all customers")
+    batch.add_argument("--top-n", type=int, default=20, help="Recommendations stored per customer")
+    batch.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Worker processes")
+    batch.add_argument("--shard-size", type=int, default=2000, help="Customers per shard")
+    batch.add_argument("--incremental", action="store_true", help="Only recompute customers affected by changes")
+    batch.set_defaults(handler=materialize)
+
+    compaction = commands.add_parser("compact-recommendations", help="Prune old recommendation generations")
+    compaction.add_argument("--keep", type=int, default=None, help="Generations kept per customer")
+    compaction.add_argument("--batch-size", type=int, default=None, help="Rows deleted per transaction")
+    compaction.set_defaults(handler=compact)
+
+    snapshot = commands.add_parser("build-catalog-snapshot", help="Compile the product CSV into a binary snapshot")
+    snapshot.add_argument("--products", default=DEFAULT_PRODUCT_DATA_PATH, help="Product data CSV")
+    snapshot.add_argument("--force", action="store_true", help="Recompile even if the CSV is unchanged")
+    snapshot.set_defaults(handler=build_catalog_snapshot)
+
+    args = parser.parse_args(argv)
+    # Jobs read and write the recommendation tables, so bring them up to date first
+    upgrade_schema(engine)
+    args.handler(args)
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import Dict, Optional
 
 class Settings(BaseSettings):
     # Database
@@ -13,6 +13,82 @@ class Settings(BaseSettings):
     # Gemini API
     GEMINI_API_KEY: Optional[str] = None
     
+    # LLM gateway
+    LLM_MAX_CONCURRENCY: int = 8
+    LLM_TIMEOUT_SECONDS: float = 30.0
+    
+    # LLM generation cache
+    # Relative paths are resolved under RECOMMENDER_ARTIFACT_DIR; empty disables the persistent tier
+    LLM_CACHE_PATH: Optional[str] = "llm_cache.db"
+    LLM_CACHE_MAX_ENTRIES: int = 10000
+    LLM_CACHE_TTLS: Dict[str, int] = {}
+    
+    # Recommendation scoring ("local" vectorized engine or "llm" batched prompts)
+    RECOMMENDATION_SCORING_MODE: str = "local"
+    RECOMMENDATION_TOP_K: int = 10
+    RECOMMENDATION_SCORING_BATCH_SIZE: int = 50
+    RECOMMENDATION_SCORING_CONCURRENCY: int = 4
+    
+    # Two-stage recommendation pipeline: candidate retrieval, then "local" or "llm" re-ranking
+    RECOMMENDATION_CANDIDATE_LIMIT: int = 300
+    RECOMMENDATION_RERANKER: str = "local"
+    RECOMMENDATION_LLM_SHORTLIST: int = 50
+    
+    # Per-customer recommendation result cache
+    RECOMMENDATION_CACHE_MAX_ENTRIES: int = 10000
+    RECOMMENDATION_CACHE_TTL: int = 3600
+    
+    # Batch-materialized recommendations
+    RECOMMENDATION_GENERATION_REFRESH_SECONDS: int = 30
+    RECOMMENDATION_RETENTION_GENERATIONS: int = 3
+    RECOMMENDATION_COMPACTION_INTERVAL_SECONDS: int = 3600
+    RECOMMENDATION_COMPACTION_BATCH_SIZE: int = 5000
+    
+    # Offline recommender artifacts (trained models and indexes)
+    RECOMMENDER_ARTIFACT_DIR: str = "artifacts"
+    CF_CANDIDATES: int = 50
+    PERSONA_CANDIDATES: int = 50
+    
+    # Mood-aware re-ranking: base candidates re-scored with the mood affinity table
+    MOOD_CANDIDATES: int = 100
+    MOOD_BOOST_WEIGHT: float = 0.3
+    
+    # Precomputed rankings per (season, holiday, location, segment) context
+    SEGMENT_RANKING_SIZE: int = 100
+    SEGMENT_CANDIDATES: int = 50
+    
+    # Recommendation explanations ("template" from scoring features or "llm" per item)
+    RECOMMENDATION_EXPLANATIONS: str = "template"
+    EXPLANATION_LOCALE: str = "en"
+    EXPLANATION_LLM_ENRICHMENT: bool = False
+    EXPLANATION_ENRICHMENT_MAX_ENTRIES: int = 10000
+    EXPLANATION_CONCURRENCY: int = 5
+    EXPLANATION_DEADLINE_SECONDS: float = 2.0
+    
+    # Online ranking weights learned from recommendation feedback
+    RANKING_LEARNING_RATE: float = 0.05
+    RANKING_L2: float = 0.01
+    
+    # Trending products: sliding window of time buckets with count-min sketches
+    TRENDING_BUCKET_SECONDS: int = 3600
+    TRENDING_BUCKETS: int = 24
+    TRENDING_SKETCH_WIDTH: int = 4096
+    TRENDING_SKETCH_DEPTH: int = 4
+    TRENDING_CANDIDATES: int = 100
+    
+    # Bought together: pairwise association rules mined offline from orders and purchase histories
+    BASKET_RULES_PER_ITEM: int = 20
+    BASKET_MIN_SUPPORT: int = 2
+    BASKET_MIN_LIFT: float = 1.0
+    BASKET_TAXONOMY_WEIGHT: float = 0.5
+    
+    # Shopping sessions: recent views/cart adds per active customer, kept in memory
+    SESSION_HISTORY: int = 20
+    SESSION_MAX_SESSIONS: int = 10000
+    SESSION_IDLE_SECONDS: int = 1800
+    SESSION_NEIGHBOURS: int = 20
+    SESSION_RECENCY_DECAY: float = 0.8
+    
     # Speech Recognition
     SPEECH_RECOGNITION_LANGUAGE: str = "en-US"
     
@@ -0,0 +1,73 @@
+"""
+In-place schema upgrades for databases created by an earlier release.
+
+``create_all`` only creates missing tables, so columns, indexes and unique
+constraints added to existing tables are applied here. Every step checks
+the live schema first, so the upgrade is safe to run on each start.
+"""
+from sqlalchemy import UniqueConstraint, inspect, text
+from sqlalchemy.engine import Engine
+from ..models import Base, Recommendation
+from ..utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Columns added to existing tables: table -> [(column, SQL type)]
+ADDED_COLUMNS = {
+    "recommendations": [("generation", "INTEGER")],
+}
+
+def _index_names(inspector, table: str) -> set:
+    names = {index["name"] for index in inspector.get_indexes(table)}
+    names.update(constraint["name"] for constraint in inspector.get_unique_constraints(table))
+    return names
+
+def _unique_index_names(table) -> set:
+    names = {index.name for index in table.indexes if index.unique}
+    names.update(constraint.name for constraint in table.constraints if isinstance(constraint, UniqueConstraint))
+    return names
+
+def _delete_duplicates(connection, table):
+    """Keep the newest row (highest id) per (customer, product, generation); NULL generations group together"""
+    result = connection.execute(text(
+        f"DELETE FROM {table.name} WHERE id NOT IN "
+        f"(SELECT MAX(id) FROM {table.name} GROUP BY customer_id, product_id, generation)"
+    ))
+    if result.rowcount:
+        logger.warning(f"Deleted {result.rowcount} duplicate {table.name} rows before adding unique indexes")
+
+def upgrade_schema(engine: Engine):
+    """
+    Bring the database up to date with src.models.
+
+    Creates missing tables (recommendation_generations, recommendation_dirty,
+    ranking_weights, ...), then adds the recommendation columns, indexes and
+    unique constraints that older ``recommendations`` tables lack. Duplicate
+    rows that would violate a new unique index are deleted first, in the
+    same transaction, keeping the newest row per key.
+    """
+    Base.metadata.create_all(bind=engine)
+
+    inspector = inspect(engine)
+    with engine.begin() as connection:
+        for table, columns in ADDED_COLUMNS.items():
+            existing = {column["name"] for column in inspector.get_columns(table)}
+            for name, sql_type in columns:
+                if name not in existing:
+                    connection.execute(text(f"ALTER TABLE {table} ADD COLUMN {name} {sql_type}"))
+                    logger.info(f"Added column {table}.{name}")
+
+        table = Recommendation.__table__
+        existing = _index_names(inspector, table.name)
+        if not _unique_index_names(table) <= existing:
+            _delete_duplicates(connection, table)
+        for index in table.indexes:
+            if index.name not in existing:
+                index.create(connection)
+                logger.info(f"Created index {index.name}")
+        for constraint in table.constraints:
+            if isinstance(constraint, UniqueConstraint) and constraint.name not in existing:
+                # Unique constraints cannot be added to an existing SQLite table; a unique index is equivalent
+                columns = ", ".join(column.name for column in constraint.columns)
+                connection.execute(text(f"CREATE UNIQUE INDEX {constraint.name} ON {table.name} ({columns})"))
+                logger.info(f"Created unique index {constraint.name}")
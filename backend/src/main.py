@@ -16,8 +16,25 @@ from .routes.chat import router as chat_router
 from .routes.cart import router as cart_router
 from .routes.orders import router as orders_router
 from .database import get_db, engine
-from .models import Base, Customer, Product
+from .database.upgrade import upgrade_schema
+from .models import Customer, Product
 from .config import settings
+from .services.basket_rules import bought_together_service
+from .services.collaborative_filtering import cf_service
+from .services.dirty_tracker import dirty_tracker
+from .services.explanation_engine import explanation_enricher
+from .services.item_similarity import item_similarity_service
+from .services.llm_cache import llm_cache
+from .services.llm_gateway import llm_gateway
+from .services.persona_index import persona_index_service
+from .services.ranking_model import ranking_model
+from .services.recommendation_batch import materialized_recommendations
+from .services.recommendation_cache import recommendation_cache
+from .services.recommendation_store import recommendation_compactor
+from .services.segment_rankings import segment_rankings
+from .services.session_store import session_store
+from .services.trending import trending_engine
+from .services.model_registry import model_registry
 
 # Load environment variables
 load_dotenv()
@@ -44,8 +61,11 @@ app.add_middleware(
 async def startup_event():
     """Initialize database and load initial data"""
     try:
-        # Initialize database
-        Base.metadata.create_all(bind=engine)
+        # Configure the LLM client once for the whole process
+        model_registry.start(settings.GEMINI_API_KEY)
+        
+        # Initialize database, upgrading tables created by earlier releases
+        upgrade_schema(engine)
         
         db = next(get_db())
         
@@ -97,12 +117,36 @@ async def startup_event():
         
         db.commit()
         print("Database initialized successfully")
+        
+        # Load offline-trained recommender models
+        cf_service.load()
+        item_similarity_service.load()
+        bought_together_service.load()
+        persona_index_service.load()
+        
+        # Per-segment profiles for the precomputed context rankings
+        segment_rankings.load_segments(db)
+        
+        # Ranking weights learned online from recommendation feedback
+        ranking_model.load(db)
+        
+        # Shopping sessions that were active before the restart
+        session_store.warm(db)
+        
+        # Prune old materialized generations in the background
+        recommendation_compactor.start()
     except Exception as e:
         print(f"Error during startup: {e}")
         raise
     finally:
         db.close()
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Release shared LLM resources and stop background tasks"""
+    recommendation_compactor.stop()
+    llm_gateway.shutdown()
+
 # Include routers
 app.include_router(auth_router, prefix="/api", tags=["Authentication"])
 app.include_router(products_router, prefix="/api", tags=["Products"])
@@ -138,5 +182,23 @@ async def health_check(db: Session = Depends(get_db)):
             "error": str(e)
         }
 
+@app.get("/metrics")
+async def metrics():
+    """Expose in-process performance counters"""
+    return {
+        "llm_gateway": llm_gateway.stats(),
+        "llm_cache": llm_cache.stats(),
+        "recommendation_cache": recommendation_cache.stats(),
+        "materialized_recommendations": materialized_recommendations.stats(),
+        "dirty_tracker": dirty_tracker.stats(),
+        "recommendation_compactor": recommendation_compactor.stats(),
+        "segment_rankings": segment_rankings.stats(),
+        "explanation_enricher": explanation_enricher.stats(),
+        "ranking_model": ranking_model.stats(),
+        "trending": trending_engine.stats(),
+        "bought_together": bought_together_service.stats(),
+        "sessions": session_store.stats()
+    }
+
 if __name__ == "__main__":
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True) 
\ No newline at end of file
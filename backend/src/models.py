@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, JSON, DateTime, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, String, Float, JSON, DateTime, ForeignKey, Boolean, Index, UniqueConstraint, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -69,11 +69,50 @@ class Recommendation(Base):
     match_score = Column(Float)
     explanation = Column(String)
     feedback = Column(String, nullable=True)
+    generation = Column(Integer, nullable=True)  # Batch run that materialized this row
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     customer = relationship("Customer", back_populates="recommendations")
     product = relationship("Product", back_populates="recommendations")
+    
+    __table_args__ = (
+        Index("ix_recommendations_customer_generation", "customer_id", "generation"),
+        Index("ix_recommendations_product_generation", "product_id", "generation"),
+        UniqueConstraint("customer_id", "product_id", "generation", name="uq_recommendations_customer_product_generation"),
+        # Rows written on request (outside a batch generation) are refreshed in place
+        Index(
+            "uq_recommendations_customer_product_live", "customer_id", "product_id", unique=True,
+            sqlite_where=text("generation IS NULL"), postgresql_where=text("generation IS NULL")
+        ),
+    )
+
+class RecommendationGeneration(Base):
+    __tablename__ = "recommendation_generations"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    status = Column(String, default="running")  # running, published or failed
+    customers = Column(Integer, default=0)
+    rows = Column(Integer, default=0)
+    started_at = Column(DateTime, default=datetime.utcnow)
+    completed_at = Column(DateTime, nullable=True)
+
+class RecommendationDirty(Base):
+    __tablename__ = "recommendation_dirty"
+    
+    entity = Column(String, primary_key=True)  # customer or product
+    entity_id = Column(Integer, primary_key=True)
+    reason = Column(String)
+    marked_at = Column(DateTime, default=datetime.utcnow)
+
+class RankingWeights(Base):
+    __tablename__ = "ranking_weights"
+    
+    segment = Column(String, primary_key=True)
+    weights = Column(JSON, nullable=False)  # scoring feature -> weight
+    bias = Column(Float, default=0.0)
+    updates = Column(Integer, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
 class ChatHistory(Base):
     __tablename__ = "chat_history"
@@ -9,6 +9,9 @@ from .agents.customer_agent import CustomerAgent
 from .agents.product_agent import ProductAgent
 from .agents.recommendation_agent import RecommendationAgent
 from .services.gemini_service import GeminiService
+from .services.mood_affinity import parse_mood
+from .services.ranking_model import FEEDBACK_EVENTS, ranking_model
+from .services.recommendation_events import customer_changed
 
 router = APIRouter()
 
@@ -77,13 +80,18 @@ async def explain_recommendation(
 @router.post("/recommendations/mood")
 async def get_mood_based_recommendations(
     request_data: Dict[str, Any],
-    recommendation_agent: RecommendationAgent = Depends(get_recommendation_agent)
+    recommendation_agent: RecommendationAgent = Depends(get_recommendation_agent),
+    db: Session = Depends(get_db)
 ):
     """Get mood-based recommendations"""
+    mood = parse_mood(request_data.get('mood', 'neutral'))
+    if mood is None:
+        raise HTTPException(status_code=400, detail=f"Unknown mood: {request_data.get('mood')}")
     try:
         customer_data = request_data.get('customer_data', {})
-        mood = request_data.get('mood', 'neutral')
-        recommendations = await recommendation_agent.generate_mood_based_recommendations(customer_data, mood)
+        recommendations = await recommendation_agent.generate_mood_based_recommendations(
+            customer_data, mood, db, limit=request_data.get('limit')
+        )
         return {"status": "success", "recommendations": recommendations}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -103,14 +111,24 @@ async def get_product_story(
 @router.post("/recommendations/feedback")
 async def update_recommendation_feedback(
     request_data: Dict[str, Any],
-    recommendation_agent: RecommendationAgent = Depends(get_recommendation_agent)
+    db: Session = Depends(get_db)
 ):
-    """Update recommendation based on feedback"""
+    """Learn ranking weights from feedback (click, add_to_cart, purchase or dismiss)"""
+    recommendation = request_data.get('recommendation', {})
+    feedback = request_data.get('feedback', {})
+    customer_id = recommendation.get('customer_id') or request_data.get('customer_id')
+    product_id = recommendation.get('product_id') or request_data.get('product_id')
+    event = feedback.get('type') or feedback.get('event')
+    if not customer_id or not product_id or event not in FEEDBACK_EVENTS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"customer_id, product_id and a feedback type in {sorted(FEEDBACK_EVENTS)} are required"
+        )
     try:
-        recommendation = request_data.get('recommendation', {})
-        feedback = request_data.get('feedback', {})
-        updated_recommendation = await recommendation_agent.update_recommendation_feedback(recommendation, feedback)
-        return {"status": "success", "updated_recommendation": updated_recommendation}
+        model_update = ranking_model.record_feedback(db, customer_id, product_id, event)
+        return {"status": "success", "model_update": model_update}
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -166,6 +184,7 @@ async def track_mood(
         )
         db.add(new_mood)
         db.commit()
+        customer_changed(db, customer_id, "mood")
 
         return {"status": "success", "message": "Mood tracked successfully"}
     except Exception as e:
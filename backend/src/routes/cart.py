@@ -3,8 +3,13 @@ from sqlalchemy.orm import Session
 from typing import List
 from ..database import get_db
 from ..database.models import Cart, CartItem, Product
+from ..models import Product as CatalogProduct
 from ..schemas.cart import CartResponse, CartItemCreate, CartItemUpdate
+from ..schemas.product import ProductResponse
 from ..routes.auth import get_current_user
+from ..services.basket_rules import bought_together_service
+from ..services.recommendation_events import customer_changed, product_interacted
+from ..services.scoring_engine import get_scoring_engine
 
 router = APIRouter()
 
@@ -21,6 +26,28 @@ async def get_cart(
         db.refresh(cart)
     return cart
 
+@router.get("/cart/recommendations", response_model=List[ProductResponse])
+async def get_cart_recommendations(
+    limit: int = 10,
+    current_user = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    cart = db.query(Cart).filter(Cart.customer_id == current_user.id).first()
+    if not cart or not cart.items:
+        return []
+    
+    # Scored against the same catalog engine as the product routes
+    engine = get_scoring_engine(db, CatalogProduct)
+    together = bought_together_service.for_basket(engine, [item.product_id for item in cart.items], limit)
+    if not together:
+        return []
+    
+    products = {
+        product.id: product
+        for product in db.query(Product).filter(Product.id.in_([pid for pid, _ in together])).all()
+    }
+    return [products[pid] for pid, _ in together if pid in products]
+
 @router.post("/cart/items/", response_model=CartResponse)
 async def add_to_cart(
     item: CartItemCreate,
@@ -58,6 +85,8 @@ async def add_to_cart(
     
     db.commit()
     db.refresh(cart)
+    customer_changed(db, current_user.id, "cart_add")
+    product_interacted(db, product, "cart_add", item.quantity, current_user)
     return cart
 
 @router.put("/cart/items/{product_id}", response_model=CartResponse)
@@ -86,6 +115,7 @@ async def update_cart_item(
     
     db.commit()
     db.refresh(cart)
+    customer_changed(db, current_user.id, "cart_update")
     return cart
 
 @router.delete("/cart/items/{product_id}", response_model=CartResponse)
@@ -109,6 +139,7 @@ async def remove_from_cart(
     db.delete(cart_item)
     db.commit()
     db.refresh(cart)
+    customer_changed(db, current_user.id, "cart_remove")
     return cart
 
 @router.delete("/cart/", response_model=CartResponse)
@@ -123,4 +154,5 @@ async def clear_cart(
     db.query(CartItem).filter(CartItem.cart_id == cart.id).delete()
     db.commit()
     db.refresh(cart)
+    customer_changed(db, current_user.id, "cart_clear")
     return cart 
\ No newline at end of file
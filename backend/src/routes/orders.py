@@ -5,6 +5,7 @@ from ..database import get_db
 from ..database.models import Order, OrderItem, Cart, CartItem, Product
 from ..schemas.order import OrderCreate, OrderResponse, OrderItemResponse
 from ..routes.auth import get_current_user
+from ..services.recommendation_events import customer_changed, product_changed, product_interacted
 
 router = APIRouter()
 
@@ -37,6 +38,8 @@ async def create_order(
     
     # Create order items and calculate total
     total_amount = 0
+    sold_out = []
+    ordered = []
     for cart_item in cart_items:
         product = db.query(Product).filter(Product.id == cart_item.product_id).first()
         if not product:
@@ -50,6 +53,8 @@ async def create_order(
         
         # Update product stock
         product.stock -= cart_item.quantity
+        if product.stock == 0:
+            sold_out.append(product.id)
         
         # Create order item
         order_item = OrderItem(
@@ -59,6 +64,7 @@ async def create_order(
             price=product.price
         )
         db.add(order_item)
+        ordered.append((product, cart_item.quantity))
         
         # Add to total
         total_amount += product.price * cart_item.quantity
@@ -71,6 +77,11 @@ async def create_order(
     # Clear cart
     db.query(CartItem).filter(CartItem.cart_id == cart.id).delete()
     db.commit()
+    customer_changed(db, current_user.id, "order")
+    for product_id in sold_out:
+        product_changed(db, product_id, "sold_out")
+    for product, quantity in ordered:
+        product_interacted(db, product, "purchase", quantity, current_user)
     
     return db_order
 
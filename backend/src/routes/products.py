@@ -1,9 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import uuid
+import numpy as np
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from ..database import get_db
+from ..database.models import CustomerBehavior
 from ..models import Product
 from ..schemas.product import ProductCreate, ProductUpdate, ProductResponse
+from ..routes.auth import get_current_user
+from ..services.basket_rules import bought_together_service
+from ..services.bitmap_index import get_bitmap_index
+from ..services.item_similarity import item_similarity_service
+from ..services.recommendation_events import product_changed, product_interacted
+from ..services.scoring_engine import LOCATION_ALIASES, get_scoring_engine
+from ..services.trending import trending_engine
 
 router = APIRouter()
 
@@ -11,45 +21,122 @@ router = APIRouter()
 async def get_products(
     skip: int = 0,
     limit: int = 100,
-    category: Optional[str] = None,
-    subcategory: Optional[str] = None,
-    brand: Optional[str] = None,
+    category: Optional[List[str]] = Query(None),
+    subcategory: Optional[List[str]] = Query(None),
+    brand: Optional[List[str]] = Query(None),
+    season: Optional[List[str]] = Query(None),
+    holiday: Optional[List[str]] = Query(None),
+    location: Optional[List[str]] = Query(None),
+    in_stock: Optional[bool] = None,
     min_price: Optional[float] = None,
     max_price: Optional[float] = None,
     min_rating: Optional[float] = None,
     db: Session = Depends(get_db)
 ):
-    query = db.query(Product)
-    
-    if category:
-        query = query.filter(Product.category == category)
-    if subcategory:
-        query = query.filter(Product.subcategory == subcategory)
-    if brand:
-        query = query.filter(Product.brand == brand)
-    if min_price is not None:
-        query = query.filter(Product.price >= min_price)
-    if max_price is not None:
-        query = query.filter(Product.price <= max_price)
+    # Repeated values of one filter are ORed, different filters are ANDed
+    engine = get_scoring_engine(db, Product)
+    index = get_bitmap_index(engine)
+    mask = index.select(
+        in_stock=in_stock,
+        category=category,
+        subcategory=subcategory,
+        brand=brand,
+        season=season,
+        holiday=holiday,
+        location=location
+    )
+    if min_price is not None or max_price is not None:
+        mask &= index.between("price", min_price, max_price)
     if min_rating is not None:
-        query = query.filter(Product.rating >= min_rating)
+        mask &= index.between("rating", min_rating)
+    
+    page = engine.matrix.ids[np.flatnonzero(mask)[skip:skip + limit]].tolist()
+    if not page:
+        return []
     
-    products = query.offset(skip).limit(limit).all()
-    return products
+    products = {product.id: product for product in db.query(Product).filter(Product.id.in_(page)).all()}
+    return [products[pid] for pid in page if pid in products]
+
+@router.get("/products/trending", response_model=List[ProductResponse])
+async def get_trending_products(
+    category: Optional[str] = None,
+    location: Optional[str] = None,
+    limit: int = 10,
+    db: Session = Depends(get_db)
+):
+    # Interactions are counted under product locations (Mumbai -> India)
+    trending = trending_engine.trending(category, LOCATION_ALIASES.get(location, location), limit)
+    if not trending:
+        return []
+    
+    products = {
+        product.id: product
+        for product in db.query(Product).filter(Product.id.in_([pid for pid, _ in trending])).all()
+    }
+    return [products[pid] for pid, _ in trending if pid in products]
 
 @router.get("/products/{product_id}", response_model=ProductResponse)
 async def get_product(product_id: int, db: Session = Depends(get_db)):
     product = db.query(Product).filter(Product.id == product_id).first()
     if product is None:
         raise HTTPException(status_code=404, detail="Product not found")
+    product_interacted(db, product, "view")
     return product
 
+@router.post("/products/{product_id}/view", status_code=status.HTTP_204_NO_CONTENT)
+async def record_product_view(
+    product_id: int,
+    time_spent: int = 0,
+    clicks: int = 1,
+    current_user = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    product = db.query(Product).filter(Product.id == product_id).first()
+    if product is None:
+        raise HTTPException(status_code=404, detail="Product not found")
+    
+    db.add(CustomerBehavior(
+        id=str(uuid.uuid4()),
+        customer_id=current_user.id,
+        product_id=product_id,
+        time_spent=time_spent,
+        clicks=clicks
+    ))
+    db.commit()
+    product_interacted(db, product, "view", customer=current_user)
+
+@router.get("/products/{product_id}/similar", response_model=List[ProductResponse])
+async def get_similar_products(product_id: int, limit: int = 10, db: Session = Depends(get_db)):
+    similar = item_similarity_service.similar(product_id, limit)
+    if not similar:
+        return []
+    
+    products = {
+        product.id: product
+        for product in db.query(Product).filter(Product.id.in_([pid for pid, _ in similar])).all()
+    }
+    return [products[pid] for pid, _ in similar if pid in products]
+
+@router.get("/products/{product_id}/bought-together", response_model=List[ProductResponse])
+async def get_bought_together(product_id: int, limit: int = 10, db: Session = Depends(get_db)):
+    engine = get_scoring_engine(db, Product)
+    together = bought_together_service.bought_together(engine, product_id, limit)
+    if not together:
+        return []
+    
+    products = {
+        product.id: product
+        for product in db.query(Product).filter(Product.id.in_([pid for pid, _ in together])).all()
+    }
+    return [products[pid] for pid, _ in together if pid in products]
+
 @router.post("/products/", response_model=ProductResponse)
 async def create_product(product: ProductCreate, db: Session = Depends(get_db)):
     db_product = Product(**product.dict())
     db.add(db_product)
     db.commit()
     db.refresh(db_product)
+    product_changed(db, db_product.id, "created")
     return db_product
 
 @router.put("/products/{product_id}", response_model=ProductResponse)
@@ -67,6 +154,7 @@ async def update_product(
     
     db.commit()
     db.refresh(db_product)
+    product_changed(db, db_product.id, "updated")
     return db_product
 
 @router.delete("/products/{product_id}")
@@ -77,6 +165,7 @@ async def delete_product(product_id: int, db: Session = Depends(get_db)):
     
     db.delete(db_product)
     db.commit()
+    product_changed(db, product_id, "deleted")
     return {"message": "Product deleted successfully"}
 
 @router.get("/products/categories/")
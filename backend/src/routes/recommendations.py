@@ -1,14 +1,29 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
-from typing import List
+from typing import Any, Dict, List, Optional
+from datetime import datetime
+from src.agents.recommendation_agent import RecommendationAgent
 from src.database import get_db
-from src.schemas.recommendation import RecommendationResponse
+from src.database.models import CustomerMood
+from src.models import Customer, Product
+from src.routes.auth import get_current_user
+from src.schemas.recommendation import RecommendationBase
+from src.services.collaborative_filtering import cf_service
+from src.services.mood_affinity import parse_mood
+from src.services.ranking_model import FEEDBACK_EVENTS, ranking_model
+from src.services.recommendation_events import customer_changed
 from src.services.recommendation_service import RecommendationService
+from src.services.scoring_engine import LOCATION_ALIASES, get_scoring_engine, load_scored_products
+from src.services.segment_rankings import segment_rankings
+from src.services.session_store import session_store
 
 router = APIRouter()
 recommendation_service = RecommendationService()
 
-@router.get("/recommendations", response_model=List[RecommendationResponse])
+def get_recommendation_agent() -> RecommendationAgent:
+    return RecommendationAgent()
+
+@router.get("/recommendations", response_model=List[RecommendationBase])
 async def get_recommendations(
     customer_id: str,
     limit: int = 5,
@@ -18,23 +33,163 @@ async def get_recommendations(
     try:
         recommendations = await recommendation_service.generate_recommendations(
             customer_id=customer_id,
-            limit=limit
+            limit=limit,
+            db=db
         )
         return recommendations
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/recommendations/collaborative", response_model=List[Dict[str, Any]])
+async def get_collaborative_recommendations(
+    customer_id: str,
+    limit: int = 10,
+    db: Session = Depends(get_db)
+):
+    """Get top-N products from the collaborative filtering model."""
+    if cf_service.model is None:
+        raise HTTPException(status_code=503, detail="Collaborative filtering model is not loaded")
+    engine = get_scoring_engine(db, Product)
+    top = cf_service.recommend(customer_id, engine, limit)
+    return [
+        {"product_id": product.product_id, "score": score}
+        for product, score in load_scored_products(db, Product, engine, top)
+    ]
+
+@router.get("/recommendations/popular", response_model=List[Dict[str, Any]])
+async def get_popular_recommendations(
+    season: Optional[str] = None,
+    holiday: Optional[str] = None,
+    location: Optional[str] = None,
+    segment: Optional[str] = None,
+    limit: int = 10,
+    db: Session = Depends(get_db)
+):
+    """Get precomputed top products for a shopping context; works for anonymous visitors."""
+    engine = get_scoring_engine(db, Product)
+    top = segment_rankings.ranked(
+        engine,
+        season=season,
+        holiday=holiday,
+        location=LOCATION_ALIASES.get(location, location),
+        segment=segment,
+        limit=limit
+    )
+    return [
+        {"product_id": product.product_id, "score": score}
+        for product, score in load_scored_products(db, Product, engine, top)
+    ]
+
+@router.post("/recommendations/mood")
+async def get_mood_based_recommendations(
+    request_data: Dict[str, Any],
+    recommendation_agent: RecommendationAgent = Depends(get_recommendation_agent),
+    db: Session = Depends(get_db)
+):
+    """Get recommendations re-ranked for a mood; unknown moods are rejected."""
+    mood = parse_mood(request_data.get('mood', 'neutral'))
+    if mood is None:
+        raise HTTPException(status_code=400, detail=f"Unknown mood: {request_data.get('mood')}")
+    try:
+        customer_data = request_data.get('customer_data', {})
+        recommendations = await recommendation_agent.generate_mood_based_recommendations(
+            customer_data, mood, db, limit=request_data.get('limit')
+        )
+        return {"status": "success", "recommendations": recommendations}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/recommendations/feedback")
+async def record_recommendation_feedback(
+    request_data: Dict[str, Any],
+    db: Session = Depends(get_db)
+):
+    """Learn ranking weights from feedback (click, add_to_cart, purchase or dismiss) on a public customer/product ID."""
+    recommendation = request_data.get('recommendation', {})
+    feedback = request_data.get('feedback', {})
+    customer_id = recommendation.get('customer_id') or request_data.get('customer_id')
+    product_id = recommendation.get('product_id') or request_data.get('product_id')
+    event = feedback.get('type') or feedback.get('event')
+    if not customer_id or not product_id or event not in FEEDBACK_EVENTS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"customer_id, product_id and a feedback type in {sorted(FEEDBACK_EVENTS)} are required"
+        )
+    try:
+        model_update = ranking_model.record_feedback(db, customer_id, product_id, event)
+        return {"status": "success", "model_update": model_update}
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/mood/track")
+async def track_mood(
+    request_data: Dict[str, Any],
+    db: Session = Depends(get_db)
+):
+    """Record a customer's current mood; their cached and materialized recommendations are refreshed."""
+    customer_id = request_data.get('customer_id')
+    if not customer_id or not request_data.get('mood'):
+        raise HTTPException(status_code=400, detail="Customer ID and mood are required")
+    mood = parse_mood(request_data['mood'])
+    if mood is None:
+        raise HTTPException(status_code=400, detail=f"Unknown mood: {request_data['mood']}")
+
+    customer = db.query(Customer).filter(Customer.customer_id == customer_id).first()
+    if not customer:
+        raise HTTPException(status_code=404, detail="Customer not found")
+
+    try:
+        db.add(CustomerMood(
+            id=f"MOOD_{datetime.utcnow().timestamp()}",
+            customer_id=customer.id,
+            mood=mood
+        ))
+        db.commit()
+        customer_changed(db, customer.id, "mood")
+        return {"status": "success", "message": "Mood tracked successfully"}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/recommendations/continue-shopping", response_model=List[Dict[str, Any]])
+async def get_continue_shopping(
+    limit: int = 10,
+    current_user = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Get neighbours of the products in the signed-in customer's live session, ranked from memory."""
+    # Sessions are keyed by database ids; only the page of results is read back for public ids
+    recommended = session_store.continue_shopping(current_user.id, limit)
+    if not recommended:
+        return []
+    public_ids = dict(
+        db.query(Product.id, Product.product_id).filter(Product.id.in_([pid for pid, _ in recommended])).all()
+    )
+    return [
+        {"product_id": public_ids[product_id], "score": score}
+        for product_id, score in recommended
+        if product_id in public_ids
+    ]
+
 @router.get("/recommendations/{product_id}/explanation", response_model=str)
 async def get_recommendation_explanation(
     product_id: str,
     customer_id: str,
+    locale: Optional[str] = None,
+    enrich: Optional[bool] = None,
     db: Session = Depends(get_db)
 ):
-    """Get an explanation for why a product is recommended to a customer."""
+    """Get an explanation for why a product is recommended to a customer.
+
+    With enrich=true an LLM rewrite is started in the background; poll again to fetch it.
+    """
     try:
         explanation = await recommendation_service.explain_recommendation(
             customer_id=customer_id,
-            product_id=product_id
+            product_id=product_id,
+            locale=locale,
+            enrich=enrich
         )
         return explanation
     except Exception as e:
@@ -0,0 +1,299 @@
+"""
+Offline association rules ("frequently bought together").
+
+Pairwise rules are mined from sparse basket matrices: the co-occurrence
+counts of every item pair come from one sparse product, and the support,
+confidence and lift of each rule are derived from them. Two rule sets are kept:
+- products: placed orders, grouped by order
+- subcategories: customer purchase histories plus the subcategories of every
+  order, used to fill in products that have too few orders of their own
+
+Only the top rules per item are stored, in CSR arrays, so serving a
+"bought together" list is a slice lookup.
+"""
+import heapq
+import os
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from ..config import settings
+from ..utils.logger import setup_logger
+from .collaborative_filtering import DEFAULT_CUSTOMER_DATA_PATH
+from .scoring_engine import ProductMatrix, ScoringEngine, as_list
+
+logger = setup_logger(__name__)
+
+def load_purchase_histories(path: str = DEFAULT_CUSTOMER_DATA_PATH) -> List[List[str]]:
+    """Purchased subcategories of every customer in the customer data CSV"""
+    df = pd.read_csv(path, usecols=['Purchase_History'])
+    return [as_list(purchases) for purchases in df['Purchase_History']]
+
+def subcategory_baskets(matrix: ProductMatrix, baskets: Iterable[Sequence[Any]]) -> List[List[str]]:
+    """Translate baskets of product ids to baskets of their subcategories"""
+    names = np.array(list(matrix.subcategory.index) + [None], dtype=object)
+    return [
+        [name for name in names[matrix.subcategory.codes[matrix.rows_for(set(basket))]] if name is not None]
+        for basket in baskets
+    ]
+
+class AssociationRules:
+    """Top pairwise rules per antecedent item stored as CSR arrays"""
+
+    def __init__(
+        self,
+        items: np.ndarray,
+        indptr: np.ndarray,
+        indices: np.ndarray,
+        confidence: np.ndarray,
+        lift: np.ndarray,
+        support: np.ndarray,
+        baskets: int
+    ):
+        self.items = items
+        self.indptr = indptr
+        self.indices = indices
+        self.confidence = confidence
+        self.lift = lift
+        self.support = support
+        self.baskets = baskets
+        self.item_list = items.tolist()
+        self.row_by_item = {item: row for row, item in enumerate(self.item_list)}
+
+    @classmethod
+    def mine(
+        cls,
+        baskets: Sequence[Sequence[Any]],
+        k: int = 20,
+        min_support: int = 2,
+        min_lift: float = 1.0
+    ) -> "AssociationRules":
+        """
+        Mine X -> Y rules for every item pair bought together.
+
+        Args:
+            baskets: Items bought together (orders or purchase histories)
+            k: Rules kept per antecedent, by descending confidence
+            min_support: Minimum number of baskets containing both items
+            min_lift: Rules at or below this lift are dropped (1 means independent)
+
+        Returns:
+            Association rules
+        """
+        items: Dict[Any, int] = {}
+        rows, cols = [], []
+        for number, basket in enumerate(baskets):
+            for item in set(basket):
+                rows.append(number)
+                cols.append(items.setdefault(item, len(items)))
+        n = len(baskets)
+        matrix = sparse.csr_matrix((np.ones(len(rows), dtype=np.float32), (rows, cols)), shape=(n, len(items)))
+
+        support = np.asarray(matrix.sum(axis=0)).ravel()
+        pairs = (matrix.T @ matrix).tocoo()
+        keep = (pairs.row != pairs.col) & (pairs.data >= min_support)
+        antecedent, consequent, together = pairs.row[keep], pairs.col[keep], pairs.data[keep]
+
+        confidence = together / support[antecedent]
+        lift = confidence * n / support[consequent]
+        keep = lift > min_lift
+        antecedent, consequent = antecedent[keep], consequent[keep]
+        confidence, lift = confidence[keep], lift[keep]
+
+        # Best rules first within each antecedent, then cut every antecedent to k
+        order = np.lexsort((-lift, -confidence, antecedent))
+        antecedent, consequent = antecedent[order], consequent[order]
+        confidence, lift = confidence[order], lift[order]
+        counts = np.bincount(antecedent, minlength=len(items))
+        starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+        keep = (np.arange(antecedent.size) - starts[antecedent]) < k
+
+        indptr = np.zeros(len(items) + 1, dtype=np.int64)
+        indptr[1:] = np.cumsum(np.minimum(counts, k))
+        logger.info(f"Mined {int(keep.sum())} association rules over {len(items)} items from {n} baskets")
+        return cls(
+            np.asarray(list(items)),
+            indptr,
+            consequent[keep].astype(np.int32),
+            confidence[keep].astype(np.float32),
+            lift[keep].astype(np.float32),
+            support.astype(np.int32),
+            n
+        )
+
+    def __len__(self) -> int:
+        return int(self.indices.size)
+
+    def related(self, item: Any, limit: int = 10) -> List[Tuple[Any, float, float]]:
+        """Rules of an antecedent as (consequent, confidence, lift), empty for unknown items"""
+        row = self.row_by_item.get(item)
+        if row is None:
+            return []
+        start = self.indptr[row]
+        end = min(self.indptr[row + 1], start + max(limit, 0))
+        return [
+            (self.item_list[consequent], float(confidence), float(lift))
+            for consequent, confidence, lift in zip(
+                self.indices[start:end], self.confidence[start:end], self.lift[start:end]
+            )
+        ]
+
+    def arrays(self, prefix: str) -> Dict[str, np.ndarray]:
+        return {
+            f"{prefix}_items": self.items,
+            f"{prefix}_indptr": self.indptr,
+            f"{prefix}_indices": self.indices,
+            f"{prefix}_confidence": self.confidence,
+            f"{prefix}_lift": self.lift,
+            f"{prefix}_support": self.support,
+            f"{prefix}_baskets": np.array(self.baskets),
+        }
+
+    @classmethod
+    def from_arrays(cls, data: Any, prefix: str) -> "AssociationRules":
+        return cls(
+            data[f"{prefix}_items"],
+            data[f"{prefix}_indptr"],
+            data[f"{prefix}_indices"],
+            data[f"{prefix}_confidence"],
+            data[f"{prefix}_lift"],
+            data[f"{prefix}_support"],
+            int(data[f"{prefix}_baskets"])
+        )
+
+class BasketRules:
+    """Product-level and subcategory-level rules mined together"""
+
+    def __init__(self, products: AssociationRules, subcategories: AssociationRules):
+        self.products = products
+        self.subcategories = subcategories
+
+    @classmethod
+    def mine(
+        cls,
+        matrix: ProductMatrix,
+        order_baskets: Sequence[Sequence[Any]],
+        purchase_histories: Sequence[Sequence[str]] = (),
+        k: int = 20,
+        min_support: int = 2,
+        min_lift: float = 1.0
+    ) -> "BasketRules":
+        """
+        Mine both rule sets.
+
+        Args:
+            matrix: Catalog columns, to map ordered products to subcategories
+            order_baskets: Product ids (primary keys) of every order
+            purchase_histories: Purchased subcategories of every customer
+            k: Rules kept per item
+            min_support: Minimum number of baskets containing both items
+            min_lift: Rules at or below this lift are dropped
+
+        Returns:
+            Basket rules
+        """
+        taxonomy = list(purchase_histories) + subcategory_baskets(matrix, order_baskets)
+        return cls(
+            AssociationRules.mine(order_baskets, k, min_support, min_lift),
+            AssociationRules.mine(taxonomy, k, min_support, min_lift)
+        )
+
+    def save(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        np.savez(path, **self.products.arrays("product"), **self.subcategories.arrays("subcategory"))
+
+    @classmethod
+    def load(cls, path: str) -> "BasketRules":
+        with np.load(path) as data:
+            return cls(AssociationRules.from_arrays(data, "product"), AssociationRules.from_arrays(data, "subcategory"))
+
+class BoughtTogetherService:
+    """Serves "bought together" lists for a product or a whole cart from the mined rules"""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.path.join(settings.RECOMMENDER_ARTIFACT_DIR, "basket_rules.npz")
+        self.rules: Optional[BasketRules] = None
+        self._version: Optional[str] = None
+        self._subcategory_top: Dict[int, np.ndarray] = {}
+        self._lock = threading.Lock()
+
+    def load(self) -> bool:
+        """Load the rules from disk if they have been mined"""
+        if not os.path.exists(self.path):
+            logger.warning(f"No basket rules at {self.path}; run `python -m src.cli mine-baskets`")
+            return False
+        self.rules = BasketRules.load(self.path)
+        logger.info(f"Loaded {len(self.rules.products)} product and "
+                    f"{len(self.rules.subcategories)} subcategory rules from {self.path}")
+        return True
+
+    def _best_in_subcategory(self, engine: ScoringEngine, code: int) -> np.ndarray:
+        """In-stock rows of a subcategory by descending popularity, cached per catalog version"""
+        with self._lock:
+            if self._version != engine.version:
+                self._version = engine.version
+                self._subcategory_top = {}
+            rows = self._subcategory_top.get(code)
+            if rows is None:
+                m = engine.matrix
+                rows = np.flatnonzero((m.subcategory.codes == code) & m.in_stock)
+                rows = rows[np.argsort(-m.popularity[rows], kind="stable")][:settings.BASKET_RULES_PER_ITEM]
+                self._subcategory_top[code] = rows
+        return rows
+
+    def for_basket(self, engine: ScoringEngine, product_ids: Sequence[Any], limit: int = 10) -> List[Tuple[Any, float]]:
+        """
+        Products to add to a basket, excluding the ones already in it.
+
+        Product rules are summed over the basket items. Subcategory rules fill
+        in behind them at BASKET_TAXONOMY_WEIGHT, ranked by popularity within
+        each recommended subcategory.
+
+        Args:
+            engine: Scoring engine of the current catalog
+            product_ids: Product ids (primary keys) in the basket
+            limit: Number of results
+
+        Returns:
+            (product id, score) pairs sorted by descending score
+        """
+        if self.rules is None or limit <= 0:
+            return []
+        in_basket = set(product_ids)
+        scores: Dict[Any, float] = {}
+        for product_id in in_basket:
+            for other, confidence, _ in self.rules.products.related(product_id, settings.BASKET_RULES_PER_ITEM):
+                if other not in in_basket:
+                    scores[other] = scores.get(other, 0.0) + confidence
+
+        m = engine.matrix
+        names = list(m.subcategory.index)
+        codes = {int(m.subcategory.codes[row]) for row in m.rows_for(in_basket)} - {-1}
+        for code in codes:
+            for subcategory, confidence, _ in self.rules.subcategories.related(names[code], settings.BASKET_RULES_PER_ITEM):
+                for row in self._best_in_subcategory(engine, m.subcategory.code(subcategory)):
+                    product_id = m.ids[row]
+                    if product_id not in in_basket:
+                        fill = settings.BASKET_TAXONOMY_WEIGHT * confidence * (1 + float(m.popularity[row])) / 2
+                        scores[product_id] = max(scores.get(product_id, 0.0), fill)
+
+        return heapq.nlargest(limit, scores.items(), key=lambda entry: entry[1])
+
+    def bought_together(self, engine: ScoringEngine, product_id: Any, limit: int = 10) -> List[Tuple[Any, float]]:
+        return self.for_basket(engine, [product_id], limit)
+
+    def stats(self) -> Dict[str, Any]:
+        if self.rules is None:
+            return {"loaded": False}
+        return {
+            "loaded": True,
+            "product_rules": len(self.rules.products),
+            "subcategory_rules": len(self.rules.subcategories),
+            "order_baskets": self.rules.products.baskets
+        }
+
+# Create a singleton instance
+bought_together_service = BoughtTogetherService()
@@ -0,0 +1,123 @@
+"""
+Attribute bitmap indexes over the product catalog.
+
+Every value of a categorical attribute owns one bitset (a NumPy bool array
+over the catalog rows), so any AND/OR combination of filters is answered
+with bitwise operations instead of a new SQL query or DataFrame mask.
+"""
+from typing import Any, Dict, Iterable, Optional, Union
+import numpy as np
+from .scoring_engine import ProductMatrix, ScoringEngine, Vocabulary
+
+# Filterable attributes, named after the ProductMatrix vocabularies
+ATTRIBUTES = ("category", "subcategory", "brand", "season", "holiday", "location")
+
+# Range-filterable columns -> ProductMatrix arrays of the stored values
+RANGES = {"price": "stored_price", "rating": "stored_rating"}
+
+def _bitsets(vocabulary: Vocabulary, size: int) -> np.ndarray:
+    """(values + 1, rows) bool matrix; the trailing bitset holds rows without a value"""
+    bitsets = np.zeros((len(vocabulary) + 1, size), dtype=bool)
+    bitsets[vocabulary.codes, np.arange(size)] = True
+    return bitsets
+
+class BitmapIndex:
+    """One bitset per attribute value plus in-stock/sold-out bitsets and range columns"""
+
+    def __init__(self, matrix: ProductMatrix, version: str = ""):
+        self.matrix = matrix
+        self.version = version
+        self.size = matrix.size
+        self.bitsets = {attribute: _bitsets(getattr(matrix, attribute), matrix.size) for attribute in ATTRIBUTES}
+        self.in_stock = matrix.in_stock
+        self.sold_out = ~matrix.in_stock
+        self.ranges = {column: getattr(matrix, source) for column, source in RANGES.items()}
+
+    def bitmap(self, attribute: str, value: Optional[str]) -> np.ndarray:
+        """
+        Rows carrying an attribute value; unknown values match nothing.
+
+        The returned array is shared; combine it with ``&``/``|`` rather than
+        modifying it in place.
+        """
+        code = getattr(self.matrix, attribute).code(value)
+        if code < 0:
+            return np.zeros(self.size, dtype=bool)
+        return self.bitsets[attribute][code]
+
+    def any_of(self, attribute: str, values: Iterable[Optional[str]]) -> np.ndarray:
+        """Rows carrying at least one of the values (OR)"""
+        vocabulary = getattr(self.matrix, attribute)
+        codes = [code for code in (vocabulary.code(value) for value in values) if code >= 0]
+        if not codes:
+            return np.zeros(self.size, dtype=bool)
+        return np.logical_or.reduce(self.bitsets[attribute][codes], axis=0)
+
+    def select(self, in_stock: Optional[bool] = None, **filters: Union[None, str, Iterable[str]]) -> np.ndarray:
+        """
+        AND across attributes of the OR within each attribute's values.
+
+        Args:
+            in_stock: Keep only in-stock (True) or sold-out (False) products
+            **filters: Attribute name -> value or list of values; None or empty means no filter
+
+        Returns:
+            Boolean mask over the catalog rows
+
+        Example:
+            index.select(category=["Books", "Fashion"], season="Winter", in_stock=True)
+        """
+        mask = np.ones(self.size, dtype=bool)
+        for attribute, values in filters.items():
+            if attribute not in self.bitsets:
+                raise ValueError(f"Unknown product attribute: {attribute}")
+            if values is None or (not isinstance(values, str) and not values):
+                continue
+            values = [values] if isinstance(values, str) else values
+            mask &= self.any_of(attribute, values)
+        if in_stock is not None:
+            mask &= self.in_stock if in_stock else self.sold_out
+        return mask
+
+    def between(self, column: str, low: Optional[float] = None, high: Optional[float] = None) -> np.ndarray:
+        """
+        Rows whose stored price or rating lies in [low, high], as a SQL range would.
+
+        Values are compared as stored (not the scoring engine's normalized
+        copies) and NULLs never match.
+        """
+        if column not in self.ranges:
+            raise ValueError(f"Unknown range column: {column}")
+        values = self.ranges[column]
+        mask = ~np.isnan(values)
+        if low is not None:
+            mask &= values >= low
+        if high is not None:
+            mask &= values <= high
+        return mask
+
+    def values(self, attribute: str) -> Dict[str, int]:
+        """Number of products per value of an attribute"""
+        counts = self.bitsets[attribute][:-1].sum(axis=1)
+        return dict(zip(getattr(self.matrix, attribute).index, counts.tolist()))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "rows": self.size,
+            "bitsets": {attribute: int(bitsets.shape[0]) for attribute, bitsets in self.bitsets.items()},
+            "bytes": int(sum(bitsets.nbytes for bitsets in self.bitsets.values()))
+        }
+
+# Indexes for recent catalog versions
+_indexes: Dict[str, BitmapIndex] = {}
+MAX_CACHED_INDEXES = 4
+
+def get_bitmap_index(engine: ScoringEngine) -> BitmapIndex:
+    """Get the bitmap index for the engine's catalog version, building it once"""
+    index = _indexes.get(engine.version)
+    if index is None or index.matrix is not engine.matrix:
+        index = BitmapIndex(engine.matrix, engine.version)
+        _indexes[engine.version] = index
+        while len(_indexes) > MAX_CACHED_INDEXES:
+            del _indexes[next(iter(_indexes))]
+    return index
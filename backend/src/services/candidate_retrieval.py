@@ -0,0 +1,72 @@
+"""
+First-stage candidate retrieval for the recommendation pipeline.
+"""
+from typing import Any, Dict, Optional
+import numpy as np
+from .bitmap_index import BitmapIndex, get_bitmap_index
+from .scoring_engine import ProductMatrix, ScoringEngine, match_mask
+
+class CandidateRetriever:
+    """
+    Narrows the catalog to a shortlist using the attribute bitmap index.
+
+    Candidates are the in-stock products in the categories and subcategories
+    the customer browsed or bought. The pool is ranked by season and location
+    fit plus popularity and topped up with globally popular products when the
+    customer's history is thin.
+    """
+
+    def __init__(self, matrix: ProductMatrix, version: str = "", bitmaps: Optional[BitmapIndex] = None):
+        self.matrix = matrix
+        self.version = version
+        self.bitmaps = bitmaps or BitmapIndex(matrix, version)
+
+        in_stock = np.flatnonzero(matrix.in_stock)
+        self.popular_rows = in_stock[np.argsort(-matrix.popularity[in_stock], kind="stable")]
+
+    def _affinity_rows(self, affinity: Dict[str, float]) -> np.ndarray:
+        """In-stock rows in any of the affinity categories or subcategories"""
+        mask = self.bitmaps.any_of("category", affinity) | self.bitmaps.any_of("subcategory", affinity)
+        return np.flatnonzero(mask & self.bitmaps.in_stock)
+
+    def retrieve(self, profile: Dict[str, Any], limit: int) -> np.ndarray:
+        """
+        Retrieve up to ``limit`` candidate rows for a customer profile.
+
+        Args:
+            profile: Output of build_customer_profile
+            limit: Maximum number of candidates
+
+        Returns:
+            Array of catalog rows
+        """
+        if limit <= 0:
+            return np.zeros(0, dtype=np.int64)
+
+        m = self.matrix
+        rows = self._affinity_rows(profile.get("category_affinity") or {})
+
+        if rows.size > limit:
+            prior = m.popularity[rows].copy()
+            prior += match_mask(m.season, rows, profile.get("season"))
+            prior += match_mask(m.location, rows, profile.get("location"))
+            rows = rows[np.argpartition(-prior, limit - 1)[:limit]]
+        elif rows.size < limit:
+            fill = self.popular_rows[~np.isin(self.popular_rows, rows)][:limit - rows.size]
+            rows = np.concatenate([rows, fill])
+
+        return rows.astype(np.int64)
+
+# Retrievers for recent catalog versions
+_retrievers: Dict[str, CandidateRetriever] = {}
+MAX_CACHED_RETRIEVERS = 4
+
+def get_candidate_retriever(engine: ScoringEngine) -> CandidateRetriever:
+    """Get the retriever for the engine's catalog version, building it once"""
+    retriever = _retrievers.get(engine.version)
+    if retriever is None or retriever.matrix is not engine.matrix:
+        retriever = CandidateRetriever(engine.matrix, engine.version, get_bitmap_index(engine))
+        _retrievers[engine.version] = retriever
+        while len(_retrievers) > MAX_CACHED_RETRIEVERS:
+            del _retrievers[next(iter(_retrievers))]
+    return retriever
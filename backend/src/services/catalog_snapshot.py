@@ -0,0 +1,151 @@
+"""
+Binary columnar snapshot of the product catalog CSV.
+
+The cleaned catalog is compiled once into one .npy file per column: numeric
+columns as they are, text columns as categorical integer codes plus a string
+table, and unique keys (Product_ID) as fixed-width strings. Loading
+memory-maps the column files instead of parsing the CSV. A manifest records
+the CSV's SHA-256, and the snapshot is only rebuilt when that hash changes;
+the CSV's size and mtime avoid re-hashing an unchanged file.
+"""
+import hashlib
+import json
+import os
+from typing import Any, Dict, Optional
+import numpy as np
+import pandas as pd
+from ..config import settings
+from ..utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+MANIFEST = "manifest.json"
+FORMAT_VERSION = 1
+
+def file_digest(path: str, chunk_size: int = 1 << 20) -> str:
+    """SHA-256 of a file, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class CatalogSnapshot:
+    """Compiled, memory-mappable copy of one catalog CSV"""
+
+    def __init__(self, csv_path: str, directory: Optional[str] = None):
+        self.csv_path = csv_path
+        self.directory = directory or os.path.join(settings.RECOMMENDER_ARTIFACT_DIR, "catalog_snapshot")
+        self.manifest_path = os.path.join(self.directory, MANIFEST)
+
+    def _read_manifest(self) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self.manifest_path) as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return manifest if manifest.get("format") == FORMAT_VERSION else None
+
+    def _write_manifest(self, manifest: Dict[str, Any]):
+        temporary = f"{self.manifest_path}.tmp"
+        with open(temporary, "w") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(temporary, self.manifest_path)
+
+    def _source(self) -> Dict[str, int]:
+        stat = os.stat(self.csv_path)
+        return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+    def is_current(self, manifest: Optional[Dict[str, Any]] = None) -> bool:
+        """
+        Whether the snapshot was compiled from the CSV as it is now.
+
+        Size and mtime are compared first; when they differ the CSV is hashed,
+        and a matching hash (e.g. after a touch or a fresh checkout) only
+        refreshes the manifest.
+        """
+        manifest = manifest or self._read_manifest()
+        if manifest is None or not os.path.exists(self.csv_path):
+            return False
+        source = self._source()
+        if manifest["source"] == source:
+            return True
+        if file_digest(self.csv_path) != manifest["sha256"]:
+            return False
+        manifest["source"] = source
+        try:
+            self._write_manifest(manifest)
+        except OSError as e:
+            # Still current; the CSV is just hashed again next time
+            logger.warning(f"Could not refresh catalog snapshot manifest: {e}")
+        return True
+
+    def save(self, df: pd.DataFrame, sha256: Optional[str] = None):
+        """
+        Compile a cleaned catalog frame into the snapshot directory.
+
+        Args:
+            df: Catalog frame (as loaded from the CSV)
+            sha256: Digest of the CSV the frame was read from (computed if omitted)
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        # Invalidate first so a half-written snapshot is never loaded
+        if os.path.exists(self.manifest_path):
+            os.remove(self.manifest_path)
+
+        columns = []
+        for position, name in enumerate(df.columns):
+            series = df[name]
+            entry = {"name": str(name), "file": f"column_{position}.npy"}
+            if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+                entry["kind"] = "numeric"
+                np.save(os.path.join(self.directory, entry["file"]), series.to_numpy())
+            elif series.notna().all() and series.is_unique:
+                # Keys such as Product_ID: codes would not save anything over the strings themselves
+                entry["kind"] = "text"
+                np.save(os.path.join(self.directory, entry["file"]), series.astype(str).to_numpy(dtype=str))
+            else:
+                categorical = pd.Categorical(series)
+                entry["kind"] = "categorical"
+                entry["categories"] = f"column_{position}.categories.npy"
+                np.save(os.path.join(self.directory, entry["file"]), categorical.codes.astype(np.int32))
+                np.save(
+                    os.path.join(self.directory, entry["categories"]),
+                    np.asarray(categorical.categories.astype(str), dtype=str)
+                )
+            columns.append(entry)
+
+        self._write_manifest({
+            "format": FORMAT_VERSION,
+            "sha256": sha256 or file_digest(self.csv_path),
+            "source": self._source(),
+            "rows": len(df),
+            "columns": columns,
+        })
+        logger.info(f"Compiled catalog snapshot of {len(df)} rows to {self.directory}")
+
+    def load(self) -> Optional[pd.DataFrame]:
+        """
+        Memory-map the snapshot.
+
+        Returns:
+            Catalog frame with categorical text columns, or None when the
+            snapshot is missing or stale
+        """
+        manifest = self._read_manifest()
+        if not self.is_current(manifest):
+            return None
+        try:
+            data = {}
+            for entry in manifest["columns"]:
+                values = np.load(os.path.join(self.directory, entry["file"]), mmap_mode="r")
+                if entry["kind"] == "categorical":
+                    categories = np.load(os.path.join(self.directory, entry["categories"]))
+                    values = pd.Categorical.from_codes(values, categories=categories)
+                elif entry["kind"] == "text":
+                    values = values.astype(object)
+                data[entry["name"]] = values
+            return pd.DataFrame(data, copy=False)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Unreadable catalog snapshot at {self.directory}: {e}")
+            return None
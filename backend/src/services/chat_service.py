@@ -1,14 +1,10 @@
 from typing import Optional
-import google.generativeai as genai
-from ..config import settings
+from .llm_gateway import llm_gateway
+from .model_registry import model_registry
 
 class ChatService:
     def __init__(self):
-        if settings.GEMINI_API_KEY:
-            genai.configure(api_key=settings.GEMINI_API_KEY)
-            self.model = genai.GenerativeModel('gemini-pro')
-        else:
-            self.model = None
+        self.model = model_registry.get('gemini-pro')
 
     async def process_message(self, customer_id: str, message: str) -> str:
         if not self.model:
@@ -24,7 +20,6 @@ class ChatService:
             """
 
             # Generate response
-            response = await self.model.generate_content_async(prompt)
-            return response.text
+            return await llm_gateway.generate(self.model, prompt)
         except Exception as e:
             return f"Error processing message: {str(e)}" 
\ No newline at end of file
@@ -0,0 +1,242 @@
+"""
+Implicit-feedback collaborative filtering (ALS) over customer histories.
+
+The customer CSV records browsing history as categories and purchase history
+as subcategories, so the item space is the catalog taxonomy: every category
+and subcategory is an item with its own factor vector. A product is scored
+from the factors of its category and subcategory.
+"""
+import os
+from typing import Iterable, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sqlalchemy.orm import Session
+from ..config import settings
+from ..utils.logger import setup_logger
+from .scoring_engine import ScoringEngine, as_list
+
+logger = setup_logger(__name__)
+
+DEFAULT_CUSTOMER_DATA_PATH = os.path.join(os.path.dirname(__file__), '../../../customer_data_collection.csv')
+
+# Implicit feedback strength per interaction type
+BROWSE_WEIGHT = 1.0
+PURCHASE_WEIGHT = 3.0
+ORDER_WEIGHT = 5.0
+
+Interaction = Tuple[str, str, float]
+
+def load_csv_interactions(path: str = DEFAULT_CUSTOMER_DATA_PATH) -> List[Interaction]:
+    """Read (customer, item, weight) triples from the customer data CSV"""
+    df = pd.read_csv(path, usecols=['Customer_ID', 'Browsing_History', 'Purchase_History'])
+    interactions = []
+    for customer_id, browsing, purchases in df.itertuples(index=False):
+        for category in as_list(browsing):
+            interactions.append((str(customer_id), category, BROWSE_WEIGHT))
+        for subcategory in as_list(purchases):
+            interactions.append((str(customer_id), subcategory, PURCHASE_WEIGHT))
+    return interactions
+
+def load_order_interactions(db: Session) -> List[Interaction]:
+    """Read (customer, item, weight) triples from placed orders"""
+    from ..models import Customer, Order, OrderItem, Product
+
+    rows = db.query(Customer.id, Customer.customer_id, Product.category, Product.subcategory, OrderItem.quantity)\
+        .join(Order, Order.customer_id == Customer.id)\
+        .join(OrderItem, OrderItem.order_id == Order.id)\
+        .join(Product, Product.id == OrderItem.product_id)\
+        .all()
+
+    interactions = []
+    for db_id, customer_key, category, subcategory, quantity in rows:
+        key = customer_key or str(db_id)
+        weight = ORDER_WEIGHT * max(quantity or 1, 1)
+        for item in (category, subcategory):
+            if item:
+                interactions.append((key, item, weight))
+    return interactions
+
+def _solve(interactions: sparse.csr_matrix, fixed: np.ndarray, regularization: float, alpha: float) -> np.ndarray:
+    """One ALS half-step: solve every row's factors with the other side fixed"""
+    factors = fixed.shape[1]
+    gram = fixed.T @ fixed
+    identity = regularization * np.eye(factors)
+    solved = np.zeros((interactions.shape[0], factors), dtype=np.float64)
+
+    indptr, indices, data = interactions.indptr, interactions.indices, interactions.data
+    for row in range(interactions.shape[0]):
+        start, end = indptr[row], indptr[row + 1]
+        if start == end:
+            continue
+        items = fixed[indices[start:end]]
+        confidence = alpha * data[start:end]
+        a = gram + (items.T * confidence) @ items + identity
+        b = items.T @ (1.0 + confidence)
+        solved[row] = np.linalg.solve(a, b)
+    return solved
+
+class CollaborativeFilteringModel:
+    """Customer and item factor matrices from implicit-feedback ALS"""
+
+    def __init__(self, user_ids: List[str], item_ids: List[str], user_factors: np.ndarray, item_factors: np.ndarray):
+        self.user_ids = list(user_ids)
+        self.item_ids = list(item_ids)
+        self.user_index = {user_id: i for i, user_id in enumerate(self.user_ids)}
+        self.item_index = {item_id: i for i, item_id in enumerate(self.item_ids)}
+        self.user_factors = user_factors.astype(np.float32)
+        self.item_factors = item_factors.astype(np.float32)
+
+    @staticmethod
+    def _interaction_matrix(
+        interactions: Iterable[Interaction],
+        user_ids: List[str],
+        item_ids: List[str]
+    ) -> sparse.csr_matrix:
+        user_index = {user_id: i for i, user_id in enumerate(user_ids)}
+        item_index = {item_id: i for i, item_id in enumerate(item_ids)}
+        rows, cols, values = [], [], []
+        for user_id, item_id, weight in interactions:
+            rows.append(user_index[user_id])
+            cols.append(item_index[item_id])
+            values.append(weight)
+        # Duplicate (user, item) pairs are summed
+        return sparse.csr_matrix((values, (rows, cols)), shape=(len(user_ids), len(item_ids)), dtype=np.float64)
+
+    @classmethod
+    def fit(
+        cls,
+        interactions: List[Interaction],
+        factors: int = 16,
+        iterations: int = 10,
+        regularization: float = 0.1,
+        alpha: float = 10.0,
+        initial: Optional["CollaborativeFilteringModel"] = None,
+        seed: int = 42
+    ) -> "CollaborativeFilteringModel":
+        """
+        Train factors with alternating least squares.
+
+        Args:
+            interactions: (customer, item, weight) triples
+            factors: Latent dimensionality
+            iterations: Number of ALS sweeps
+            regularization: L2 penalty
+            alpha: Confidence scaling of implicit feedback
+            initial: Previous model to warm-start from for incremental retraining
+
+        Returns:
+            Trained model
+        """
+        user_ids = sorted({user_id for user_id, _, _ in interactions})
+        item_ids = sorted({item_id for _, item_id, _ in interactions})
+        matrix = cls._interaction_matrix(interactions, user_ids, item_ids)
+
+        rng = np.random.default_rng(seed)
+        if initial is not None:
+            factors = initial.item_factors.shape[1]
+        item_factors = rng.normal(scale=0.01, size=(len(item_ids), factors))
+        user_factors = rng.normal(scale=0.01, size=(len(user_ids), factors))
+        if initial is not None:
+            for i, item_id in enumerate(item_ids):
+                if item_id in initial.item_index:
+                    item_factors[i] = initial.item_factors[initial.item_index[item_id]]
+            for i, user_id in enumerate(user_ids):
+                if user_id in initial.user_index:
+                    user_factors[i] = initial.user_factors[initial.user_index[user_id]]
+
+        transposed = matrix.T.tocsr()
+        for _ in range(iterations):
+            user_factors = _solve(matrix, item_factors, regularization, alpha)
+            item_factors = _solve(transposed, user_factors, regularization, alpha)
+
+        logger.info(f"Trained ALS model: {len(user_ids)} customers, {len(item_ids)} items, {factors} factors")
+        return cls(user_ids, item_ids, user_factors, item_factors)
+
+    def save(self, path: str):
+        """Persist the factor matrices"""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        np.savez_compressed(
+            path,
+            user_ids=np.array(self.user_ids, dtype=str),
+            item_ids=np.array(self.item_ids, dtype=str),
+            user_factors=self.user_factors,
+            item_factors=self.item_factors
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "CollaborativeFilteringModel":
+        """Load factor matrices written by save()"""
+        with np.load(path) as data:
+            return cls(
+                data['user_ids'].tolist(),
+                data['item_ids'].tolist(),
+                data['user_factors'],
+                data['item_factors']
+            )
+
+    def item_scores(self, customer_id: str) -> Optional[np.ndarray]:
+        """Predicted preference of a customer for every item, or None for unknown customers"""
+        row = self.user_index.get(str(customer_id))
+        if row is None:
+            return None
+        return self.item_factors @ self.user_factors[row]
+
+    def product_scores(self, customer_id: str, engine: ScoringEngine) -> Optional[np.ndarray]:
+        """Predicted preference for every catalog row from its category and subcategory factors"""
+        scores = self.item_scores(customer_id)
+        if scores is None:
+            return None
+
+        m = engine.matrix
+        # Trailing zero slot absorbs unknown (-1) codes
+        by_category = np.zeros(len(m.category) + 1, dtype=np.float32)
+        for value, code in m.category.index.items():
+            if value in self.item_index:
+                by_category[code] = scores[self.item_index[value]]
+        by_subcategory = np.zeros(len(m.subcategory) + 1, dtype=np.float32)
+        for value, code in m.subcategory.index.items():
+            if value in self.item_index:
+                by_subcategory[code] = scores[self.item_index[value]]
+
+        # Popularity breaks ties between products of the same subcategory
+        return by_category[m.category.codes] + by_subcategory[m.subcategory.codes] + 1e-3 * m.popularity
+
+class CollaborativeFilteringService:
+    """Holds the trained model for request-time top-N queries"""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.path.join(settings.RECOMMENDER_ARTIFACT_DIR, "cf_model.npz")
+        self.model: Optional[CollaborativeFilteringModel] = None
+
+    def load(self) -> bool:
+        """Load the model from disk if it has been trained"""
+        if not os.path.exists(self.path):
+            logger.warning(f"No collaborative filtering model at {self.path}; run `python -m src.cli train-cf`")
+            return False
+        self.model = CollaborativeFilteringModel.load(self.path)
+        logger.info(f"Loaded collaborative filtering model from {self.path}")
+        return True
+
+    def recommend(self, customer_id: str, engine: ScoringEngine, n: int) -> List[Tuple[int, float]]:
+        """
+        Top-N catalog rows for a customer.
+
+        Returns:
+            List of (catalog row, score), empty for unknown customers or when no model is loaded
+        """
+        if self.model is None or n <= 0:
+            return []
+        scores = self.model.product_scores(customer_id, engine)
+        if scores is None or scores.size == 0:
+            return []
+        scores = np.where(engine.matrix.in_stock, scores, -np.inf)
+        n = min(n, scores.size)
+        best = np.argpartition(-scores, n - 1)[:n]
+        best = best[np.argsort(-scores[best])]
+        return [(int(row), float(scores[row])) for row in best if np.isfinite(scores[row])]
+
+# Create a singleton instance
+cf_service = CollaborativeFilteringService()
@@ -0,0 +1,145 @@
+"""
+Tracks which customers need their materialized recommendations recomputed.
+"""
+from datetime import datetime
+from typing import Any, Dict, Optional, Set
+from sqlalchemy import func, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session, aliased
+from ..models import Customer, Product, Recommendation, RecommendationDirty
+from ..utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+CUSTOMER = "customer"
+PRODUCT = "product"
+
+# Product reason whose recompute reaches beyond the product's current holders
+CREATED = "created"
+
+# Model and public code column, for callers that only know "C…"/"P…" ids
+PUBLIC_IDS = {CUSTOMER: (Customer, "customer_id"), PRODUCT: (Product, "product_id")}
+
+class DirtyTracker:
+    """
+    Dirty sets of customers and products, persisted so the batch job (a
+    separate process) can drain them. Marking an entity twice keeps one row.
+    """
+
+    def __init__(self):
+        self.marked: Dict[str, int] = {CUSTOMER: 0, PRODUCT: 0}
+
+    def resolve_id(self, db: Session, entity: str, entity_id: Any) -> Optional[int]:
+        """Database id of a customer or product given its database id or public code"""
+        try:
+            return int(entity_id)
+        except (TypeError, ValueError):
+            pass
+        model, column = PUBLIC_IDS[entity]
+        try:
+            row = db.query(model.id).filter(getattr(model, column) == entity_id).first()
+        except SQLAlchemyError as e:
+            db.rollback()
+            logger.warning(f"Could not resolve {entity} {entity_id!r}: {e}")
+            return None
+        return row[0] if row else None
+
+    def _mark(self, db: Session, entity: str, entity_id: Any, reason: str):
+        public_id, entity_id = entity_id, self.resolve_id(db, entity, entity_id)
+        if entity_id is None:
+            logger.warning(f"Cannot track unknown {entity} {public_id!r}")
+            return
+        try:
+            marked = db.get(RecommendationDirty, (entity, entity_id))
+            if marked is not None and marked.reason == CREATED:
+                # Edits before the next run must not narrow a new product's recompute
+                reason = CREATED
+            db.merge(RecommendationDirty(
+                entity=entity,
+                entity_id=entity_id,
+                reason=reason,
+                marked_at=datetime.utcnow()
+            ))
+            db.commit()
+            self.marked[entity] += 1
+        except SQLAlchemyError as e:
+            db.rollback()
+            logger.warning(f"Could not mark {entity} {entity_id} dirty: {e}")
+
+    def mark_customer(self, db: Session, customer_id: Any, reason: str):
+        """Record that a customer's inputs (behavior, mood, cart, orders) changed; accepts public ids"""
+        self._mark(db, CUSTOMER, customer_id, reason)
+
+    def mark_product(self, db: Session, product_id: Any, reason: str):
+        """
+        Record that a product changed in a way that can move it in or out of rankings.
+
+        Created products are held by nobody yet, so they mark every customer
+        holding a product of the same category (see affected_customers).
+        """
+        self._mark(db, PRODUCT, product_id, reason)
+
+    def pending(self, db: Session, before: datetime, entity: str, reason: Optional[str] = None) -> Set[int]:
+        """Ids of one entity type (optionally marked for one reason) marked before a cutoff"""
+        query = db.query(RecommendationDirty.entity_id)\
+            .filter(RecommendationDirty.entity == entity, RecommendationDirty.marked_at <= before)
+        if reason is not None:
+            query = query.filter(RecommendationDirty.reason == reason)
+        return {entity_id for (entity_id,) in query.all()}
+
+    def affected_customers(self, db: Session, before: datetime, published: Optional[int]) -> Set[int]:
+        """
+        Customers to recompute: the dirty ones, everyone whose current top-N
+        contains a dirty product, and for created products everyone whose
+        top-N contains a product of the same category.
+
+        Args:
+            db: SQLAlchemy session
+            before: Only consider marks made before this time
+            published: Latest published generation; rows above it are unpublished
+
+        Returns:
+            Customer database ids
+        """
+        customers = self.pending(db, before, CUSTOMER)
+        products = self.pending(db, before, PRODUCT)
+        if products and published is not None:
+            # Reverse index: (product_id, generation) -> customers holding the product
+            holders = db.query(Recommendation.customer_id)\
+                .filter(Recommendation.product_id.in_(products), Recommendation.generation <= published)\
+                .distinct()\
+                .all()
+            customers.update(customer_id for (customer_id,) in holders)
+
+            created = self.pending(db, before, PRODUCT, CREATED)
+            if created:
+                new = aliased(Product)
+                categories = select(new.category).where(new.id.in_(created))
+                rivals = db.query(Recommendation.customer_id)\
+                    .join(Product, Product.id == Recommendation.product_id)\
+                    .filter(Product.category.in_(categories), Recommendation.generation <= published)\
+                    .distinct()\
+                    .all()
+                customers.update(customer_id for (customer_id,) in rivals)
+        return customers
+
+    def clear(self, db: Session, before: datetime):
+        """Forget marks made before a cutoff; marks made during a batch run stay for the next one"""
+        db.query(RecommendationDirty)\
+            .filter(RecommendationDirty.marked_at <= before)\
+            .delete(synchronize_session=False)
+        db.commit()
+
+    def stats(self, db: Optional[Session] = None) -> Dict[str, Any]:
+        stats: Dict[str, Any] = {"marked": dict(self.marked)}
+        if db is not None:
+            try:
+                stats["pending"] = dict(
+                    db.query(RecommendationDirty.entity, func.count()).group_by(RecommendationDirty.entity).all()
+                )
+            except SQLAlchemyError:
+                db.rollback()
+        return stats
+
+# Create a singleton instance
+dirty_tracker = DirtyTracker()
@@ -0,0 +1,272 @@
+"""
+Recommendation explanations rendered from the scoring features.
+
+The features that contributed most to a product's score are turned into
+short localized clauses, so an explanation costs a few array operations
+instead of an LLM call. LLM enrichment is opt-in and runs in the
+background; the richer text replaces the template once it is ready.
+"""
+import asyncio
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from ..config import settings
+from ..utils.logger import setup_logger
+from .llm_gateway import llm_gateway
+from .mood_affinity import MOOD_AFFINITY, mood_affinity, parse_mood
+from .scoring_engine import FEATURES, ScoringEngine
+
+logger = setup_logger(__name__)
+
+# Sentence frame, clause joiner, fallback and one clause per reason for every locale
+TEMPLATES: Dict[str, Dict[str, str]] = {
+    "en": {
+        "sentence": "Recommended because {reasons}.",
+        "joiner": " and ",
+        "fallback": "A popular pick with shoppers like you.",
+        "category_match": "it fits your interest in {category}",
+        "season_match": "it's a great pick for {season}",
+        "holiday_match": "it suits the holiday season",
+        "location_match": "it's popular in {location}",
+        "rating": "it's rated {rating:.1f}/5",
+        "sentiment": "reviewers love it",
+        "popularity": "it's a customer favourite",
+        "price_fit": "it's close to your usual budget",
+        "mood": "its {tag} feel matches your {mood} mood",
+    },
+    "de": {
+        "sentence": "Empfohlen, weil {reasons}.",
+        "joiner": " und ",
+        "fallback": "Ein beliebter Tipp bei Kunden wie Ihnen.",
+        "category_match": "es zu Ihrem Interesse an {category} passt",
+        "season_match": "es ideal für den {season} ist",
+        "holiday_match": "es zur Feiertagszeit passt",
+        "location_match": "es in {location} beliebt ist",
+        "rating": "es mit {rating:.1f}/5 bewertet ist",
+        "sentiment": "die Bewertungen begeistert sind",
+        "popularity": "es ein Kundenliebling ist",
+        "price_fit": "es zu Ihrem üblichen Budget passt",
+        "mood": "sein {tag} Charakter zu Ihrer Stimmung ({mood}) passt",
+    },
+    "es": {
+        "sentence": "Recomendado porque {reasons}.",
+        "joiner": " y ",
+        "fallback": "Una elección popular entre clientes como tú.",
+        "category_match": "encaja con tu interés en {category}",
+        "season_match": "es ideal para {season}",
+        "holiday_match": "es perfecto para las fiestas",
+        "location_match": "es popular en {location}",
+        "rating": "tiene una valoración de {rating:.1f}/5",
+        "sentiment": "las reseñas son excelentes",
+        "popularity": "es uno de los favoritos de los clientes",
+        "price_fit": "se ajusta a tu presupuesto habitual",
+        "mood": "su estilo {tag} va con tu estado de ánimo ({mood})",
+    },
+    "fr": {
+        "sentence": "Recommandé car {reasons}.",
+        "joiner": " et ",
+        "fallback": "Un choix apprécié par les clients comme vous.",
+        "category_match": "il correspond à votre intérêt pour {category}",
+        "season_match": "c'est un excellent choix pour {season}",
+        "holiday_match": "il est idéal pour les fêtes",
+        "location_match": "il est populaire en {location}",
+        "rating": "il est noté {rating:.1f}/5",
+        "sentiment": "les avis sont excellents",
+        "popularity": "c'est un favori des clients",
+        "price_fit": "il correspond à votre budget habituel",
+        "mood": "son côté {tag} s'accorde avec votre humeur ({mood})",
+    },
+}
+
+# Contributions below this share of the score are not worth mentioning
+MIN_CONTRIBUTION = 0.02
+
+class ExplanationEngine:
+    """Renders explanations from per-feature score contributions"""
+
+    def __init__(self, templates: Optional[Dict[str, Dict[str, str]]] = None, max_reasons: int = 2):
+        self.templates = templates or TEMPLATES
+        self.max_reasons = max_reasons
+
+    def _templates(self, locale: Optional[str]) -> Dict[str, str]:
+        language = (locale or settings.EXPLANATION_LOCALE).split("-")[0].split("_")[0].lower()
+        return self.templates.get(language) or self.templates["en"]
+
+    def contributions(
+        self,
+        engine: ScoringEngine,
+        profile: Dict[str, Any],
+        rows: np.ndarray,
+        weights: Optional[np.ndarray] = None
+    ) -> Tuple[List[str], np.ndarray]:
+        """
+        Share of each reason in the score of every row.
+
+        Returns:
+            (reason names, rows x reasons contribution matrix)
+        """
+        weights = engine.weights if weights is None else weights
+        total = weights.sum() or 1.0
+        contributions = engine.feature_matrix(profile, rows) * weights / total
+        reasons = list(FEATURES)
+
+        mood = parse_mood(profile.get("mood"))
+        if mood is not None:
+            boost = mood_affinity.boost(engine, mood)[rows] * settings.MOOD_BOOST_WEIGHT
+            contributions = np.column_stack([contributions, boost])
+            reasons.append("mood")
+        return reasons, contributions
+
+    def _mood_tag(self, engine: ScoringEngine, row: int, mood: Optional[str]) -> Optional[str]:
+        """The product's mood tag that the mood affinity table weighs highest"""
+        wanted = MOOD_AFFINITY.get(mood, {}).get("mood_tags", {})
+        tags = engine.matrix.mood_tags
+        tag_names = list(engine.matrix.mood_tag_index)
+        matching = [tag_names[c] for c in tags.indices[tags.indptr[row]:tags.indptr[row + 1]] if tag_names[c] in wanted]
+        return max(matching, key=wanted.get) if matching else None
+
+    def explain(
+        self,
+        engine: ScoringEngine,
+        profile: Dict[str, Any],
+        rows: Sequence[int],
+        locale: Optional[str] = None,
+        weights: Optional[np.ndarray] = None
+    ) -> List[str]:
+        """
+        Explain a ranked list in one vectorized pass.
+
+        Args:
+            engine: Scoring engine the rows were ranked with
+            profile: Customer profile the rows were scored for
+            rows: Catalog rows of the recommended products
+            locale: Language of the explanation, e.g. "en" or "de-DE"
+            weights: Feature weights the rows were ranked with (engine defaults if omitted)
+
+        Returns:
+            One explanation per row
+        """
+        templates = self._templates(locale)
+        rows = np.asarray(rows, dtype=np.int64)
+        if rows.size == 0:
+            return []
+        reasons, contributions = self.contributions(engine, profile, rows, weights)
+        order = np.argsort(-contributions, axis=1, kind="stable")[:, :self.max_reasons]
+        mood = parse_mood(profile.get("mood"))
+        categories = list(engine.matrix.category.index)
+
+        explanations = []
+        for i, row in enumerate(rows):
+            clauses = []
+            for column in order[i]:
+                reason = reasons[column]
+                if contributions[i, column] < MIN_CONTRIBUTION:
+                    break
+                tag = self._mood_tag(engine, row, mood) if reason == "mood" else None
+                if reason == "mood" and tag is None:
+                    continue
+                code = engine.matrix.category.codes[row]
+                clauses.append(templates[reason].format(
+                    category=categories[code] if code >= 0 else "",
+                    season=profile.get("season"),
+                    location=profile.get("location"),
+                    rating=float(engine.matrix.rating[row]) * 5,
+                    mood=(mood or "").lower(),
+                    tag=tag
+                ))
+            explanations.append(
+                templates["sentence"].format(reasons=templates["joiner"].join(clauses))
+                if clauses else templates["fallback"]
+            )
+        return explanations
+
+class ExplanationEnricher:
+    """
+    Background LLM rewrites of template explanations.
+
+    Results are kept in a bounded LRU keyed by (customer, product) so clients
+    can fetch them later; an optional callback pushes each result once ready.
+    """
+
+    def __init__(self, max_entries: Optional[int] = None):
+        self.max_entries = max_entries or settings.EXPLANATION_ENRICHMENT_MAX_ENTRIES
+        self.results: "OrderedDict[Tuple[str, str], str]" = OrderedDict()
+        self.pending: Dict[Tuple[str, str], asyncio.Task] = {}
+        self.completed = 0
+        self.failed = 0
+
+    def get(self, customer_id: Any, product_id: Any) -> Optional[str]:
+        """Enriched explanation, or None while it is pending or was never requested"""
+        key = (str(customer_id), str(product_id))
+        text = self.results.get(key)
+        if text is not None:
+            self.results.move_to_end(key)
+        return text
+
+    def is_pending(self, customer_id: Any, product_id: Any) -> bool:
+        return (str(customer_id), str(product_id)) in self.pending
+
+    def schedule(
+        self,
+        model: Any,
+        customer_id: Any,
+        product_id: Any,
+        prompt: str,
+        on_ready: Optional[Callable[[str], None]] = None
+    ) -> bool:
+        """
+        Start an enrichment unless one is already done or running.
+
+        Returns:
+            True when a new background call was started
+        """
+        key = (str(customer_id), str(product_id))
+        if model is None or key in self.results or key in self.pending:
+            return False
+        self.track(customer_id, product_id, llm_gateway.generate(model, prompt), on_ready)
+        return True
+
+    def track(
+        self,
+        customer_id: Any,
+        product_id: Any,
+        call: Awaitable[str],
+        on_ready: Optional[Callable[[str], None]] = None
+    ) -> asyncio.Future:
+        """Let an in-flight LLM explanation finish in the background and keep its result"""
+        key = (str(customer_id), str(product_id))
+        task = asyncio.ensure_future(self._run(key, call, on_ready))
+        self.pending[key] = task
+        return task
+
+    async def _run(self, key: Tuple[str, str], call: Awaitable[str], on_ready: Optional[Callable[[str], None]]):
+        try:
+            text = (await call).strip()
+            self.set(key[0], key[1], text)
+            self.completed += 1
+            if on_ready is not None:
+                on_ready(text)
+        except Exception as e:
+            self.failed += 1
+            logger.warning(f"Explanation enrichment for {key} failed: {e}")
+        finally:
+            self.pending.pop(key, None)
+
+    def set(self, customer_id: Any, product_id: Any, text: str):
+        key = (str(customer_id), str(product_id))
+        self.results[key] = text
+        self.results.move_to_end(key)
+        while len(self.results) > self.max_entries:
+            self.results.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self.results),
+            "pending": len(self.pending),
+            "completed": self.completed,
+            "failed": self.failed
+        }
+
+# Create singleton instances
+explanation_engine = ExplanationEngine()
+explanation_enricher = ExplanationEnricher()
@@ -1,23 +1,26 @@
 """
 Service for interacting with Google's Gemini API.
 """
-import os
 from typing import Dict, Any, List
-import google.generativeai as genai
 from dotenv import load_dotenv
+from .llm_cache import llm_cache
+from .llm_gateway import llm_gateway
+from .model_registry import model_registry
 
 # Load environment variables
 load_dotenv()
 
+# Prompt template versions, included in LLM cache keys
+EXPLANATION_PROMPT_VERSION = "1"
+PRODUCT_STORY_PROMPT_VERSION = "1"
+
 class GeminiService:
     def __init__(self):
-        """Initialize the Gemini service with API key from environment variables."""
-        api_key = os.getenv("GEMINI_API_KEY")
-        if not api_key:
+        """Initialize the Gemini service with the shared model handle."""
+        self.model_name = 'gemini-pro'
+        self.model = model_registry.get(self.model_name)
+        if self.model is None:
             raise ValueError("GEMINI_API_KEY environment variable is not set")
-        
-        genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel('gemini-pro')
     
     async def generate_text(self, prompt: str) -> str:
         """
@@ -30,8 +33,7 @@ class GeminiService:
             Generated text response
         """
         try:
-            response = self.model.generate_content(prompt)
-            return response.text
+            return await llm_gateway.generate(self.model, prompt)
         except Exception as e:
             raise Exception(f"Error generating text with Gemini: {str(e)}")
     
@@ -88,7 +90,13 @@ class GeminiService:
         """
         
         try:
-            return await self.generate_text(prompt)
+            return await llm_cache.get_or_generate(
+                "explanation",
+                self.model_name,
+                EXPLANATION_PROMPT_VERSION,
+                data,
+                lambda: self.generate_text(prompt)
+            )
         except Exception as e:
             raise Exception(f"Error generating explanation: {str(e)}")
     
@@ -162,6 +170,12 @@ class GeminiService:
         """
         
         try:
-            return await self.generate_text(prompt)
+            return await llm_cache.get_or_generate(
+                "product_story",
+                self.model_name,
+                PRODUCT_STORY_PROMPT_VERSION,
+                product_data,
+                lambda: self.generate_text(prompt)
+            )
         except Exception as e:
             raise Exception(f"Error generating product story: {str(e)}") 
\ No newline at end of file
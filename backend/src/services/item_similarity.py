@@ -0,0 +1,215 @@
+"""
+Precomputed item-to-item similarity ("customers also liked") index.
+
+Similarity blends three signals:
+- attributes: shared subcategory, category, brand, season, location and price band
+- browsing: how often customers browse/buy the two products' categories together
+- baskets: how often the two products are ordered together
+"""
+import os
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from scipy import sparse
+from sqlalchemy.orm import Session
+from ..config import settings
+from ..utils.logger import setup_logger
+from .collaborative_filtering import Interaction
+from .scoring_engine import ProductMatrix, Vocabulary
+
+logger = setup_logger(__name__)
+
+SIGNAL_WEIGHTS = {"attributes": 0.5, "browsing": 0.3, "baskets": 0.2}
+
+ATTRIBUTE_WEIGHTS = {
+    "subcategory": 0.35,
+    "category": 0.2,
+    "brand": 0.15,
+    "season": 0.1,
+    "location": 0.05,
+    "price": 0.15,
+}
+
+def load_order_baskets(db: Session) -> List[List[Any]]:
+    """Product ids (primary keys) of every placed order"""
+    from ..models import OrderItem
+
+    baskets: Dict[Any, List[Any]] = {}
+    for order_id, product_id in db.query(OrderItem.order_id, OrderItem.product_id).all():
+        baskets.setdefault(order_id, []).append(product_id)
+    return list(baskets.values())
+
+def _cosine(matrix: sparse.csr_matrix) -> sparse.csr_matrix:
+    """Column-by-column cosine similarity of a sparse (observations x items) matrix"""
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=0))).ravel()
+    norms[norms == 0] = 1.0
+    scaled = matrix @ sparse.diags(1.0 / norms)
+    return (scaled.T @ scaled).tocsr()
+
+def taxonomy_similarity(interactions: Sequence[Interaction]) -> Tuple[Dict[str, int], np.ndarray]:
+    """
+    Cosine similarity between categories/subcategories from customer histories.
+
+    Returns:
+        (item index, dense similarity matrix with a trailing zero row/column for unknown items)
+    """
+    customers: Dict[str, int] = {}
+    items: Dict[str, int] = {}
+    rows, cols, values = [], [], []
+    for customer_id, item, weight in interactions:
+        rows.append(customers.setdefault(customer_id, len(customers)))
+        cols.append(items.setdefault(item, len(items)))
+        values.append(weight)
+
+    padded = np.zeros((len(items) + 1, len(items) + 1), dtype=np.float32)
+    if items:
+        matrix = sparse.csr_matrix((values, (rows, cols)), shape=(len(customers), len(items)))
+        padded[:-1, :-1] = _cosine(matrix).toarray()
+    return items, padded
+
+def _codes_in(vocabulary: Vocabulary, index: Dict[str, int]) -> np.ndarray:
+    """Translate a catalog vocabulary's codes to positions in another item index (-1 if absent)"""
+    lookup = np.full(len(vocabulary) + 1, -1, dtype=np.int64)
+    for value, code in vocabulary.index.items():
+        lookup[code] = index.get(value, -1)
+    return lookup[vocabulary.codes]
+
+def _same(codes: np.ndarray, rows: np.ndarray) -> np.ndarray:
+    """(rows x catalog) mask of equal, known codes"""
+    return (codes[rows, None] == codes[None, :]) & (codes[None, :] >= 0)
+
+class ItemSimilarityIndex:
+    """Top-K neighbours per product stored as CSR arrays"""
+
+    def __init__(self, ids: np.ndarray, indptr: np.ndarray, indices: np.ndarray, scores: np.ndarray):
+        self.ids = ids
+        self.indptr = indptr
+        self.indices = indices
+        self.scores = scores
+        self.id_list = ids.tolist()
+        self.row_by_id = {product_id: row for row, product_id in enumerate(self.id_list)}
+
+    @classmethod
+    def build(
+        cls,
+        matrix: ProductMatrix,
+        interactions: Sequence[Interaction] = (),
+        baskets: Sequence[Sequence[Any]] = (),
+        k: int = 20,
+        block_size: int = 512
+    ) -> "ItemSimilarityIndex":
+        """
+        Compute the top-k most similar products for every catalog row.
+
+        Args:
+            matrix: Catalog columns
+            interactions: (customer, category/subcategory, weight) history triples
+            baskets: Product ids ordered together
+            k: Neighbours kept per product
+            block_size: Rows scored at a time, bounding memory to block_size x catalog
+
+        Returns:
+            Similarity index
+        """
+        n = matrix.size
+        k = max(0, min(k, n - 1))
+
+        items, taxonomy = taxonomy_similarity(interactions)
+        category_items = _codes_in(matrix.category, items)
+        subcategory_items = _codes_in(matrix.subcategory, items)
+
+        basket_rows, basket_cols = [], []
+        for basket_number, basket in enumerate(baskets):
+            for row in matrix.rows_for(set(basket)):
+                basket_rows.append(basket_number)
+                basket_cols.append(row)
+        co_ordered = _cosine(sparse.csr_matrix(
+            (np.ones(len(basket_rows)), (basket_rows, basket_cols)), shape=(len(baskets), n)
+        ))
+
+        price = np.maximum(matrix.price, 1e-6)
+        indptr = np.zeros(n + 1, dtype=np.int64)
+        indices = np.zeros(n * k, dtype=np.int32)
+        scores = np.zeros(n * k, dtype=np.float32)
+
+        for start in range(0, n, block_size):
+            rows = np.arange(start, min(start + block_size, n))
+
+            attributes = (
+                ATTRIBUTE_WEIGHTS["subcategory"] * _same(matrix.subcategory.codes, rows)
+                + ATTRIBUTE_WEIGHTS["category"] * _same(matrix.category.codes, rows)
+                + ATTRIBUTE_WEIGHTS["brand"] * _same(matrix.brand.codes, rows)
+                + ATTRIBUTE_WEIGHTS["season"] * _same(matrix.season.codes, rows)
+                + ATTRIBUTE_WEIGHTS["location"] * _same(matrix.location.codes, rows)
+                + ATTRIBUTE_WEIGHTS["price"] * (
+                    np.minimum(price[rows, None], price[None, :]) / np.maximum(price[rows, None], price[None, :])
+                )
+            )
+            browsing = 0.5 * (
+                taxonomy[subcategory_items[rows, None], subcategory_items[None, :]]
+                + taxonomy[category_items[rows, None], category_items[None, :]]
+            )
+            similarity = (
+                SIGNAL_WEIGHTS["attributes"] * attributes
+                + SIGNAL_WEIGHTS["browsing"] * browsing
+                + SIGNAL_WEIGHTS["baskets"] * co_ordered[rows].toarray()
+            )
+            similarity[np.arange(rows.size), rows] = -np.inf
+
+            if k:
+                best = np.argpartition(-similarity, k - 1, axis=1)[:, :k]
+                best_scores = np.take_along_axis(similarity, best, axis=1)
+                order = np.argsort(-best_scores, axis=1)
+                block = slice(start * k, (rows[-1] + 1) * k)
+                indices[block] = np.take_along_axis(best, order, axis=1).ravel()
+                scores[block] = np.take_along_axis(best_scores, order, axis=1).ravel()
+            indptr[rows + 1] = (rows + 1) * k
+
+        logger.info(f"Built item similarity index: {n} products, {k} neighbours each")
+        return cls(matrix.ids, indptr, indices, scores)
+
+    def similar(self, product_id: Any, limit: int = 10) -> List[Tuple[Any, float]]:
+        """Most similar products as (product id, score), empty for unknown products"""
+        row = self.row_by_id.get(product_id)
+        if row is None:
+            return []
+        start = self.indptr[row]
+        end = min(self.indptr[row + 1], start + max(limit, 0))
+        return [
+            (self.id_list[neighbour], float(score))
+            for neighbour, score in zip(self.indices[start:end], self.scores[start:end])
+        ]
+
+    def save(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        np.savez(path, ids=np.asarray(self.ids.tolist()), indptr=self.indptr, indices=self.indices, scores=self.scores)
+
+    @classmethod
+    def load(cls, path: str) -> "ItemSimilarityIndex":
+        with np.load(path) as data:
+            return cls(data["ids"], data["indptr"], data["indices"], data["scores"])
+
+class ItemSimilarityService:
+    """Holds the precomputed similarity index for request-time lookups"""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.path.join(settings.RECOMMENDER_ARTIFACT_DIR, "item_similarity.npz")
+        self.index: Optional[ItemSimilarityIndex] = None
+
+    def load(self) -> bool:
+        """Load the index from disk if it has been built"""
+        if not os.path.exists(self.path):
+            logger.warning(f"No item similarity index at {self.path}; run `python -m src.cli build-similarity`")
+            return False
+        self.index = ItemSimilarityIndex.load(self.path)
+        logger.info(f"Loaded item similarity index from {self.path}")
+        return True
+
+    def similar(self, product_id: Any, limit: int = 10) -> List[Tuple[Any, float]]:
+        if self.index is None:
+            return []
+        return self.index.similar(product_id, limit)
+
+# Create a singleton instance
+item_similarity_service = ItemSimilarityService()
@@ -0,0 +1,227 @@
+"""
+Content-addressed cache for LLM generations.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from ..config import settings
+from ..utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Time to live per call type in seconds, overridable through settings.LLM_CACHE_TTLS
+DEFAULT_TTLS = {
+    'product_story': 7 * 24 * 3600,
+    'product_profile': 7 * 24 * 3600,
+    'explanation': 24 * 3600,
+    'persona': 24 * 3600,
+}
+FALLBACK_TTL = 3600
+
+def _normalize(value: Any) -> Any:
+    """Normalize input so that cosmetic differences map to the same key"""
+    if isinstance(value, dict):
+        return {str(k): _normalize(v) for k, v in sorted(value.items(), key=lambda item: str(item[0]))}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    if isinstance(value, str):
+        return " ".join(value.split())
+    return value
+
+class LLMCache:
+    """
+    Two-tier cache for generated text.
+
+    Entries are keyed by a hash of (call type, model, prompt template version,
+    normalized input). Lookups hit an in-memory LRU first and fall back to a
+    SQLite table that survives restarts. The SQLite file is opened on first
+    use, and ``get_or_generate`` runs its reads and writes in the default
+    executor so they never block the event loop.
+    """
+
+    def __init__(self, db_path: Optional[str] = None, max_entries: int = None, ttls: Dict[str, int] = None):
+        self.max_entries = max_entries or settings.LLM_CACHE_MAX_ENTRIES
+        self.ttls = {**DEFAULT_TTLS, **settings.LLM_CACHE_TTLS, **(ttls or {})}
+        self._memory: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Guards the SQLite connection separately, so memory lookups never wait on disk I/O
+        self._disk_lock = threading.Lock()
+        self._counters: Dict[str, Dict[str, int]] = {}
+        self._conn = None
+
+        if db_path is None and settings.LLM_CACHE_PATH:
+            # Relative paths live next to the other recommender artifacts
+            db_path = os.path.join(settings.RECOMMENDER_ARTIFACT_DIR, settings.LLM_CACHE_PATH)
+        self.db_path = db_path or None
+
+    def _connection(self) -> Optional[sqlite3.Connection]:
+        """Open the persistent tier on first use; None when it is disabled"""
+        if self._conn is None and self.db_path:
+            with self._disk_lock:
+                if self._conn is None:
+                    directory = os.path.dirname(self.db_path)
+                    if directory:
+                        os.makedirs(directory, exist_ok=True)
+                    conn = sqlite3.connect(self.db_path, check_same_thread=False)
+                    conn.execute(
+                        "CREATE TABLE IF NOT EXISTS llm_cache ("
+                        "key TEXT PRIMARY KEY, call_type TEXT NOT NULL, "
+                        "value TEXT NOT NULL, expires_at REAL NOT NULL)"
+                    )
+                    conn.commit()
+                    self._conn = conn
+        return self._conn
+
+    @staticmethod
+    def make_key(call_type: str, model: str, template_version: str, payload: Any) -> str:
+        """Build the content address for a generation"""
+        material = json.dumps(
+            [call_type, model, template_version, _normalize(payload)],
+            sort_keys=True,
+            default=str,
+            separators=(",", ":")
+        )
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def _count(self, call_type: str, outcome: str):
+        counters = self._counters.setdefault(call_type, {"memory_hits": 0, "disk_hits": 0, "misses": 0})
+        counters[outcome] += 1
+
+    def _remember(self, key: str, value: str, expires_at: float):
+        self._memory[key] = (value, expires_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _get_memory(self, call_type: str, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if entry[1] > time.time():
+                    self._memory.move_to_end(key)
+                    self._count(call_type, "memory_hits")
+                    return entry[0]
+                del self._memory[key]
+        return None
+
+    def _get_disk(self, call_type: str, key: str) -> Optional[str]:
+        conn = self._connection()
+        if conn is not None:
+            with self._disk_lock:
+                row = conn.execute("SELECT value, expires_at FROM llm_cache WHERE key = ?", (key,)).fetchone()
+            if row is not None and row[1] > time.time():
+                with self._lock:
+                    self._remember(key, row[0], row[1])
+                    self._count(call_type, "disk_hits")
+                return row[0]
+
+        with self._lock:
+            self._count(call_type, "misses")
+        return None
+
+    def get(self, call_type: str, key: str) -> Optional[str]:
+        """Get a cached generation if present and not expired"""
+        cached = self._get_memory(call_type, key)
+        if cached is not None:
+            return cached
+        return self._get_disk(call_type, key)
+
+    def set(self, call_type: str, key: str, value: str):
+        """Store a generation in both tiers"""
+        expires_at = time.time() + self.ttls.get(call_type, FALLBACK_TTL)
+        with self._lock:
+            self._remember(key, value, expires_at)
+        conn = self._connection()
+        if conn is not None:
+            with self._disk_lock:
+                conn.execute(
+                    "INSERT OR REPLACE INTO llm_cache (key, call_type, value, expires_at) VALUES (?, ?, ?, ?)",
+                    (key, call_type, value, expires_at)
+                )
+                conn.commit()
+
+    async def get_or_generate(
+        self,
+        call_type: str,
+        model: str,
+        template_version: str,
+        payload: Any,
+        generate: Callable[[], Awaitable[str]],
+        validate: Optional[Callable[[str], bool]] = None
+    ) -> str:
+        """
+        Return a cached generation or produce and store a new one.
+
+        Args:
+            call_type: Kind of generation, selects the TTL
+            model: Model name used for the generation
+            template_version: Version of the prompt template
+            payload: Input the prompt is built from
+            generate: Coroutine factory producing the text on a miss
+            validate: Optional check; output failing it is returned but not cached
+
+        Returns:
+            Generated text
+        """
+        key = self.make_key(call_type, model, template_version, payload)
+        cached = self._get_memory(call_type, key)
+        if cached is not None:
+            return cached
+
+        # SQLite calls block, so keep them off the event loop
+        loop = asyncio.get_running_loop()
+        cached = await loop.run_in_executor(None, self._get_disk, call_type, key)
+        if cached is not None:
+            return cached
+
+        value = await generate()
+        if validate is None or validate(value):
+            await loop.run_in_executor(None, self.set, call_type, key, value)
+        return value
+
+    def purge_expired(self) -> int:
+        """Remove expired entries from the persistent tier"""
+        conn = self._connection()
+        if conn is None:
+            return 0
+        with self._disk_lock:
+            cursor = conn.execute("DELETE FROM llm_cache WHERE expires_at <= ?", (time.time(),))
+            conn.commit()
+            return cursor.rowcount
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters overall and per call type"""
+        with self._lock:
+            by_call_type = {call_type: dict(counters) for call_type, counters in self._counters.items()}
+        totals = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+        for counters in by_call_type.values():
+            for name, count in counters.items():
+                totals[name] += count
+        lookups = sum(totals.values())
+        hits = totals["memory_hits"] + totals["disk_hits"]
+        return {
+            **totals,
+            "hit_ratio": hits / lookups if lookups else 0.0,
+            "memory_entries": len(self._memory),
+            "by_call_type": by_call_type
+        }
+
+    def clear(self):
+        """Clear both tiers and reset counters"""
+        with self._lock:
+            self._memory.clear()
+            self._counters.clear()
+        conn = self._connection()
+        if conn is not None:
+            with self._disk_lock:
+                conn.execute("DELETE FROM llm_cache")
+                conn.commit()
+
+# Create a singleton instance
+llm_cache = LLMCache()
@@ -0,0 +1,102 @@
+"""
+Shared asynchronous gateway for all Gemini calls.
+"""
+import asyncio
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional
+from ..config import settings
+from .single_flight import SingleFlight
+from ..utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+class LLMGateway:
+    """
+    Runs LLM calls without blocking the event loop.
+
+    Models exposing ``generate_content_async`` are awaited natively; anything
+    else is pushed onto a bounded thread pool. A semaphore caps the number of
+    in-flight upstream calls so one slow model cannot starve the process, and
+    identical concurrent prompts are coalesced into a single upstream call.
+    """
+
+    def __init__(self, max_concurrency: int = None, timeout: float = None):
+        self.max_concurrency = max_concurrency or settings.LLM_MAX_CONCURRENCY
+        self.timeout = timeout or settings.LLM_TIMEOUT_SECONDS
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_concurrency,
+            thread_name_prefix="llm-gateway"
+        )
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._single_flight = SingleFlight()
+        self.calls = 0
+        self.errors = 0
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        # Created lazily so the semaphore binds to the running event loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    async def _call(self, model: Any, prompt: str) -> Any:
+        if hasattr(model, "generate_content_async"):
+            return await model.generate_content_async(prompt)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, model.generate_content, prompt)
+
+    @staticmethod
+    def prompt_key(model: Any, prompt: str) -> str:
+        """Identity of an upstream call used for coalescing"""
+        model_name = getattr(model, "model_name", None) or str(id(model))
+        return hashlib.sha256(f"{model_name}\0{prompt}".encode("utf-8")).hexdigest()
+
+    async def generate(self, model: Any, prompt: str) -> str:
+        """
+        Generate text for a prompt.
+
+        Concurrent calls with the same model and prompt share one upstream call.
+
+        Args:
+            model: Configured Gemini model handle
+            prompt: The prompt to send to the model
+
+        Returns:
+            Generated text response
+        """
+        if model is None:
+            raise ValueError("No LLM model configured")
+
+        return await self._single_flight.do(
+            self.prompt_key(model, prompt),
+            lambda: self._generate(model, prompt)
+        )
+
+    async def _generate(self, model: Any, prompt: str) -> str:
+        async with self._get_semaphore():
+            self.calls += 1
+            try:
+                response = await asyncio.wait_for(self._call(model, prompt), timeout=self.timeout)
+                return response.text
+            except Exception as e:
+                self.errors += 1
+                logger.error(f"LLM call failed: {str(e)}")
+                raise
+
+    def stats(self) -> Dict[str, Any]:
+        """Return gateway counters"""
+        flight = self._single_flight.stats()
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "coalesced": flight["coalesced"],
+            "inflight": flight["inflight"],
+            "max_concurrency": self.max_concurrency
+        }
+
+    def shutdown(self):
+        """Release the worker threads"""
+        self._executor.shutdown(wait=False)
+
+# Create a singleton instance
+llm_gateway = LLMGateway()
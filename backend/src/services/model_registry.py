@@ -0,0 +1,92 @@
+"""
+Process-wide registry of configured Gemini model handles.
+"""
+import os
+import threading
+from typing import Any, Dict, Iterable, List, Optional
+import google.generativeai as genai
+from ..config import settings
+from ..utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Models warmed up at application startup
+DEFAULT_MODELS = ('gemini-2.0-flash-001', 'gemini-pro')
+
+class ModelRegistry:
+    """
+    Configures the Gemini client once and hands out shared model handles.
+
+    Agents and services look up their model by name instead of calling
+    ``genai.configure`` and building ``GenerativeModel`` objects themselves,
+    which keeps them cheap to construct per request.
+    """
+
+    def __init__(self):
+        self._models: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+        self._api_key: Optional[str] = None
+        self.started = False
+
+    def start(self, api_key: Optional[str] = None, model_names: Iterable[str] = DEFAULT_MODELS):
+        """
+        Configure the client and create handles for the given models.
+
+        Calling this again is a no-op; the first API key wins, and a later
+        call with a different key logs a warning.
+
+        Args:
+            api_key: Gemini API key, defaults to settings/environment
+            model_names: Models to create eagerly
+        """
+        with self._lock:
+            if self.started:
+                if api_key and api_key != self._api_key:
+                    logger.warning("Gemini client is already configured with another API key; ignoring the new key")
+                return
+            self._api_key = api_key or settings.GEMINI_API_KEY or os.getenv("GEMINI_API_KEY")
+            if self._api_key:
+                genai.configure(api_key=self._api_key)
+            else:
+                logger.warning("GEMINI_API_KEY is not set; LLM features are disabled")
+            self.started = True
+
+        for model_name in model_names:
+            self.get(model_name)
+
+    @property
+    def configured(self) -> bool:
+        """Whether an API key is available"""
+        if not self.started:
+            self.start()
+        return self._api_key is not None
+
+    def get(self, model_name: str) -> Optional[Any]:
+        """
+        Get the shared handle for a model.
+
+        Args:
+            model_name: Gemini model name
+
+        Returns:
+            Model handle, or None if no API key is configured
+        """
+        if not self.configured:
+            return None
+
+        model = self._models.get(model_name)
+        if model is None:
+            with self._lock:
+                model = self._models.get(model_name)
+                if model is None:
+                    model = genai.GenerativeModel(model_name)
+                    self._models[model_name] = model
+                    logger.info(f"Registered model {model_name}")
+        return model
+
+    def model_names(self) -> List[str]:
+        """Return names of all registered models"""
+        return list(self._models)
+
+# Create a singleton instance
+model_registry = ModelRegistry()
@@ -0,0 +1,140 @@
+"""
+Mood-aware re-ranking without an LLM call.
+
+A static affinity table maps every customer mood to weighted product mood
+tags, categories and subcategories. For a catalog version the table is turned
+into one boost vector per mood, so re-ranking a candidate list for a mood (or
+switching moods) is a single gather and sort.
+"""
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from ..config import settings
+from ..utils.logger import setup_logger
+from .scoring_engine import ProductMatrix, ScoringEngine
+
+logger = setup_logger(__name__)
+
+# Keyed on the values of models.schemas.Mood; that module is shadowed by
+# models.py, so the values are mirrored here instead of imported
+MOOD_AFFINITY: Dict[str, Dict[str, Dict[str, float]]] = {
+    "Happy": {
+        "mood_tags": {"cheerful": 1.0, "joyful": 1.0, "fun": 0.8, "playful": 0.8, "vibrant": 0.7, "social": 0.6},
+        "category": {"Fashion": 0.5, "Beauty": 0.4},
+        "subcategory": {"T-shirt": 0.3, "Lipstick": 0.3, "Perfume": 0.3, "Comics": 0.3, "Headphones": 0.2},
+    },
+    "Excited": {
+        "mood_tags": {"energetic": 1.0, "adventurous": 1.0, "exciting": 0.9, "bold": 0.8, "innovative": 0.7, "trendy": 0.6},
+        "category": {"Electronics": 0.5, "Fitness": 0.5},
+        "subcategory": {"Smartwatch": 0.4, "Smartphone": 0.3, "Treadmill": 0.3, "Shoes": 0.3, "Headphones": 0.3},
+    },
+    "Relaxed": {
+        "mood_tags": {"relaxing": 1.0, "calm": 1.0, "calming": 1.0, "peaceful": 0.9, "cozy": 0.8, "soothing": 0.8},
+        "category": {"Home Decor": 0.5, "Books": 0.4},
+        "subcategory": {"Cushions": 0.4, "Yoga Mat": 0.4, "Lamp": 0.3, "Fiction": 0.3, "Curtains": 0.2},
+    },
+    "Sad": {
+        "mood_tags": {"comforting": 1.0, "uplifting": 1.0, "warm": 0.8, "cozy": 0.8, "soothing": 0.7, "nostalgic": 0.6},
+        "category": {"Books": 0.4, "Home Decor": 0.4, "Beauty": 0.2},
+        "subcategory": {"Cushions": 0.4, "Fiction": 0.4, "Comics": 0.3, "Moisturizer": 0.3, "Biography": 0.2},
+    },
+    "Frustrated": {
+        "mood_tags": {"stress-relief": 1.0, "calming": 0.8, "practical": 0.8, "reliable": 0.7, "simple": 0.6},
+        "category": {"Fitness": 0.5},
+        "subcategory": {"Dumbbells": 0.4, "Resistance Bands": 0.4, "Yoga Mat": 0.4, "Headphones": 0.3, "Non-fiction": 0.2},
+    },
+    "Neutral": {
+        "mood_tags": {"practical": 0.5, "versatile": 0.5, "classic": 0.5},
+        "category": {},
+        "subcategory": {},
+    },
+}
+
+def parse_mood(value: Any) -> Optional[str]:
+    """
+    Normalize a mood given as a Mood enum, CustomerMood row or string.
+
+    Returns:
+        The matching MOOD_AFFINITY key, or None for unknown moods
+    """
+    value = getattr(value, "mood", value)
+    value = getattr(value, "value", value)
+    if not isinstance(value, str):
+        return None
+    text = value.strip().lower()
+    for mood in MOOD_AFFINITY:
+        if mood.lower() == text:
+            return mood
+    return None
+
+class MoodAffinity:
+    """Precomputed per-mood boost vectors over the catalog"""
+
+    def __init__(self, table: Optional[Dict[str, Dict[str, Dict[str, float]]]] = None):
+        self.table = table or MOOD_AFFINITY
+        self._version: Optional[str] = None
+        self._boosts: Dict[str, np.ndarray] = {}
+        self._lock = threading.Lock()
+
+    def build_boost(self, matrix: ProductMatrix, mood: str) -> np.ndarray:
+        """Boost of every catalog row for one mood, scaled to [0, 1]"""
+        affinity = self.table.get(mood, {})
+        tag_weights = np.zeros(len(matrix.mood_tag_index), dtype=np.float32)
+        for tag, weight in affinity.get("mood_tags", {}).items():
+            column = matrix.mood_tag_index.get(tag)
+            if column is not None:
+                tag_weights[column] = weight
+
+        boost = np.asarray(matrix.mood_tags @ tag_weights, dtype=np.float32).reshape(matrix.size)
+        boost = boost + matrix.category.weights(affinity.get("category", {}))[matrix.category.codes]
+        boost = boost + matrix.subcategory.weights(affinity.get("subcategory", {}))[matrix.subcategory.codes]
+        peak = boost.max() if boost.size else 0
+        return boost / peak if peak > 0 else boost
+
+    def boost(self, engine: ScoringEngine, mood: str) -> np.ndarray:
+        """Cached boost vector for the engine's catalog version"""
+        with self._lock:
+            if self._version != engine.version:
+                self._version = engine.version
+                self._boosts = {}
+            boost = self._boosts.get(mood)
+            if boost is None:
+                boost = self._boosts[mood] = self.build_boost(engine.matrix, mood)
+        return boost
+
+    def rerank(
+        self,
+        engine: ScoringEngine,
+        base: List[Tuple[int, float]],
+        mood: Any,
+        k: int,
+        strength: Optional[float] = None
+    ) -> List[Tuple[int, float]]:
+        """
+        Re-rank a base candidate list for a mood.
+
+        Args:
+            engine: Scoring engine the base list was scored with
+            base: (catalog row, score) pairs
+            mood: Mood enum, CustomerMood row or mood string
+            k: Number of results
+            strength: Weight of the mood boost (defaults to MOOD_BOOST_WEIGHT)
+
+        Returns:
+            (catalog row, blended score) pairs sorted by descending score
+        """
+        mood = parse_mood(mood)
+        if not base or k <= 0:
+            return []
+        if mood is None:
+            return base[:k]
+
+        strength = settings.MOOD_BOOST_WEIGHT if strength is None else strength
+        rows = np.array([row for row, _ in base], dtype=np.int64)
+        scores = np.array([score for _, score in base], dtype=np.float32)
+        blended = (1 - strength) * scores + strength * self.boost(engine, mood)[rows]
+        best = np.argsort(-blended, kind="stable")[:k]
+        return [(int(rows[i]), float(blended[i])) for i in best]
+
+# Create a singleton instance
+mood_affinity = MoodAffinity()
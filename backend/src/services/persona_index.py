@@ -0,0 +1,203 @@
+"""
+Approximate nearest neighbour index for persona-to-product matching.
+
+Products and customer personas are embedded into the same space with hashed
+TF-IDF, and product vectors are bucketed with random-projection LSH. Arrays
+are persisted as .npy files and memory-mapped at load time.
+"""
+import math
+import os
+import re
+import zlib
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+import numpy as np
+from ..config import settings
+from ..utils.logger import setup_logger
+from .scoring_engine import product_mood_tags
+
+logger = setup_logger(__name__)
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset({"a", "an", "and", "the", "of", "for", "to", "in", "on", "with", "is", "are", "string"})
+
+def tokenize(text: str) -> List[str]:
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOPWORDS]
+
+def product_text(product: Any) -> str:
+    """Concatenate the descriptive fields of a product"""
+    get = product.get if isinstance(product, dict) else lambda name: getattr(product, name, None)
+    fields = [get("name"), get("category"), get("subcategory"), get("brand"), get("story")]
+    return " ".join([str(field) for field in fields if field] + product_mood_tags(product))
+
+def persona_text(persona: Any) -> str:
+    """Flatten every string value of a persona JSON document"""
+    if isinstance(persona, dict):
+        return " ".join(persona_text(value) for value in persona.values())
+    if isinstance(persona, (list, tuple)):
+        return " ".join(persona_text(value) for value in persona)
+    if isinstance(persona, str):
+        return persona
+    return ""
+
+class HashedTfidfEmbedder:
+    """Bag-of-words TF-IDF with the hashing trick, so no vocabulary has to be stored"""
+
+    def __init__(self, dim: int = 512, idf: Optional[np.ndarray] = None):
+        self.dim = dim
+        self.idf = idf if idf is not None else np.ones(dim, dtype=np.float32)
+
+    def _counts(self, text: str) -> Dict[int, int]:
+        counts: Dict[int, int] = {}
+        for token in tokenize(text):
+            bucket = zlib.crc32(token.encode()) % self.dim
+            counts[bucket] = counts.get(bucket, 0) + 1
+        return counts
+
+    def fit(self, texts: Sequence[str]) -> "HashedTfidfEmbedder":
+        """Learn bucket IDF weights from a corpus"""
+        document_frequency = np.zeros(self.dim, dtype=np.float64)
+        for text in texts:
+            for bucket in self._counts(text):
+                document_frequency[bucket] += 1
+        self.idf = (np.log((1 + len(texts)) / (1 + document_frequency)) + 1).astype(np.float32)
+        return self
+
+    def embed(self, text: str) -> np.ndarray:
+        """L2-normalized vector for one text"""
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for bucket, count in self._counts(text).items():
+            vector[bucket] = (1 + math.log(count)) * self.idf[bucket]
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    def embed_many(self, texts: Iterable[str]) -> np.ndarray:
+        vectors = [self.embed(text) for text in texts]
+        return np.vstack(vectors) if vectors else np.zeros((0, self.dim), dtype=np.float32)
+
+class PersonaProductIndex:
+    """Random-projection LSH over product vectors with exact cosine re-ranking"""
+
+    ARRAYS = ("ids", "vectors", "idf", "planes", "keys", "order")
+
+    def __init__(
+        self,
+        ids: np.ndarray,
+        vectors: np.ndarray,
+        idf: np.ndarray,
+        planes: np.ndarray,
+        keys: np.ndarray,
+        order: np.ndarray
+    ):
+        self.ids = ids
+        self.vectors = vectors
+        self.idf = idf
+        self.planes = planes
+        self.keys = keys
+        self.order = order
+        self.embedder = HashedTfidfEmbedder(vectors.shape[1], idf)
+        self.bit_values = 1 << np.arange(planes.shape[1], dtype=np.int64)
+
+    def _signatures(self, vectors: np.ndarray, table: int) -> np.ndarray:
+        return ((vectors @ self.planes[table].T) > 0).astype(np.int64) @ self.bit_values
+
+    @classmethod
+    def build(
+        cls,
+        products: Sequence[Any],
+        dim: int = 512,
+        tables: int = 8,
+        bits: int = 10,
+        seed: int = 42
+    ) -> "PersonaProductIndex":
+        """
+        Embed the catalog and bucket it into LSH tables.
+
+        Args:
+            products: Product ORM objects or dicts (id, name, category, ... mood_tags)
+            dim: Embedding dimensionality
+            tables: Number of independent hash tables
+            bits: Hyperplanes per table; more bits give smaller buckets
+
+        Returns:
+            Index ready to query or save
+        """
+        texts = [product_text(product) for product in products]
+        embedder = HashedTfidfEmbedder(dim).fit(texts)
+        vectors = embedder.embed_many(texts)
+        ids = np.asarray([product["id"] if isinstance(product, dict) else product.id for product in products])
+
+        rng = np.random.default_rng(seed)
+        planes = rng.standard_normal((tables, bits, dim)).astype(np.float32)
+        index = cls(ids, vectors, embedder.idf, planes, np.zeros((tables, len(texts)), dtype=np.int64),
+                    np.zeros((tables, len(texts)), dtype=np.int64))
+        for table in range(tables):
+            signatures = index._signatures(vectors, table)
+            index.order[table] = np.argsort(signatures, kind="stable")
+            index.keys[table] = signatures[index.order[table]]
+
+        logger.info(f"Built persona index: {len(texts)} products, {tables} tables x {bits} bits")
+        return index
+
+    def candidates(self, vector: np.ndarray) -> np.ndarray:
+        """Rows sharing an LSH bucket with the query in any table"""
+        found = []
+        for table in range(self.planes.shape[0]):
+            key = self._signatures(vector[None, :], table)[0]
+            start, end = np.searchsorted(self.keys[table], [key, key + 1])
+            found.append(self.order[table][start:end])
+        return np.unique(np.concatenate(found)) if found else np.zeros(0, dtype=np.int64)
+
+    def query_vector(self, vector: np.ndarray, k: int = 10) -> List[Tuple[Any, float]]:
+        """Nearest products to a query vector as (product id, cosine similarity)"""
+        if k <= 0 or not np.any(vector):
+            return []
+        rows = self.candidates(vector)
+        if rows.size < k:
+            # Sparse buckets: an exact scan over the memory-mapped vectors is still cheap
+            rows = np.arange(self.vectors.shape[0])
+        if rows.size == 0:
+            return []
+        similarity = np.asarray(self.vectors[rows] @ vector)
+        k = min(k, rows.size)
+        best = np.argpartition(-similarity, k - 1)[:k]
+        best = best[np.argsort(-similarity[best])]
+        return [(self.ids[rows[i]].item(), float(similarity[i])) for i in best]
+
+    def query_persona(self, persona: Any, k: int = 10) -> List[Tuple[Any, float]]:
+        """Nearest products to a customer persona"""
+        return self.query_vector(self.embedder.embed(persona_text(persona)), k)
+
+    def save(self, directory: str):
+        """Write one .npy file per array so each can be memory-mapped"""
+        os.makedirs(directory, exist_ok=True)
+        for name in self.ARRAYS:
+            np.save(os.path.join(directory, f"{name}.npy"), getattr(self, name))
+
+    @classmethod
+    def load(cls, directory: str) -> "PersonaProductIndex":
+        return cls(*(np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r") for name in cls.ARRAYS))
+
+class PersonaIndexService:
+    """Holds the persona-to-product index for request-time lookups"""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.path.join(settings.RECOMMENDER_ARTIFACT_DIR, "persona_index")
+        self.index: Optional[PersonaProductIndex] = None
+
+    def load(self) -> bool:
+        """Memory-map the index if it has been built"""
+        if not os.path.exists(os.path.join(self.path, "ids.npy")):
+            logger.warning(f"No persona index at {self.path}; run `python -m src.cli build-persona-index`")
+            return False
+        self.index = PersonaProductIndex.load(self.path)
+        logger.info(f"Loaded persona index from {self.path}")
+        return True
+
+    def nearest_products(self, persona: Any, k: int = 10) -> List[Tuple[Any, float]]:
+        """Products closest to a persona, empty when no index is loaded"""
+        if self.index is None or not persona:
+            return []
+        return self.index.query_persona(persona, k)
+
+# Create a singleton instance
+persona_index_service = PersonaIndexService()
@@ -1,69 +1,117 @@
 import pandas as pd
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 import os
+from .catalog_snapshot import CatalogSnapshot, file_digest
+
+class ProductCatalog:
+    """
+    Formatted product records with lookup indexes, built once per load.
+
+    Records are formatted with vectorized column operations; the hash index on
+    Product_ID and the group indexes on Category/Subcategory map to record
+    positions, so lookups are O(1) and listings O(k). Records are shared
+    between callers and must be treated as read-only.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        if df.empty:
+            self.records: List[Dict[str, Any]] = []
+            self.by_id: Dict[Any, int] = {}
+            self.by_category: Dict[Any, List[int]] = {}
+            self.by_subcategory: Dict[Any, List[int]] = {}
+            return
+
+        ids = df['Product_ID']
+        brand = df['Brand'].astype(str)
+        category = df['Category'].astype(str)
+        subcategory = df['Subcategory'].astype(str)
+        columns = {
+            'id': ids.tolist(),
+            'name': (brand + ' ' + subcategory).tolist(),
+            'description': (category + ' - ' + subcategory).tolist(),
+            'price': df['Price'].astype(float).tolist(),
+            'category': df['Category'].tolist(),
+            'subcategory': df['Subcategory'].tolist(),
+            'brand': df['Brand'].tolist(),
+            'rating': df['Product_Rating'].astype(float).tolist(),
+            'image': ('/images/products/' + ids.astype(str) + '.jpg').tolist()  # Placeholder image path
+        }
+        keys = list(columns)
+        self.records = [dict(zip(keys, values)) for values in zip(*columns.values())]
+
+        # First occurrence wins for duplicated IDs, as with the previous column scan
+        self.by_id = {}
+        for position, product_id in enumerate(columns['id']):
+            self.by_id.setdefault(product_id, position)
+        self.by_category = {value: rows.tolist() for value, rows in df.groupby('Category', sort=False, observed=True).indices.items()}
+        self.by_subcategory = {
+            value: rows.tolist() for value, rows in df.groupby('Subcategory', sort=False, observed=True).indices.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def get(self, product_id: Any) -> Optional[Dict[str, Any]]:
+        position = self.by_id.get(product_id)
+        return self.records[position] if position is not None else None
+
+    def group(self, index: Dict[Any, List[int]], value: Any) -> List[Dict[str, Any]]:
+        return [self.records[position] for position in index.get(value, [])]
+
+DEFAULT_PRODUCT_DATA_PATH = os.path.join(os.path.dirname(__file__), '../../data/product_recommendation_data.csv')
+
+def read_product_csv(path: str) -> pd.DataFrame:
+    """Load products from CSV file"""
+    df = pd.read_csv(path)
+    # Clean and transform data
+    df = df.dropna(subset=['Product_ID', 'Category', 'Price'])
+    df['Price'] = df['Price'].astype(float)
+    df['Product_Rating'] = df['Product_Rating'].fillna(0)
+    return df
 
 class ProductService:
-    def __init__(self):
-        self.data_path = os.path.join(os.path.dirname(__file__), '../../data/product_recommendation_data.csv')
+    def __init__(self, data_path: Optional[str] = None, snapshot_dir: Optional[str] = None):
+        self.data_path = data_path or DEFAULT_PRODUCT_DATA_PATH
+        self.snapshot = CatalogSnapshot(self.data_path, snapshot_dir)
         self.products = self._load_products()
+        self.catalog = ProductCatalog(self.products)
 
     def _load_products(self) -> pd.DataFrame:
-        """Load products from CSV file"""
+        """Load products from the compiled snapshot, recompiling it when the CSV file changed"""
         try:
-            df = pd.read_csv(self.data_path)
-            # Clean and transform data
-            df = df.dropna(subset=['Product_ID', 'Category', 'Price'])
-            df['Price'] = df['Price'].astype(float)
-            df['Product_Rating'] = df['Product_Rating'].fillna(0)
-            return df
+            df = self.snapshot.load()
+            if df is not None:
+                return df
+            return self.compile_snapshot()
         except Exception as e:
             print(f"Error loading products: {e}")
             return pd.DataFrame()
 
+    def compile_snapshot(self) -> pd.DataFrame:
+        """Parse the CSV file and compile it into the snapshot"""
+        digest = file_digest(self.data_path)
+        df = read_product_csv(self.data_path)
+        try:
+            self.snapshot.save(df, digest)
+        except OSError as e:
+            print(f"Error saving catalog snapshot: {e}")
+            return df
+        # Reload so text columns are categorical whether or not the snapshot existed
+        snapshot = self.snapshot.load()
+        return df if snapshot is None else snapshot
+
     def get_all_products(self) -> List[Dict[str, Any]]:
         """Get all products with formatted data"""
-        products = []
-        for _, row in self.products.iterrows():
-            product = {
-                'id': row['Product_ID'],
-                'name': f"{row['Brand']} {row['Subcategory']}",
-                'description': f"{row['Category']} - {row['Subcategory']}",
-                'price': float(row['Price']),
-                'category': row['Category'],
-                'subcategory': row['Subcategory'],
-                'brand': row['Brand'],
-                'rating': float(row['Product_Rating']),
-                'image': f"/images/products/{row['Product_ID']}.jpg"  # Placeholder image path
-            }
-            products.append(product)
-        return products
+        return list(self.catalog.records)
 
     def get_products_by_category(self, category: str) -> List[Dict[str, Any]]:
         """Get products filtered by category"""
-        filtered_df = self.products[self.products['Category'] == category]
-        return self._format_products(filtered_df)
+        return self.catalog.group(self.catalog.by_category, category)
+
+    def get_products_by_subcategory(self, subcategory: str) -> List[Dict[str, Any]]:
+        """Get products filtered by subcategory"""
+        return self.catalog.group(self.catalog.by_subcategory, subcategory)
 
     def get_product_by_id(self, product_id: str) -> Dict[str, Any]:
         """Get a single product by ID"""
-        product = self.products[self.products['Product_ID'] == product_id]
-        if not product.empty:
-            return self._format_products(product)[0]
-        return {}
-
-    def _format_products(self, df: pd.DataFrame) -> List[Dict[str, Any]]:
-        """Format products from DataFrame to list of dictionaries"""
-        products = []
-        for _, row in df.iterrows():
-            product = {
-                'id': row['Product_ID'],
-                'name': f"{row['Brand']} {row['Subcategory']}",
-                'description': f"{row['Category']} - {row['Subcategory']}",
-                'price': float(row['Price']),
-                'category': row['Category'],
-                'subcategory': row['Subcategory'],
-                'brand': row['Brand'],
-                'rating': float(row['Product_Rating']),
-                'image': f"/images/products/{row['Product_ID']}.jpg"  # Placeholder image path
-            }
-            products.append(product)
-        return products 
\ No newline at end of file
+        return self.catalog.get(product_id) or {}
@@ -0,0 +1,152 @@
+"""
+Online logistic ranking model trained from recommendation feedback.
+
+Every click, add-to-cart, purchase or dismissal is one SGD step on the
+scoring features of the (customer, product) pair. Weights are kept per
+customer segment, regularized towards the hand-tuned defaults and projected
+onto non-negative values so the scoring engine can use them as is.
+"""
+import threading
+from typing import Any, Dict, Optional
+import numpy as np
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+from ..config import settings
+from ..models import Customer, Product, RankingWeights
+from ..utils.logger import setup_logger
+from .scoring_engine import FEATURES, build_customer_profile, get_scoring_engine, weights_vector
+
+logger = setup_logger(__name__)
+
+DEFAULT_SEGMENT = "default"
+
+# Feedback event -> (label, sample weight)
+FEEDBACK_EVENTS = {
+    "click": (1.0, 1.0),
+    "add_to_cart": (1.0, 2.0),
+    "purchase": (1.0, 3.0),
+    "dismiss": (0.0, 1.0),
+}
+
+def _sigmoid(value: float) -> float:
+    return float(1.0 / (1.0 + np.exp(-value)))
+
+class RankingModel:
+    """Per-segment logistic regression over the scoring engine's FEATURES"""
+
+    def __init__(self, learning_rate: Optional[float] = None, l2: Optional[float] = None):
+        self.learning_rate = learning_rate if learning_rate is not None else settings.RANKING_LEARNING_RATE
+        self.l2 = l2 if l2 is not None else settings.RANKING_L2
+        self.prior = weights_vector()
+        self.weights: Dict[str, np.ndarray] = {}
+        self.bias: Dict[str, float] = {}
+        self.updates: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def segment_key(segment: Optional[str]) -> str:
+        return segment or DEFAULT_SEGMENT
+
+    def load(self, db: Session) -> bool:
+        """Load the persisted weights of every segment"""
+        try:
+            rows = db.query(RankingWeights).all()
+        except SQLAlchemyError as e:
+            db.rollback()
+            logger.warning(f"Ranking weights unavailable: {e}")
+            return False
+        with self._lock:
+            for row in rows:
+                self.weights[row.segment] = weights_vector(row.weights)
+                self.bias[row.segment] = row.bias or 0.0
+                self.updates[row.segment] = row.updates or 0
+        logger.info(f"Loaded ranking weights for {len(rows)} segments")
+        return bool(rows)
+
+    def weights_for(self, segment: Optional[str]) -> Optional[np.ndarray]:
+        """Learned weights for a segment, or None to score with the defaults"""
+        return self.weights.get(self.segment_key(segment))
+
+    def version(self, segment: Optional[str]) -> int:
+        """Number of updates applied to a segment; changes whenever its ranking can change"""
+        return self.updates.get(self.segment_key(segment), 0)
+
+    def update(self, segment: Optional[str], features: np.ndarray, label: float, sample_weight: float = 1.0) -> float:
+        """
+        Apply one SGD step.
+
+        Args:
+            segment: Customer segment
+            features: Feature vector aligned with FEATURES
+            label: 1 for positive feedback, 0 for negative
+            sample_weight: Strength of the event
+
+        Returns:
+            Predicted probability before the update
+        """
+        key = self.segment_key(segment)
+        with self._lock:
+            weights = self.weights.get(key, self.prior).copy()
+            bias = self.bias.get(key, 0.0)
+            probability = _sigmoid(float(features @ weights) + bias)
+            error = (probability - label) * sample_weight
+            gradient = error * features + self.l2 * (weights - self.prior)
+            self.weights[key] = np.maximum(weights - self.learning_rate * gradient, 0.0).astype(np.float32)
+            self.bias[key] = bias - self.learning_rate * error
+            self.updates[key] = self.updates.get(key, 0) + 1
+        return probability
+
+    def save(self, db: Session, segment: Optional[str]):
+        """Persist one segment's weights"""
+        key = self.segment_key(segment)
+        db.merge(RankingWeights(
+            segment=key,
+            weights={name: float(value) for name, value in zip(FEATURES, self.weights[key])},
+            bias=float(self.bias[key]),
+            updates=self.updates[key]
+        ))
+        db.commit()
+
+    def record_feedback(self, db: Session, customer_id: str, product_id: str, event: str) -> Dict[str, Any]:
+        """
+        Learn from one feedback event and persist the segment's weights.
+
+        Args:
+            db: SQLAlchemy session
+            customer_id: Customer.customer_id
+            product_id: Product.product_id
+            event: One of FEEDBACK_EVENTS
+
+        Returns:
+            Segment, prediction before the update and the new weights
+        """
+        if event not in FEEDBACK_EVENTS:
+            raise ValueError(f"Unknown feedback event: {event}")
+        customer = db.query(Customer).filter(Customer.customer_id == customer_id).first()
+        if not customer:
+            raise ValueError(f"Customer with ID {customer_id} not found")
+        product = db.query(Product).filter(Product.product_id == product_id).first()
+        if not product:
+            raise ValueError(f"Product with ID {product_id} not found")
+
+        engine = get_scoring_engine(db, Product)
+        profile = build_customer_profile(customer)
+        # Scored against the whole catalog so category_match is scaled as at serving time
+        features = engine.feature_matrix(profile)[engine.matrix.row_by_id[product.id]]
+
+        label, sample_weight = FEEDBACK_EVENTS[event]
+        segment = customer.customer_segment
+        probability = self.update(segment, features, label, sample_weight)
+        self.save(db, segment)
+        return {
+            "segment": self.segment_key(segment),
+            "predicted": probability,
+            "weights": dict(zip(FEATURES, self.weights_for(segment).tolist())),
+            "updates": self.version(segment)
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return {"segments": len(self.weights), "updates": dict(self.updates)}
+
+# Create a singleton instance
+ranking_model = RankingModel()
@@ -0,0 +1,245 @@
+"""
+Offline materialization of top-N recommendations for the whole customer base.
+
+Customers are split into shards of consecutive ids, each shard is scored by
+a pool worker with the same candidate retrieval and local ranking used
+online (RecommendationService.rank_candidates, including the customer's
+latest tracked mood), and the parent process bulk-inserts the rows tagged
+with a generation number. A generation is published only after every shard
+has been written, so readers never see a half-written run.
+
+An incremental run scores only the customers in the dirty set; every other
+customer keeps serving the rows of the last generation that included them.
+"""
+from datetime import datetime
+from multiprocessing import Pool
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from sqlalchemy import create_engine, func
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session, sessionmaker
+from ..config import settings
+from ..models import Customer, Product, Recommendation, RecommendationGeneration
+from ..utils.logger import setup_logger
+from .collaborative_filtering import cf_service
+from .dirty_tracker import dirty_tracker
+from .explanation_engine import explanation_engine
+from .persona_index import persona_index_service
+from .ranking_model import ranking_model
+from .recommendation_store import bulk_upsert
+from .scoring_engine import get_scoring_engine
+from .segment_rankings import segment_rankings
+
+logger = setup_logger(__name__)
+
+# Per-process state, set up once in every pool worker
+_session_factory = None
+_service = None
+
+def _init_worker(database_url: str):
+    global _session_factory, _service
+    from .recommendation_service import RecommendationService
+
+    _session_factory = sessionmaker(bind=create_engine(database_url))
+    cf_service.load()
+    persona_index_service.load()
+    db = _session_factory()
+    try:
+        segment_rankings.load_segments(db)
+        ranking_model.load(db)
+    finally:
+        db.close()
+    _service = RecommendationService()
+
+def _score_shard(task: Tuple[Sequence[int], int, int]) -> Tuple[int, List[Dict[str, Any]]]:
+    """Score every customer of a shard"""
+    customer_ids, top_n, generation = task
+    db = _session_factory()
+    try:
+        engine = get_scoring_engine(db, Product)
+        customers = db.query(Customer).filter(Customer.id.in_(customer_ids)).all()
+        moods = _service.latest_moods(db, customer_ids)
+        rows = []
+        for customer in customers:
+            profile, candidates = _service.retrieve_candidates(customer, engine)
+            profile["mood"] = moods.get(customer.id)
+            top = _service.rank_candidates(engine, profile, candidates, top_n)
+            weights = ranking_model.weights_for(profile.get("segment"))
+            explanations = explanation_engine.explain(engine, profile, [row for row, _ in top], weights=weights)
+            for (row, score), explanation in zip(top, explanations):
+                rows.append({
+                    "customer_id": customer.id,
+                    "product_id": engine.matrix.ids[row],
+                    "match_score": score,
+                    "explanation": explanation,
+                    "generation": generation
+                })
+        return len(customers), rows
+    finally:
+        db.close()
+
+def shard_customers(customer_ids: Sequence[int], shard_size: int) -> List[List[int]]:
+    """Split customer ids into shards of at most shard_size consecutive ids"""
+    ordered = sorted(customer_ids)
+    return [ordered[start:start + shard_size] for start in range(0, len(ordered), shard_size)]
+
+def _discard_unpublished(db: Session):
+    """Drop rows left behind by runs that crashed before publishing"""
+    stale = db.query(RecommendationGeneration).filter(RecommendationGeneration.status != "published").all()
+    for run in stale:
+        db.query(Recommendation).filter(Recommendation.generation == run.id).delete(synchronize_session=False)
+        run.status = "failed"
+    db.commit()
+
+def materialize_recommendations(
+    database_url: Optional[str] = None,
+    top_n: int = 20,
+    workers: int = 1,
+    shard_size: int = 2000,
+    incremental: bool = False
+) -> Dict[str, Any]:
+    """
+    Precompute and store top-N recommendations for every customer.
+
+    Args:
+        database_url: Database to read customers/products from and write to
+        top_n: Recommendations stored per customer
+        workers: Pool size; 1 scores shards in-process
+        shard_size: Customers per shard
+        incremental: Only recompute customers affected by tracked changes
+
+    Returns:
+        Summary of the published generation
+    """
+    database_url = database_url or settings.DATABASE_URL
+    db = sessionmaker(bind=create_engine(database_url))()
+    started = time.time()
+    try:
+        _discard_unpublished(db)
+        cutoff = datetime.utcnow()
+        published = materialized_recommendations.published_generation(db, refresh=True)
+        run = RecommendationGeneration(status="running")
+        db.add(run)
+        db.commit()
+
+        if incremental and published is not None:
+            customer_ids = dirty_tracker.affected_customers(db, cutoff, published)
+        else:
+            customer_ids = [customer_id for (customer_id,) in db.query(Customer.id)]
+        tasks = [(shard, top_n, run.id) for shard in shard_customers(customer_ids, shard_size)]
+
+        pool = Pool(workers, initializer=_init_worker, initargs=(database_url,)) if workers > 1 else None
+        if pool is None:
+            _init_worker(database_url)
+        try:
+            results = pool.imap_unordered(_score_shard, tasks) if pool else map(_score_shard, tasks)
+            for customers, rows in results:
+                if rows:
+                    # Upserting makes a retried shard idempotent
+                    bulk_upsert(
+                        db,
+                        Recommendation,
+                        rows,
+                        key_columns=("customer_id", "product_id", "generation"),
+                        update_columns=("match_score", "explanation")
+                    )
+                    db.commit()
+                run.customers += customers
+                run.rows += len(rows)
+        except Exception:
+            db.rollback()
+            db.query(Recommendation).filter(Recommendation.generation == run.id).delete(synchronize_session=False)
+            run.status = "failed"
+            db.commit()
+            raise
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+
+        run.status = "published"
+        run.completed_at = datetime.utcnow()
+        db.commit()
+        dirty_tracker.clear(db, cutoff)
+
+        summary = {
+            "generation": run.id,
+            "customers": run.customers,
+            "rows": run.rows,
+            "shards": len(tasks),
+            "incremental": incremental and published is not None,
+            "seconds": round(time.time() - started, 2)
+        }
+        logger.info(f"Published recommendation generation {summary}")
+        return summary
+    finally:
+        db.close()
+
+class MaterializedRecommendations:
+    """Serves each customer's rows from their newest published generation"""
+
+    def __init__(self, refresh_seconds: Optional[int] = None):
+        self.refresh_seconds = refresh_seconds if refresh_seconds is not None \
+            else settings.RECOMMENDATION_GENERATION_REFRESH_SECONDS
+        self.generation: Optional[int] = None
+        self.checked_at = 0.0
+        self.served = 0
+        self.fallbacks = 0
+
+    def published_generation(self, db: Session, refresh: bool = False) -> Optional[int]:
+        """Latest published generation, re-read at most every refresh_seconds"""
+        now = time.time()
+        if refresh or now - self.checked_at >= self.refresh_seconds:
+            self.generation = db.query(func.max(RecommendationGeneration.id))\
+                .filter(RecommendationGeneration.status == "published")\
+                .scalar()
+            self.checked_at = now
+        return self.generation
+
+    def get(self, db: Session, customer_id: int, limit: int) -> Optional[List[Dict[str, Any]]]:
+        """
+        Materialized recommendations for a customer (database id).
+
+        Returns:
+            Ranked recommendations, or None when the customer is cold and must be scored live
+        """
+        try:
+            published = self.published_generation(db)
+            if published is None:
+                rows = []
+            else:
+                # The customer's newest published generation; incremental runs skip unchanged customers
+                latest = db.query(func.max(Recommendation.generation))\
+                    .filter(Recommendation.customer_id == customer_id, Recommendation.generation <= published)\
+                    .scalar_subquery()
+                rows = db.query(Product.product_id, Recommendation.explanation, Recommendation.match_score)\
+                    .join(Product, Product.id == Recommendation.product_id)\
+                    .filter(Recommendation.customer_id == customer_id, Recommendation.generation == latest)\
+                    .order_by(Recommendation.match_score.desc())\
+                    .limit(limit)\
+                    .all()
+        except SQLAlchemyError as e:
+            db.rollback()
+            logger.warning(f"Materialized recommendations unavailable: {e}")
+            rows = []
+
+        if limit <= 0 or len(rows) < limit:
+            self.fallbacks += 1
+            return None
+        self.served += 1
+        return [
+            {"product_id": product_id, "explanation": explanation or "", "match_score": score}
+            for product_id, explanation, score in rows
+        ]
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.served + self.fallbacks
+        return {
+            "generation": self.generation,
+            "served": self.served,
+            "live_fallbacks": self.fallbacks,
+            "served_ratio": self.served / lookups if lookups else 0.0
+        }
+
+# Create a singleton instance
+materialized_recommendations = MaterializedRecommendations()
@@ -0,0 +1,105 @@
+"""
+Per-customer cache of ranked recommendation results.
+"""
+from collections import OrderedDict
+import hashlib
+import json
+import threading
+import time
+from typing import Any, Dict, List, Optional
+from ..config import settings
+from ..utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+def fingerprint(**inputs: Any) -> str:
+    """Stable digest of the inputs a ranking was computed from"""
+    encoded = json.dumps(inputs, sort_keys=True, default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+class RecommendationCache:
+    """
+    LRU cache of ranked results keyed by customer.
+
+    An entry is served only while its fingerprint (persona version, latest
+    mood, cart contents, catalog version, ...) still matches; the writes that
+    change those inputs also invalidate the customer's entry eagerly.
+    """
+
+    def __init__(self, max_entries: Optional[int] = None, ttl: Optional[int] = None):
+        self.max_entries = max_entries or settings.RECOMMENDATION_CACHE_MAX_ENTRIES
+        self.ttl = ttl if ttl is not None else settings.RECOMMENDATION_CACHE_TTL
+        self.entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.invalidations = 0
+        self.served_age_total = 0.0
+        self.served_age_max = 0.0
+
+    def get(self, customer_key: Any, input_fingerprint: str) -> Optional[List[Dict[str, Any]]]:
+        """Cached results for the customer if they were computed from the same inputs"""
+        key = str(customer_key)
+        now = time.time()
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry["fingerprint"] != input_fingerprint or now - entry["created_at"] > self.ttl:
+                # Inputs changed through a path that did not invalidate, or the entry aged out
+                del self.entries[key]
+                self.stale += 1
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            age = now - entry["created_at"]
+            self.served_age_total += age
+            self.served_age_max = max(self.served_age_max, age)
+            return entry["results"]
+
+    def set(self, customer_key: Any, input_fingerprint: str, results: List[Dict[str, Any]]):
+        key = str(customer_key)
+        with self._lock:
+            self.entries[key] = {
+                "fingerprint": input_fingerprint,
+                "results": results,
+                "created_at": time.time()
+            }
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def invalidate(self, customer_key: Any):
+        """Drop a customer's cached results after a write that affects them"""
+        with self._lock:
+            if self.entries.pop(str(customer_key), None) is not None:
+                self.invalidations += 1
+
+    def invalidate_all(self):
+        """Drop every entry, e.g. after a catalog change"""
+        with self._lock:
+            self.invalidations += len(self.entries)
+            self.entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            now = time.time()
+            oldest = min((entry["created_at"] for entry in self.entries.values()), default=now)
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "stale_rejections": self.stale,
+                "invalidations": self.invalidations,
+                "entries": len(self.entries),
+                "avg_served_age_seconds": self.served_age_total / self.hits if self.hits else 0.0,
+                "max_served_age_seconds": self.served_age_max,
+                "oldest_entry_age_seconds": now - oldest
+            }
+
+# Create a singleton instance
+recommendation_cache = RecommendationCache()
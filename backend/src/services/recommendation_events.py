@@ -0,0 +1,51 @@
+"""
+Hooks called by the write paths that change recommendation inputs.
+
+Routes report what changed; this module fans the event out to the caches
+and trackers that depend on it.
+"""
+from typing import Any, Optional
+from sqlalchemy.orm import Session
+from ..models import Customer
+from .dirty_tracker import CUSTOMER, dirty_tracker
+from .recommendation_cache import recommendation_cache
+from .scoring_engine import LOCATION_ALIASES
+from .session_store import session_store
+from .trending import trending_engine
+
+def customer_changed(db: Session, customer_id: Any, reason: str):
+    """A customer's behavior, mood, cart or orders changed; customer_id may be the public code"""
+    database_id = dirty_tracker.resolve_id(db, CUSTOMER, customer_id)
+    if database_id is None:
+        database_id = customer_id
+    recommendation_cache.invalidate(database_id)
+    dirty_tracker.mark_customer(db, database_id, reason)
+
+def product_changed(db: Session, product_id: Any, reason: str):
+    """A product was created, edited, sold out or deleted"""
+    recommendation_cache.invalidate_all()
+    dirty_tracker.mark_product(db, product_id, reason)
+
+def customer_location(db: Session, customer: Any) -> Optional[str]:
+    """
+    Trending location of a customer, mapped to a product location.
+
+    The auth Customer (database.models) carries no location, so it is read
+    from the catalog Customer row that shares its id.
+    """
+    location = getattr(customer, "location", None)
+    if location is None:
+        location = db.query(Customer.location).filter(Customer.id == customer.id).scalar()
+    return LOCATION_ALIASES.get(location, location)
+
+def product_interacted(db: Session, product: Any, event: str, quantity: int = 1, customer: Optional[Any] = None):
+    """A product was viewed ("view"), added to a cart ("cart_add") or ordered ("purchase")"""
+    trending_engine.record(
+        product.id,
+        getattr(product, "category", None),
+        event,
+        quantity=quantity,
+        location=customer_location(db, customer) if customer is not None else None
+    )
+    if customer is not None:
+        session_store.record(customer.id, product.id, event)
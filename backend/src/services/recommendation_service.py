@@ -1,16 +1,29 @@
-from typing import List, Dict, Any
-import google.generativeai as genai
+from typing import List, Dict, Any, Optional, Tuple
+import json
+import numpy as np
 from ..config import settings
-from ..database import get_db, Product, Customer
+from ..database import get_db
+from ..database.models import CustomerMood
+from ..models import Cart, CartItem, Product, Customer
+from .candidate_retrieval import get_candidate_retriever
+from .collaborative_filtering import cf_service
+from .explanation_engine import explanation_engine, explanation_enricher
+from .llm_gateway import llm_gateway
+from .model_registry import model_registry
+from .mood_affinity import mood_affinity
+from .persona_index import persona_index_service
+from .ranking_model import ranking_model
+from .recommendation_batch import materialized_recommendations
+from .recommendation_cache import fingerprint, recommendation_cache
+from .segment_rankings import segment_rankings
+from .scoring_engine import ScoringEngine, build_customer_profile, get_scoring_engine, load_scored_products
+from sqlalchemy import and_, func
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
 
 class RecommendationService:
     def __init__(self):
-        if settings.GEMINI_API_KEY:
-            genai.configure(api_key=settings.GEMINI_API_KEY)
-            self.model = genai.GenerativeModel('gemini-pro')
-        else:
-            self.model = None
+        self.model = model_registry.get('gemini-pro')
     
     async def generate_recommendations(
         self,
@@ -18,63 +31,48 @@ class RecommendationService:
         limit: int = 5,
         db: Session = None
     ) -> List[Dict[str, Any]]:
-        if not self.model:
-            return []
-        
         try:
             if not db:
                 db = next(get_db())
             
-            # Get customer and products
+            # Get customer
             customer = db.query(Customer).filter(Customer.customer_id == customer_id).first()
             if not customer:
                 raise ValueError(f"Customer with ID {customer_id} not found")
             
-            products = db.query(Product).all()
-            if not products:
-                raise ValueError("No products available")
-            
-            # Prepare the prompt with customer and product information
-            prompt = f"""
-            You are a product recommendation system for SmartCart. Based on the following information:
+            # Precomputed by the batch job; only cold customers are scored live
+            materialized = materialized_recommendations.get(db, customer.id, limit)
+            if materialized is not None:
+                return materialized
             
-            Customer:
-            - ID: {customer.customer_id}
-            - Name: {customer.name}
-            - Email: {customer.email}
-            
-            Available Products:
-            {[f"- {p.name} (ID: {p.id}, Category: {p.category}, Price: ${p.price})" for p in products]}
+            engine = get_scoring_engine(db, Product)
+            if engine.matrix.size == 0:
+                raise ValueError("No products available")
             
-            Please recommend {limit} products that would be most relevant to this customer.
-            For each recommendation, provide:
-            1. The product ID
-            2. A brief explanation of why this product would be a good match
-            3. A match score between 0 and 1
+            # Cold start: nothing personal to score, serve the customer's context ranking
+            context_profile = build_customer_profile(customer)
+            if not customer.persona and not context_profile["category_affinity"]:
+                return self._from_segment_ranking(db, engine, context_profile, limit)
             
-            Format your response as a JSON array of objects with the following structure:
-            [
-                {{
-                    "product_id": str,
-                    "explanation": str,
-                    "match_score": float
-                }},
-                ...
-            ]
-            """
+            latest_mood = self._latest_mood(db, customer)
+            input_fingerprint = self._input_fingerprint(db, customer, engine, latest_mood, limit)
+            cached = recommendation_cache.get(customer.id, input_fingerprint)
+            if cached is not None:
+                return cached
             
-            # Generate recommendations
-            response = await self.model.generate_content(prompt)
-            recommendations = response.text
+            # Stage 1: retrieve a shortlist from cheap indexes
+            profile, candidates = self.retrieve_candidates(customer, engine)
+            profile["mood"] = latest_mood
             
-            # Parse the response
-            try:
-                recommendations = eval(recommendations)  # Convert string to list
-            except:
-                recommendations = []
+            # Stage 2: re-rank only the shortlist
+            if settings.RECOMMENDATION_RERANKER == "llm" and self.model:
+                recommendations = await self._rerank_with_llm(db, customer, engine, profile, candidates, limit)
+            else:
+                recommendations = self._rerank_locally(db, engine, profile, candidates, limit)
             
+            recommendation_cache.set(customer.id, input_fingerprint, recommendations)
             return recommendations
-            
+        
         except Exception as e:
             print(f"Error generating recommendations: {e}")
             return []
@@ -82,15 +80,220 @@ class RecommendationService:
             if not db:
                 db.close()
     
+    def retrieve_candidates(self, customer: Customer, engine: ScoringEngine) -> Tuple[Dict[str, Any], np.ndarray]:
+        """
+        First stage of the pipeline: union of index, collaborative and persona candidates.
+        
+        Returns:
+            (customer profile, candidate catalog rows)
+        """
+        profile = build_customer_profile(customer)
+        candidates = get_candidate_retriever(engine).retrieve(profile, settings.RECOMMENDATION_CANDIDATE_LIMIT)
+        collaborative = cf_service.recommend(customer.customer_id, engine, settings.CF_CANDIDATES)
+        if collaborative:
+            candidates = np.union1d(candidates, [row for row, _ in collaborative])
+        context_rows = segment_rankings.for_profile(engine, profile, settings.SEGMENT_CANDIDATES)
+        if context_rows:
+            candidates = np.union1d(candidates, [row for row, _ in context_rows])
+        persona_matches = persona_index_service.nearest_products(customer.persona, settings.PERSONA_CANDIDATES)
+        if persona_matches:
+            candidates = np.union1d(candidates, engine.matrix.rows_for(pid for pid, _ in persona_matches))
+        return profile, candidates
+    
+    def rank_candidates(
+        self,
+        engine: ScoringEngine,
+        profile: Dict[str, Any],
+        candidates: np.ndarray,
+        limit: int
+    ) -> List[Tuple[int, float]]:
+        """
+        Second stage of the local pipeline, shared with the batch job.
+        
+        Scores the shortlist with the segment's learned weights and, when the
+        profile carries a mood, re-ranks a wider base list for that mood.
+        
+        Returns:
+            (catalog row, score) pairs sorted by descending score
+        """
+        weights = ranking_model.weights_for(profile.get("segment"))
+        if profile.get("mood"):
+            base = engine.top_k(profile, max(limit, settings.MOOD_CANDIDATES), rows=candidates, weights=weights)
+            return mood_affinity.rerank(engine, base, profile["mood"], limit)
+        return engine.top_k(profile, limit, rows=candidates, weights=weights)
+    
+    def latest_moods(self, db: Session, customer_ids: List[int]) -> Dict[int, str]:
+        """Most recently tracked mood of each customer, in one query"""
+        try:
+            latest = db.query(CustomerMood.customer_id, func.max(CustomerMood.created_at).label("created_at"))\
+                .filter(CustomerMood.customer_id.in_(customer_ids))\
+                .group_by(CustomerMood.customer_id)\
+                .subquery()
+            rows = db.query(CustomerMood.customer_id, CustomerMood.mood)\
+                .join(latest, and_(
+                    CustomerMood.customer_id == latest.c.customer_id,
+                    CustomerMood.created_at == latest.c.created_at
+                ))\
+                .all()
+            return dict(rows)
+        except SQLAlchemyError:
+            # Mood tracking tables are optional in this deployment
+            db.rollback()
+            return {}
+    
+    def _from_segment_ranking(
+        self,
+        db: Session,
+        engine: ScoringEngine,
+        profile: Dict[str, Any],
+        limit: int
+    ) -> List[Dict[str, Any]]:
+        top = segment_rankings.for_profile(engine, profile, limit)
+        return self._respond(db, engine, profile, top)
+    
+    def _respond(
+        self,
+        db: Session,
+        engine: ScoringEngine,
+        profile: Dict[str, Any],
+        top: List[Tuple[int, float]]
+    ) -> List[Dict[str, Any]]:
+        """Response rows with template explanations for ranked (row, score) pairs"""
+        scored = load_scored_products(db, Product, engine, top)
+        rows = [engine.matrix.row_by_id[product.id] for product, _ in scored]
+        explanations = explanation_engine.explain(
+            engine, profile, rows, weights=ranking_model.weights_for(profile.get("segment"))
+        )
+        return [
+            {
+                "product_id": product.product_id,
+                "explanation": explanation,
+                "match_score": score
+            }
+            for (product, score), explanation in zip(scored, explanations)
+        ]
+    
+    def _latest_mood(self, db: Session, customer: Customer) -> Optional[str]:
+        """Most recently tracked mood of a customer"""
+        try:
+            return db.query(CustomerMood.mood)\
+                .filter(CustomerMood.customer_id == customer.id)\
+                .order_by(CustomerMood.created_at.desc())\
+                .limit(1).scalar()
+        except SQLAlchemyError:
+            # Mood tracking tables are optional in this deployment
+            db.rollback()
+            return None
+    
+    def _input_fingerprint(
+        self,
+        db: Session,
+        customer: Customer,
+        engine: ScoringEngine,
+        latest_mood: Optional[str],
+        limit: int
+    ) -> str:
+        """Fingerprint of everything the ranking depends on: persona, latest mood, cart and catalog"""
+        cart_items = db.query(CartItem.product_id, CartItem.quantity)\
+            .join(Cart, Cart.id == CartItem.cart_id)\
+            .filter(Cart.customer_id == customer.id)\
+            .order_by(CartItem.product_id)\
+            .all()
+        
+        return fingerprint(
+            persona_version=customer.updated_at,
+            persona=customer.persona,
+            mood=latest_mood,
+            cart=[tuple(item) for item in cart_items],
+            catalog=engine.version,
+            ranking_model=ranking_model.version(customer.customer_segment),
+            limit=limit
+        )
+    
+    def _rerank_locally(
+        self,
+        db: Session,
+        engine: ScoringEngine,
+        profile: Dict[str, Any],
+        candidates: np.ndarray,
+        limit: int
+    ) -> List[Dict[str, Any]]:
+        top = self.rank_candidates(engine, profile, candidates, limit)
+        return self._respond(db, engine, profile, top)
+    
+    async def _rerank_with_llm(
+        self,
+        db: Session,
+        customer: Customer,
+        engine: ScoringEngine,
+        profile: Dict[str, Any],
+        candidates: np.ndarray,
+        limit: int
+    ) -> List[Dict[str, Any]]:
+        shortlist = engine.top_k(
+            profile,
+            settings.RECOMMENDATION_LLM_SHORTLIST,
+            rows=candidates,
+            weights=ranking_model.weights_for(profile.get("segment"))
+        )
+        products = load_scored_products(db, Product, engine, shortlist)
+        
+        # Prepare the prompt with customer and shortlisted product information
+        prompt = f"""
+        You are a product recommendation system for SmartCart. Based on the following information:
+        
+        Customer:
+        - ID: {customer.customer_id}
+        - Name: {customer.name}
+        - Email: {customer.email}
+        
+        Available Products:
+        {[f"- {p.name} (ID: {p.product_id}, Category: {p.category}, Price: ${p.price})" for p, _ in products]}
+        
+        Please recommend {limit} products that would be most relevant to this customer.
+        For each recommendation, provide:
+        1. The product ID
+        2. A brief explanation of why this product would be a good match
+        3. A match score between 0 and 1
+        
+        Format your response as a JSON array of objects with the following structure:
+        [
+            {{
+                "product_id": str,
+                "explanation": str,
+                "match_score": float
+            }},
+            ...
+        ]
+        """
+        
+        # Generate recommendations
+        response = await llm_gateway.generate(self.model, prompt)
+        
+        # Parse the response, falling back to the local ranking of the shortlist
+        try:
+            recommendations = json.loads(response)
+        except json.JSONDecodeError:
+            recommendations = None
+        if not isinstance(recommendations, list):
+            return self._rerank_locally(db, engine, profile, candidates, limit)
+        return recommendations[:limit]
+    
     async def explain_recommendation(
         self,
         customer_id: str,
         product_id: str,
-        db: Session = None
+        db: Session = None,
+        locale: Optional[str] = None,
+        enrich: Optional[bool] = None
     ) -> str:
-        if not self.model:
-            return "Recommendation service is not available."
+        """
+        Explain why a product is recommended to a customer.
         
+        The explanation is rendered from the scoring features; with enrichment
+        on, an LLM rewrite is started in the background and returned by later
+        calls once it is ready.
+        """
         try:
             if not db:
                 db = next(get_db())
@@ -104,33 +307,48 @@ class RecommendationService:
             if not product:
                 raise ValueError(f"Product with ID {product_id} not found")
             
-            # Prepare the prompt
-            prompt = f"""
-            You are a product recommendation system for SmartCart. Explain why the following product
-            would be a good match for this customer:
+            if settings.RECOMMENDATION_EXPLANATIONS == "llm":
+                if not self.model:
+                    return "Recommendation service is not available."
+                return await llm_gateway.generate(self.model, self._explanation_prompt(customer, product))
             
-            Customer:
-            - ID: {customer.customer_id}
-            - Name: {customer.name}
-            - Email: {customer.email}
+            enriched = explanation_enricher.get(customer_id, product_id)
+            if enriched is not None:
+                return enriched
             
-            Product:
-            - Name: {product.name}
-            - Category: {product.category}
-            - Price: ${product.price}
-            - Description: {product.description}
+            engine = get_scoring_engine(db, Product)
+            profile = build_customer_profile(customer, self._latest_mood(db, customer))
+            explanation = explanation_engine.explain(engine, profile, engine.matrix.rows_for([product.id]), locale)[0]
             
-            Please provide a detailed explanation of why this product would be a good match
-            for this customer, considering their preferences and the product's features.
-            """
-            
-            # Generate explanation
-            response = await self.model.generate_content(prompt)
-            return response.text
+            if settings.EXPLANATION_LLM_ENRICHMENT if enrich is None else enrich:
+                explanation_enricher.schedule(
+                    self.model, customer_id, product_id, self._explanation_prompt(customer, product)
+                )
+            return explanation
             
         except Exception as e:
             print(f"Error explaining recommendation: {e}")
             return "Unable to generate explanation."
         finally:
             if not db:
-                db.close() 
\ No newline at end of file
+                db.close()
+    
+    def _explanation_prompt(self, customer: Customer, product: Product) -> str:
+        return f"""
+        You are a product recommendation system for SmartCart. Explain why the following product
+        would be a good match for this customer:
+        
+        Customer:
+        - ID: {customer.customer_id}
+        - Name: {customer.name}
+        - Email: {customer.email}
+        
+        Product:
+        - Name: {product.name}
+        - Category: {product.category}
+        - Price: ${product.price}
+        - Description: {product.description}
+        
+        Please provide a detailed explanation of why this product would be a good match
+        for this customer, considering their preferences and the product's features.
+        """
@@ -0,0 +1,195 @@
+"""
+Bulk writes and bounded retention for the recommendations table.
+"""
+import asyncio
+import time
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+from sqlalchemy import and_, delete, func, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session, aliased
+from ..config import settings
+from ..database import SessionLocal
+from ..models import Recommendation, RecommendationGeneration
+from ..utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+_UPSERT_DIALECTS = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
+
+def bulk_upsert(
+    db: Session,
+    model: Any,
+    rows: List[Dict[str, Any]],
+    key_columns: Sequence[str],
+    update_columns: Iterable[str],
+    key_where: Optional[Any] = None
+) -> int:
+    """
+    Insert rows in one statement, updating rows whose key already exists.
+
+    Args:
+        db: SQLAlchemy session (the caller commits)
+        model: ORM class; key_columns must be covered by a unique constraint
+        rows: Column dictionaries
+        key_columns: Conflict target
+        update_columns: Columns overwritten on conflict
+        key_where: Predicate of a partial unique index on key_columns
+
+    Returns:
+        Number of rows written
+    """
+    if not rows:
+        return 0
+
+    insert = _UPSERT_DIALECTS.get(db.get_bind().dialect.name)
+    if insert is None:
+        # No native upsert: replace the conflicting rows inside the caller's transaction
+        table = model.__table__
+        for row in rows:
+            conflict = and_(*(table.c[key] == row[key] for key in key_columns))
+            if key_where is not None:
+                conflict = and_(conflict, key_where)
+            db.execute(delete(table).where(conflict))
+        db.execute(table.insert(), rows)
+        return len(rows)
+
+    statement = insert(model)
+    statement = statement.on_conflict_do_update(
+        index_elements=list(key_columns),
+        index_where=key_where,
+        set_={column: statement.excluded[column] for column in update_columns}
+    )
+    db.execute(statement, rows)
+    return len(rows)
+
+def replace_live_recommendations(db: Session, customer_id: int, rows: List[Dict[str, Any]]) -> int:
+    """
+    Make rows the customer's whole on-request (generation IS NULL) set.
+
+    Rows are upserted on the partial unique index, and live rows for
+    products that fell out of the new set are deleted, so each customer
+    keeps at most one request's worth of live rows.
+
+    Args:
+        db: SQLAlchemy session (the caller commits)
+        customer_id: Customer database id
+        rows: Column dictionaries with product_id, match_score, explanation and created_at
+
+    Returns:
+        Number of rows deleted
+    """
+    live = Recommendation.generation.is_(None)
+    bulk_upsert(
+        db,
+        Recommendation,
+        rows,
+        key_columns=('customer_id', 'product_id'),
+        update_columns=('match_score', 'explanation', 'created_at'),
+        key_where=live
+    )
+    return db.query(Recommendation)\
+        .filter(
+            Recommendation.customer_id == customer_id,
+            live,
+            Recommendation.product_id.notin_([row['product_id'] for row in rows])
+        )\
+        .delete(synchronize_session=False)
+
+def prune_generations(db: Session, keep: int, batch_size: int) -> int:
+    """
+    Delete one batch of materialized rows older than each customer's latest
+    ``keep`` published generations.
+
+    Returns:
+        Number of rows deleted; 0 once nothing is left to prune
+    """
+    published = db.query(func.max(RecommendationGeneration.id))\
+        .filter(RecommendationGeneration.status == "published")\
+        .scalar()
+    if published is None:
+        return 0
+
+    newer = aliased(Recommendation)
+    newer_generations = select(func.count(func.distinct(newer.generation)))\
+        .where(
+            newer.customer_id == Recommendation.customer_id,
+            newer.generation > Recommendation.generation,
+            newer.generation <= published
+        )\
+        .scalar_subquery()
+    expired = select(Recommendation.id)\
+        .where(Recommendation.generation <= published, newer_generations >= keep)\
+        .limit(batch_size)
+
+    ids = [row_id for (row_id,) in db.execute(expired)]
+    if ids:
+        db.execute(delete(Recommendation).where(Recommendation.id.in_(ids)))
+        db.commit()
+    return len(ids)
+
+class RecommendationCompactor:
+    """Background task that prunes old generations in small batches"""
+
+    def __init__(
+        self,
+        keep: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        interval: Optional[int] = None
+    ):
+        self.keep = keep or settings.RECOMMENDATION_RETENTION_GENERATIONS
+        self.batch_size = batch_size or settings.RECOMMENDATION_COMPACTION_BATCH_SIZE
+        self.interval = interval or settings.RECOMMENDATION_COMPACTION_INTERVAL_SECONDS
+        self.task: Optional[asyncio.Task] = None
+        self.runs = 0
+        self.rows_pruned = 0
+        self.last_run: Optional[float] = None
+
+    def run_once(self, db: Optional[Session] = None) -> int:
+        """Prune until nothing expired is left, one committed batch at a time"""
+        session = db or SessionLocal()
+        deleted = 0
+        try:
+            while True:
+                batch = prune_generations(session, self.keep, self.batch_size)
+                deleted += batch
+                if batch < self.batch_size:
+                    break
+        finally:
+            if db is None:
+                session.close()
+        self.runs += 1
+        self.rows_pruned += deleted
+        self.last_run = time.time()
+        if deleted:
+            logger.info(f"Pruned {deleted} recommendation rows older than {self.keep} generations")
+        return deleted
+
+    async def _loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                # Deletes block, so keep them off the event loop
+                await loop.run_in_executor(None, self.run_once)
+            except Exception as e:
+                logger.error(f"Recommendation compaction failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if self.task is None or self.task.done():
+            self.task = asyncio.get_running_loop().create_task(self._loop())
+
+    def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "runs": self.runs,
+            "rows_pruned": self.rows_pruned,
+            "keep_generations": self.keep,
+            "last_run": self.last_run
+        }
+
+# Create a singleton instance
+recommendation_compactor = RecommendationCompactor()
@@ -0,0 +1,361 @@
+"""
+Vectorized recommendation scoring over the whole product catalog.
+"""
+import ast
+import json
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+import numpy as np
+from scipy import sparse
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from ..utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Per-product features, each scaled to [0, 1]
+FEATURES = (
+    "rating",
+    "sentiment",
+    "popularity",
+    "price_fit",
+    "category_match",
+    "season_match",
+    "holiday_match",
+    "location_match",
+)
+
+DEFAULT_WEIGHTS = {
+    "rating": 0.15,
+    "sentiment": 0.10,
+    "popularity": 0.15,
+    "price_fit": 0.10,
+    "category_match": 0.25,
+    "season_match": 0.10,
+    "holiday_match": 0.05,
+    "location_match": 0.10,
+}
+
+# Customer cities mapped to the country used in product geographical_location
+LOCATION_ALIASES = {
+    "Bangalore": "India",
+    "Chennai": "India",
+    "Delhi": "India",
+    "Kolkata": "India",
+    "Mumbai": "India",
+    "New York": "USA",
+}
+
+def as_list(value: Any) -> List[str]:
+    """Coerce a history/tag column (list, dict, JSON or Python literal string) to a list"""
+    if value is None:
+        return []
+    if isinstance(value, dict):
+        return [str(key) for key in value]
+    if isinstance(value, (list, tuple, set)):
+        return [str(item) for item in value]
+    if isinstance(value, str):
+        text = value.strip()
+        if not text:
+            return []
+        for parse in (json.loads, ast.literal_eval):
+            try:
+                return as_list(parse(text))
+            except (ValueError, SyntaxError):
+                continue
+        return [text]
+    return [str(value)]
+
+def _float(value: Any, default: float) -> float:
+    try:
+        result = float(value)
+    except (TypeError, ValueError):
+        return default
+    return default if np.isnan(result) else result
+
+def product_mood_tags(product: Any) -> List[str]:
+    """Lower-cased mood tags of a product, read from mood_tags or product_metadata"""
+    get = product.get if isinstance(product, dict) else lambda name: getattr(product, name, None)
+    mood_tags = get("mood_tags")
+    if mood_tags is None and isinstance(get("product_metadata"), dict):
+        mood_tags = get("product_metadata").get("mood_tags")
+    return [tag.strip().lower() for tag in as_list(mood_tags) if tag.strip()]
+
+def weights_vector(weights: Optional[Dict[str, float]] = None) -> np.ndarray:
+    """Build a weight vector aligned with FEATURES"""
+    merged = {**DEFAULT_WEIGHTS, **(weights or {})}
+    return np.array([merged.get(name, 0.0) for name in FEATURES], dtype=np.float32)
+
+class Vocabulary:
+    """Maps categorical values to dense integer codes"""
+
+    def __init__(self, values: Iterable[Optional[str]]):
+        self.index: Dict[str, int] = {}
+        codes = []
+        for value in values:
+            if value is None or value == "":
+                codes.append(-1)
+                continue
+            code = self.index.setdefault(str(value), len(self.index))
+            codes.append(code)
+        self.codes = np.array(codes, dtype=np.int32)
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def code(self, value: Optional[str]) -> int:
+        if value is None:
+            return -1
+        return self.index.get(str(value), -1)
+
+    def weights(self, weighted_values: Dict[str, float]) -> np.ndarray:
+        """Dense vector over the vocabulary with one trailing slot for unknown codes"""
+        vector = np.zeros(len(self.index) + 1, dtype=np.float32)
+        for value, weight in weighted_values.items():
+            code = self.index.get(value)
+            if code is not None:
+                vector[code] += weight
+        return vector
+
+class ProductMatrix:
+    """Column arrays for the product catalog, built once per catalog version"""
+
+    def __init__(self, products: Sequence[Any]):
+        self.size = len(products)
+        self.ids = np.array([product.id for product in products], dtype=object)
+        self.row_by_id = {product_id: row for row, product_id in enumerate(self.ids)}
+        self.updated_at = np.array([getattr(p, "updated_at", None) for p in products], dtype=object)
+
+        # Stored values as they are (NaN for NULL) for exact range filters
+        self.stored_price = np.array([_float(getattr(p, "price", None), np.nan) for p in products], dtype=np.float64)
+        self.stored_rating = np.array([_float(getattr(p, "rating", None), np.nan) for p in products], dtype=np.float64)
+
+        self.price = np.array([_float(getattr(p, "price", None), 0.0) for p in products], dtype=np.float32)
+        rating = [_float(getattr(p, "product_rating", None), _float(getattr(p, "rating", None), 0.0)) for p in products]
+        self.rating = np.clip(np.array(rating, dtype=np.float32) / 5.0, 0, 1)
+        self.sentiment = np.clip(np.array(
+            [_float(getattr(p, "customer_review_sentiment_score", None), 0.5) for p in products], dtype=np.float32
+        ), 0, 1)
+        self.popularity = np.clip(np.array(
+            [_float(getattr(p, "probability_of_recommendation", None), 0.5) for p in products], dtype=np.float32
+        ), 0, 1)
+        self.in_stock = np.array(
+            [getattr(p, "stock", None) is None or getattr(p, "stock") > 0 for p in products], dtype=bool
+        )
+
+        self.category = Vocabulary(getattr(p, "category", None) for p in products)
+        self.subcategory = Vocabulary(getattr(p, "subcategory", None) for p in products)
+        self.brand = Vocabulary(getattr(p, "brand", None) for p in products)
+        self.season = Vocabulary(getattr(p, "season", None) for p in products)
+        self.holiday = Vocabulary(getattr(p, "holiday", None) for p in products)
+        self.location = Vocabulary(getattr(p, "geographical_location", None) for p in products)
+
+        # Multi-valued mood tags as a sparse (products x tags) indicator matrix
+        self.mood_tag_index: Dict[str, int] = {}
+        tag_rows, tag_cols = [], []
+        for row, product in enumerate(products):
+            for tag in set(product_mood_tags(product)):
+                tag_rows.append(row)
+                tag_cols.append(self.mood_tag_index.setdefault(tag, len(self.mood_tag_index)))
+        self.mood_tags = sparse.csr_matrix(
+            (np.ones(len(tag_rows), dtype=np.float32), (tag_rows, tag_cols)),
+            shape=(self.size, len(self.mood_tag_index))
+        )
+
+        # Product-only features do not depend on the customer
+        self.static_features = np.column_stack([self.rating, self.sentiment, self.popularity]) \
+            if self.size else np.zeros((0, 3), dtype=np.float32)
+
+    def rows_for(self, product_ids: Iterable[Any]) -> np.ndarray:
+        """Row indices for the given product ids, skipping unknown ids"""
+        rows = [self.row_by_id[pid] for pid in product_ids if pid in self.row_by_id]
+        return np.array(rows, dtype=np.int64)
+
+def match_mask(vocabulary: Vocabulary, select: Any, value: Optional[str]) -> np.ndarray:
+    """Boolean mask of selected rows whose code equals ``value``; unknown values match nothing"""
+    codes = vocabulary.codes[select]
+    code = vocabulary.code(value)
+    if code < 0:
+        return np.zeros(codes.shape, dtype=bool)
+    return codes == code
+
+def build_customer_profile(customer: Any, recent_mood: Any = None) -> Dict[str, Any]:
+    """
+    Extract the scoring inputs for a customer.
+
+    Args:
+        customer: Customer ORM object or dict; the persona may be a JSON
+            dict or a persona relationship
+        recent_mood: Latest CustomerMood, mood string or None
+
+    Returns:
+        Dictionary of profile fields used by the scoring engine
+    """
+    get = customer.get if isinstance(customer, dict) else lambda name: getattr(customer, name, None)
+
+    affinity: Dict[str, float] = {}
+    for category in as_list(get("browsing_history")):
+        affinity[category] = affinity.get(category, 0.0) + 1.0
+    for subcategory in as_list(get("purchase_history")):
+        affinity[subcategory] = affinity.get(subcategory, 0.0) + 2.0
+
+    persona = get("persona")
+    if isinstance(persona, dict):
+        preferred = as_list((persona.get("recommendation_preferences") or {}).get("preferred_categories"))
+    else:
+        # Persona relationship (CustomerPersona row); its interests are the preferred categories
+        preferred = as_list(getattr(persona, "interests", None))
+    for category in preferred:
+        affinity[category] = affinity.get(category, 0.0) + 1.0
+
+    mood = getattr(recent_mood, "mood", recent_mood)
+    location = get("location")
+
+    return {
+        "season": get("season"),
+        "holiday": get("holiday"),
+        "location": LOCATION_ALIASES.get(location, location),
+        "segment": get("customer_segment"),
+        "target_price": _float(get("avg_order_value"), 0.0) or None,
+        "category_affinity": affinity,
+        "mood": mood,
+    }
+
+class ScoringEngine:
+    """Scores every product for a customer profile with a few array operations"""
+
+    def __init__(self, matrix: ProductMatrix, weights: Optional[Dict[str, float]] = None, version: str = ""):
+        self.matrix = matrix
+        self.weights = weights_vector(weights)
+        self.version = version
+
+    def feature_matrix(self, profile: Dict[str, Any], rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Build the (products x FEATURES) matrix for a profile.
+
+        Args:
+            profile: Output of build_customer_profile
+            rows: Optional subset of catalog rows to score
+
+        Returns:
+            Feature matrix with values in [0, 1]
+        """
+        m = self.matrix
+        select = slice(None) if rows is None else rows
+
+        price = m.price[select]
+        target_price = profile.get("target_price")
+        if target_price:
+            safe_price = np.maximum(price, 1e-6)
+            price_fit = np.minimum(safe_price / target_price, target_price / safe_price)
+        else:
+            price_fit = np.full(price.shape, 0.5, dtype=np.float32)
+
+        affinity = profile.get("category_affinity") or {}
+        category_weights = m.category.weights(affinity)
+        subcategory_weights = m.subcategory.weights(affinity)
+        category_match = category_weights[m.category.codes[select]] + subcategory_weights[m.subcategory.codes[select]]
+        # A fixed peak keeps scores of row subsets comparable with full-catalog scores
+        peak = profile.get("category_peak") or (category_match.max() if category_match.size else 0)
+        if peak > 0:
+            category_match = category_match / peak
+
+        season_match = match_mask(m.season, select, profile.get("season"))
+        holiday_match = match_mask(m.holiday, select, profile.get("holiday"))
+        location_match = match_mask(m.location, select, profile.get("location"))
+
+        return np.column_stack([
+            m.static_features[select],
+            price_fit,
+            category_match,
+            season_match,
+            holiday_match,
+            location_match,
+        ]).astype(np.float32)
+
+    def score(
+        self,
+        profile: Dict[str, Any],
+        rows: Optional[np.ndarray] = None,
+        weights: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """Score catalog rows; with normalized weights the scores lie in [0, 1]"""
+        weights = self.weights if weights is None else weights
+        total = weights.sum()
+        features = self.feature_matrix(profile, rows)
+        scores = features @ weights
+        return scores / total if total > 0 else scores
+
+    def top_k(
+        self,
+        profile: Dict[str, Any],
+        k: int,
+        rows: Optional[np.ndarray] = None,
+        weights: Optional[np.ndarray] = None
+    ) -> List[Tuple[int, float]]:
+        """
+        Select the k best rows.
+
+        Returns:
+            List of (catalog row, score) sorted by descending score
+        """
+        scores = self.score(profile, rows, weights)
+        if scores.size == 0 or k <= 0:
+            return []
+        k = min(k, scores.size)
+        best = np.argpartition(-scores, k - 1)[:k]
+        best = best[np.argsort(-scores[best])]
+        catalog_rows = best if rows is None else np.asarray(rows)[best]
+        return [(int(row), float(scores[i])) for row, i in zip(catalog_rows, best)]
+
+def load_scored_products(
+    db: Session,
+    product_model: Any,
+    engine: ScoringEngine,
+    top: List[Tuple[int, float]]
+) -> List[Tuple[Any, float]]:
+    """Fetch the ORM objects for (row, score) pairs in one query, keeping their order"""
+    product_ids = [engine.matrix.ids[row] for row, _ in top]
+    products = {
+        product.id: product
+        for product in db.query(product_model).filter(product_model.id.in_(product_ids)).all()
+    }
+    return [
+        (products[product_id], score)
+        for product_id, (_, score) in zip(product_ids, top)
+        if product_id in products
+    ]
+
+def catalog_fingerprint(db: Session, product_model: Any) -> str:
+    """Cheap version string that changes whenever products are added, removed or updated"""
+    count, last_update = db.query(func.count(product_model.id), func.max(product_model.updated_at)).one()
+    return f"{count}:{last_update}"
+
+_engines: Dict[Any, ScoringEngine] = {}
+_engines_lock = threading.Lock()
+
+def get_scoring_engine(db: Session, product_model: Any) -> ScoringEngine:
+    """
+    Get the scoring engine for the current catalog, rebuilding it only when
+    the catalog fingerprint changes.
+
+    Args:
+        db: SQLAlchemy session
+        product_model: Product ORM class to load
+
+    Returns:
+        ScoringEngine for the current catalog version
+    """
+    version = catalog_fingerprint(db, product_model)
+    engine = _engines.get(product_model)
+    if engine is not None and engine.version == version:
+        return engine
+
+    with _engines_lock:
+        engine = _engines.get(product_model)
+        if engine is None or engine.version != version:
+            products = db.query(product_model).all()
+            engine = ScoringEngine(ProductMatrix(products), version=version)
+            _engines[product_model] = engine
+            logger.info(f"Built scoring engine for {len(products)} products (catalog {version})")
+    return engine
@@ -0,0 +1,227 @@
+"""
+Precomputed product rankings per shopping context.
+
+A context is a (season, holiday, location, customer segment) combination;
+every axis has a leading wildcard slot used for unknown values. The full
+(contexts x products) score table is kept in memory so that when the catalog
+changes only new or edited products are rescored before the per-context top
+lists are re-selected.
+"""
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from sqlalchemy.orm import Session
+from ..config import settings
+from ..models import Customer
+from ..utils.logger import setup_logger
+from .scoring_engine import FEATURES, ProductMatrix, ScoringEngine, build_customer_profile, match_mask
+
+logger = setup_logger(__name__)
+
+AXES = ("segment", "season", "holiday", "location")
+
+def load_segment_profiles(db: Session) -> Dict[str, Dict[str, Any]]:
+    """
+    Aggregate customer histories into one scoring profile per segment.
+
+    Returns:
+        Segment name -> {"category_affinity", "target_price"}
+    """
+    grouped: Dict[str, Dict[str, Any]] = {}
+    rows = db.query(
+        Customer.customer_segment,
+        Customer.browsing_history,
+        Customer.purchase_history,
+        Customer.avg_order_value
+    ).filter(Customer.customer_segment.isnot(None))
+    for segment, browsing, purchases, order_value in rows:
+        profile = build_customer_profile({
+            "browsing_history": browsing,
+            "purchase_history": purchases,
+            "avg_order_value": order_value
+        })
+        entry = grouped.setdefault(segment, {"affinity": {}, "prices": [], "customers": 0})
+        entry["customers"] += 1
+        for value, weight in profile["category_affinity"].items():
+            entry["affinity"][value] = entry["affinity"].get(value, 0.0) + weight
+        if profile["target_price"]:
+            entry["prices"].append(profile["target_price"])
+
+    return {
+        segment: {
+            "category_affinity": {
+                value: weight / entry["customers"] for value, weight in entry["affinity"].items()
+            },
+            "target_price": float(np.median(entry["prices"])) if entry["prices"] else None
+        }
+        for segment, entry in grouped.items()
+    }
+
+class SegmentRankings:
+    """Top product lists for every context, kept in sync with the scoring engine"""
+
+    def __init__(self, size: Optional[int] = None):
+        self.size = size or settings.SEGMENT_RANKING_SIZE
+        self.segment_profiles: Dict[str, Dict[str, Any]] = {}
+        self.version: Optional[str] = None
+        self.matrix: Optional[ProductMatrix] = None
+        self.axes: Dict[str, List[Optional[str]]] = {}
+        self.positions: Dict[str, Dict[Optional[str], int]] = {}
+        self.category_peaks: Dict[Optional[str], float] = {}
+        self.table: Optional[np.ndarray] = None
+        self.top_rows: Optional[np.ndarray] = None
+        self.top_scores: Optional[np.ndarray] = None
+        self._lock = threading.Lock()
+        self.full_builds = 0
+        self.incremental_syncs = 0
+        self.rows_rescored = 0
+
+    def load_segments(self, db: Session) -> bool:
+        """Refresh the segment profiles; the next sync rebuilds the whole table"""
+        profiles = load_segment_profiles(db)
+        with self._lock:
+            self.segment_profiles = profiles
+            self.version = None
+            self.table = None
+        logger.info(f"Loaded {len(profiles)} customer segment profiles")
+        return bool(profiles)
+
+    def _axes(self, matrix: ProductMatrix) -> Dict[str, List[Optional[str]]]:
+        return {
+            "segment": [None] + sorted(self.segment_profiles),
+            "season": [None] + list(matrix.season.index),
+            "holiday": [None] + list(matrix.holiday.index),
+            "location": [None] + list(matrix.location.index),
+        }
+
+    def _segment_profile(self, segment: Optional[str]) -> Dict[str, Any]:
+        return {**self.segment_profiles.get(segment, {}), "category_peak": self.category_peaks.get(segment)}
+
+    def _score_rows(self, engine: ScoringEngine, rows: np.ndarray) -> np.ndarray:
+        """Scores of the given catalog rows in every context, shaped (*axes, rows)"""
+        m = engine.matrix
+        weights = engine.weights
+        total = weights.sum() or 1.0
+        weight = dict(zip(FEATURES, weights))
+
+        # Context-free part per segment; the match columns are zero without season/holiday/location
+        base = np.stack([
+            engine.feature_matrix(self._segment_profile(segment), rows) @ weights
+            for segment in self.axes["segment"]
+        ])
+
+        def bonus(vocabulary, values, feature):
+            return np.stack([match_mask(vocabulary, rows, value) for value in values]) * weight[feature]
+
+        season = bonus(m.season, self.axes["season"], "season_match")
+        holiday = bonus(m.holiday, self.axes["holiday"], "holiday_match")
+        location = bonus(m.location, self.axes["location"], "location_match")
+        table = base[:, None, None, None, :] \
+            + season[None, :, None, None, :] \
+            + holiday[None, None, :, None, :] \
+            + location[None, None, None, :, :]
+        return (table / total).astype(np.float32)
+
+    def _rebuild(self, engine: ScoringEngine, axes: Dict[str, List[Optional[str]]]) -> np.ndarray:
+        m = engine.matrix
+        self.axes = axes
+        self.positions = {axis: {value: i for i, value in enumerate(values)} for axis, values in axes.items()}
+        self.category_peaks = {}
+        for segment in axes["segment"]:
+            affinity = self.segment_profiles.get(segment, {}).get("category_affinity") or {}
+            peak = m.category.weights(affinity)[m.category.codes] + m.subcategory.weights(affinity)[m.subcategory.codes]
+            self.category_peaks[segment] = float(peak.max()) if peak.size else 0.0
+        self.full_builds += 1
+        return self._score_rows(engine, np.arange(m.size))
+
+    def _update(self, engine: ScoringEngine) -> np.ndarray:
+        """Copy the scores of unchanged products and rescore the rest"""
+        m, old = engine.matrix, self.matrix
+        old_rows = np.array([old.row_by_id.get(product_id, -1) for product_id in m.ids], dtype=np.int64)
+        known = np.flatnonzero(old_rows >= 0)
+        unchanged = known[(old.updated_at[old_rows[known]] == m.updated_at[known]).astype(bool)]
+        changed = np.setdiff1d(np.arange(m.size), unchanged)
+
+        table = np.empty(self.table.shape[:-1] + (m.size,), dtype=np.float32)
+        table[..., unchanged] = self.table[..., old_rows[unchanged]]
+        if changed.size:
+            table[..., changed] = self._score_rows(engine, changed)
+        self.incremental_syncs += 1
+        self.rows_rescored += int(changed.size)
+        return table
+
+    def _select_top(self, table: np.ndarray, in_stock: np.ndarray):
+        scores = np.where(in_stock, table.reshape(-1, table.shape[-1]), -np.inf)
+        k = min(self.size, scores.shape[1])
+        if k == 0:
+            self.top_rows = np.zeros((scores.shape[0], 0), dtype=np.int64)
+            self.top_scores = np.zeros((scores.shape[0], 0), dtype=np.float32)
+            return
+        best = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        best_scores = np.take_along_axis(scores, best, axis=1)
+        order = np.argsort(-best_scores, axis=1, kind="stable")
+        self.top_rows = np.take_along_axis(best, order, axis=1)
+        self.top_scores = np.take_along_axis(best_scores, order, axis=1)
+
+    def sync(self, engine: ScoringEngine):
+        """Bring the table up to the engine's catalog version"""
+        if self.version == engine.version and self.table is not None:
+            return
+        with self._lock:
+            if self.version == engine.version and self.table is not None:
+                return
+            axes = self._axes(engine.matrix)
+            if self.table is None or axes != self.axes:
+                table = self._rebuild(engine, axes)
+            else:
+                table = self._update(engine)
+            self._select_top(table, engine.matrix.in_stock)
+            self.table = table
+            self.matrix = engine.matrix
+            self.version = engine.version
+
+    def ranked(
+        self,
+        engine: ScoringEngine,
+        season: Optional[str] = None,
+        holiday: Optional[str] = None,
+        location: Optional[str] = None,
+        segment: Optional[str] = None,
+        limit: int = 10
+    ) -> List[Tuple[int, float]]:
+        """
+        Precomputed ranking for a context; unknown values fall back to the wildcard slot.
+
+        Returns:
+            (catalog row, score) pairs sorted by descending score
+        """
+        self.sync(engine)
+        context = {"segment": segment, "season": season, "holiday": holiday, "location": location}
+        index = tuple(self.positions[axis].get(context[axis], 0) for axis in AXES)
+        flat = np.ravel_multi_index(index, self.table.shape[:-1])
+        rows, scores = self.top_rows[flat, :limit], self.top_scores[flat, :limit]
+        return [(int(row), float(score)) for row, score in zip(rows, scores) if np.isfinite(score)]
+
+    def for_profile(self, engine: ScoringEngine, profile: Dict[str, Any], limit: int) -> List[Tuple[int, float]]:
+        """Ranking for the context of a customer profile (see build_customer_profile)"""
+        return self.ranked(
+            engine,
+            season=profile.get("season"),
+            holiday=profile.get("holiday"),
+            location=profile.get("location"),
+            segment=profile.get("segment"),
+            limit=limit
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "contexts": int(self.top_rows.shape[0]) if self.top_rows is not None else 0,
+            "segments": len(self.segment_profiles),
+            "catalog_version": self.version,
+            "full_builds": self.full_builds,
+            "incremental_syncs": self.incremental_syncs,
+            "rows_rescored": self.rows_rescored
+        }
+
+# Create a singleton instance
+segment_rankings = SegmentRankings()
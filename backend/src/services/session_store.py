@@ -0,0 +1,163 @@
+"""
+In-memory shopping sessions for "continue shopping" recommendations.
+
+Each active customer keeps the last few products they viewed or added to the
+cart. Recommendations are the item-to-item neighbours of those products,
+weighted by event and recency, so the read path never touches the database
+or the LLM. Sessions idle for too long, or beyond the capacity, are evicted
+least recently used first.
+"""
+import threading
+import time
+from collections import OrderedDict, deque
+from datetime import datetime, timedelta
+from typing import Any, Deque, Dict, List, Optional, Tuple
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+from ..config import settings
+from ..utils.logger import setup_logger
+from .basket_rules import bought_together_service
+from .item_similarity import item_similarity_service
+
+logger = setup_logger(__name__)
+
+# Session event -> weight of its product's neighbours
+SESSION_EVENT_WEIGHTS = {
+    "view": 1.0,
+    "cart_add": 2.0,
+}
+
+class ShoppingSession:
+    """The latest (product id, event) pairs of one customer, newest last"""
+
+    def __init__(self, history: int):
+        self.events: Deque[Tuple[Any, str]] = deque(maxlen=history)
+        self.last_seen = 0.0
+
+class SessionStore:
+    """Bounded LRU of shopping sessions with neighbour-based recommendations"""
+
+    def __init__(
+        self,
+        history: Optional[int] = None,
+        max_sessions: Optional[int] = None,
+        idle_seconds: Optional[int] = None
+    ):
+        self.history = history or settings.SESSION_HISTORY
+        self.max_sessions = max_sessions or settings.SESSION_MAX_SESSIONS
+        self.idle_seconds = idle_seconds or settings.SESSION_IDLE_SECONDS
+        self.sessions: "OrderedDict[Any, ShoppingSession]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.evicted = 0
+        self.reads = 0
+
+    def _evict(self, now: float):
+        """Drop sessions over capacity and sessions idle past the timeout, oldest first"""
+        while self.sessions:
+            customer_id, session = next(iter(self.sessions.items()))
+            if len(self.sessions) <= self.max_sessions and now - session.last_seen < self.idle_seconds:
+                break
+            del self.sessions[customer_id]
+            self.evicted += 1
+
+    def record(self, customer_id: Any, product_id: Any, event: str, now: Optional[float] = None):
+        """
+        Append a product to a customer's session.
+
+        Args:
+            customer_id: Customer database id
+            product_id: Product database id
+            event: One of SESSION_EVENT_WEIGHTS; other events are ignored
+            now: Event time (defaults to the current time)
+        """
+        if event not in SESSION_EVENT_WEIGHTS:
+            return
+        now = time.time() if now is None else now
+        with self._lock:
+            session = self.sessions.get(customer_id)
+            if session is None:
+                session = self.sessions[customer_id] = ShoppingSession(self.history)
+            else:
+                self.sessions.move_to_end(customer_id)
+            session.events.append((product_id, event))
+            session.last_seen = now
+            self._evict(now)
+
+    def recent(self, customer_id: Any, now: Optional[float] = None) -> List[Tuple[Any, str]]:
+        """A customer's (product id, event) pairs, newest first; empty once the session went idle"""
+        now = time.time() if now is None else now
+        with self._lock:
+            self._evict(now)
+            session = self.sessions.get(customer_id)
+            return list(reversed(session.events)) if session else []
+
+    def warm(self, db: Session) -> int:
+        """
+        Rebuild recent sessions from the recorded CustomerBehavior views after a restart.
+
+        Returns:
+            Number of views replayed
+        """
+        from ..database.models import CustomerBehavior
+
+        since = datetime.utcnow() - timedelta(seconds=self.idle_seconds)
+        try:
+            rows = db.query(CustomerBehavior.customer_id, CustomerBehavior.product_id, CustomerBehavior.created_at)\
+                .filter(CustomerBehavior.created_at >= since)\
+                .order_by(CustomerBehavior.created_at)\
+                .all()
+        except SQLAlchemyError as e:
+            db.rollback()
+            logger.warning(f"Customer behaviors unavailable; sessions start empty: {e}")
+            return 0
+
+        offset = time.time() - datetime.utcnow().timestamp()
+        for customer_id, product_id, created_at in rows:
+            self.record(customer_id, product_id, "view", now=created_at.timestamp() + offset)
+        logger.info(f"Replayed {len(rows)} recent product views into {len(self.sessions)} sessions")
+        return len(rows)
+
+    @staticmethod
+    def _neighbours(product_id: Any, k: int) -> List[Tuple[Any, float]]:
+        similar = item_similarity_service.similar(product_id, k)
+        if similar or item_similarity_service.index is not None:
+            return similar
+        # No similarity index built; fall back to the bought-together rules
+        rules = bought_together_service.rules
+        if rules is None:
+            return []
+        return [(other, confidence) for other, confidence, _ in rules.products.related(product_id, k)]
+
+    def continue_shopping(self, customer_id: Any, limit: int = 10, now: Optional[float] = None) -> List[Tuple[Any, float]]:
+        """
+        Products related to what the customer is browsing right now.
+
+        Neighbours of every session product are summed, weighted by the event
+        type and decayed by SESSION_RECENCY_DECAY per older event. Products
+        already in the session are left out.
+
+        Returns:
+            (product id, score) pairs sorted by descending score
+        """
+        events = self.recent(customer_id, now)
+        self.reads += 1
+        if not events or limit <= 0:
+            return []
+
+        seen = {product_id for product_id, _ in events}
+        scores: Dict[Any, float] = {}
+        decay = 1.0
+        for product_id, event in events:
+            weight = SESSION_EVENT_WEIGHTS[event] * decay
+            for neighbour, similarity in self._neighbours(product_id, settings.SESSION_NEIGHBOURS):
+                if neighbour not in seen:
+                    scores[neighbour] = scores.get(neighbour, 0.0) + weight * similarity
+            decay *= settings.SESSION_RECENCY_DECAY
+
+        return sorted(scores.items(), key=lambda entry: entry[1], reverse=True)[:limit]
+
+    def stats(self) -> Dict[str, Any]:
+        return {"sessions": len(self.sessions), "evicted": self.evicted, "reads": self.reads}
+
+# Create a singleton instance
+session_store = SessionStore()
@@ -0,0 +1,59 @@
+"""
+Single-flight coalescing of identical concurrent calls.
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+class SingleFlight:
+    """
+    Collapses concurrent calls that share a key into one execution.
+
+    The first caller for a key starts the work; callers arriving while it is
+    still running await the same future instead of starting their own.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self.executed = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run ``fn`` unless a call with the same key is already in flight.
+
+        Args:
+            key: Identity of the call
+            fn: Coroutine factory doing the actual work
+
+        Returns:
+            Result of the shared execution
+        """
+        future = self._inflight.get(key)
+        if future is not None:
+            self.coalesced += 1
+            return await asyncio.shield(future)
+
+        future = asyncio.ensure_future(fn())
+        self._inflight[key] = future
+        self.executed += 1
+
+        def _forget(done: asyncio.Future):
+            if self._inflight.get(key) is done:
+                del self._inflight[key]
+
+        future.add_done_callback(_forget)
+        # Shielded so a cancelled caller does not cancel the work for the others
+        return await asyncio.shield(future)
+
+    @property
+    def inflight(self) -> int:
+        """Number of keys currently being executed"""
+        return len(self._inflight)
+
+    def stats(self) -> Dict[str, int]:
+        """Return coalescing counters"""
+        return {
+            "executed": self.executed,
+            "coalesced": self.coalesced,
+            "inflight": self.inflight
+        }
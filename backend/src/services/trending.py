@@ -0,0 +1,216 @@
+"""
+In-process trending-products engine.
+
+Product views, cart adds and order items are counted in a sliding window of
+time buckets. Counts live in count-min sketches, so memory does not grow with
+the catalog. A bounded heavy-hitters list per scope (global, category,
+location, category + location) holds the current leaders, so a trending
+query only reads k entries.
+"""
+import heapq
+import threading
+import time
+import zlib
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from ..config import settings
+from ..utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Interaction type -> weight of one unit
+EVENT_WEIGHTS = {
+    "view": 1.0,
+    "cart_add": 3.0,
+    "purchase": 5.0,
+}
+
+ANY = "*"
+
+class CountMinSketch:
+    """Approximate counter; estimates never undercount"""
+
+    def __init__(self, width: int, depth: int):
+        self.width = width
+        self.depth = depth
+        self.table = np.zeros((depth, width), dtype=np.float32)
+
+    def columns(self, key: str) -> np.ndarray:
+        data = key.encode("utf-8")
+        return np.array([zlib.crc32(data, seed) % self.width for seed in range(1, self.depth + 1)])
+
+    def add(self, columns: np.ndarray, count: float):
+        self.table[np.arange(self.depth), columns] += count
+
+    def estimate(self, columns: np.ndarray) -> float:
+        return float(self.table[np.arange(self.depth), columns].min())
+
+class SlidingWindowSketch:
+    """
+    Count-min sketch over the last ``buckets`` time buckets.
+
+    Each bucket has its own table; a running sum of the live tables answers
+    estimates, and an expiring bucket is subtracted from it before reuse.
+    """
+
+    def __init__(self, bucket_seconds: int, buckets: int, width: int, depth: int):
+        self.bucket_seconds = bucket_seconds
+        self.buckets = [CountMinSketch(width, depth) for _ in range(buckets)]
+        self.window = CountMinSketch(width, depth)
+        self.current = None
+
+    def advance(self, now: float) -> bool:
+        """
+        Move to the bucket of ``now``, expiring the buckets that left the window.
+
+        Returns:
+            True when at least one bucket expired
+        """
+        slot = int(now // self.bucket_seconds)
+        if self.current is None:
+            self.current = slot
+            return False
+        if slot <= self.current:
+            return False
+        for expired in range(self.current + 1, min(slot, self.current + len(self.buckets)) + 1):
+            bucket = self.buckets[expired % len(self.buckets)]
+            self.window.table -= bucket.table
+            bucket.table.fill(0)
+        np.maximum(self.window.table, 0, out=self.window.table)
+        self.current = slot
+        return True
+
+    def add(self, key: str, count: float) -> float:
+        """Count an event in the current bucket and return the key's windowed estimate"""
+        columns = self.window.columns(key)
+        self.buckets[self.current % len(self.buckets)].add(columns, count)
+        self.window.add(columns, count)
+        return self.window.estimate(columns)
+
+    def estimate(self, key: str) -> float:
+        return self.window.estimate(self.window.columns(key))
+
+class HeavyHitters:
+    """The ``capacity`` products with the highest windowed estimates in one scope"""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.counts: Dict[Any, float] = {}
+
+    def offer(self, item: Any, estimate: float):
+        self.counts[item] = estimate
+        if len(self.counts) > self.capacity:
+            weakest = min(self.counts, key=self.counts.get)
+            del self.counts[weakest]
+
+    def top(self, k: int) -> List[Tuple[Any, float]]:
+        return heapq.nlargest(k, self.counts.items(), key=lambda entry: entry[1])
+
+class TrendingEngine:
+    """Windowed interaction counts with per-category and per-location leaders"""
+
+    def __init__(
+        self,
+        bucket_seconds: Optional[int] = None,
+        buckets: Optional[int] = None,
+        width: Optional[int] = None,
+        depth: Optional[int] = None,
+        capacity: Optional[int] = None
+    ):
+        self.sketch = SlidingWindowSketch(
+            bucket_seconds or settings.TRENDING_BUCKET_SECONDS,
+            buckets or settings.TRENDING_BUCKETS,
+            width or settings.TRENDING_SKETCH_WIDTH,
+            depth or settings.TRENDING_SKETCH_DEPTH
+        )
+        self.capacity = capacity or settings.TRENDING_CANDIDATES
+        self.scopes: Dict[Tuple[str, str], HeavyHitters] = {}
+        self._lock = threading.Lock()
+        self.events = 0
+
+    @staticmethod
+    def _key(location: str, product_id: Any) -> str:
+        return f"{location}|{product_id}"
+
+    def _refresh(self):
+        """Re-estimate every leader after buckets expired, dropping products that went quiet"""
+        for (_, location), leaders in self.scopes.items():
+            for product_id in list(leaders.counts):
+                estimate = self.sketch.estimate(self._key(location, product_id))
+                if estimate > 0:
+                    leaders.counts[product_id] = estimate
+                else:
+                    del leaders.counts[product_id]
+
+    def record(
+        self,
+        product_id: Any,
+        category: Optional[str],
+        event: str,
+        quantity: int = 1,
+        location: Optional[str] = None,
+        now: Optional[float] = None
+    ):
+        """
+        Count one interaction.
+
+        Args:
+            product_id: Product database id
+            category: Product category
+            event: One of EVENT_WEIGHTS
+            quantity: Units (cart and order quantities)
+            location: Location of the customer, if known
+            now: Event time (defaults to the current time)
+        """
+        weight = EVENT_WEIGHTS.get(event)
+        if weight is None:
+            logger.warning(f"Ignoring unknown trending event {event!r}")
+            return
+        count = weight * max(quantity, 1)
+        category = category or ANY
+        with self._lock:
+            if self.sketch.advance(time.time() if now is None else now):
+                self._refresh()
+            overall = self.sketch.add(self._key(ANY, product_id), count)
+            for scope in ((ANY, ANY), (category, ANY)):
+                self._leaders(scope).offer(product_id, overall)
+            if location:
+                local = self.sketch.add(self._key(location, product_id), count)
+                for scope in ((ANY, location), (category, location)):
+                    self._leaders(scope).offer(product_id, local)
+            self.events += 1
+
+    def _leaders(self, scope: Tuple[str, str]) -> HeavyHitters:
+        leaders = self.scopes.get(scope)
+        if leaders is None:
+            leaders = self.scopes[scope] = HeavyHitters(self.capacity)
+        return leaders
+
+    def trending(
+        self,
+        category: Optional[str] = None,
+        location: Optional[str] = None,
+        limit: int = 10,
+        now: Optional[float] = None
+    ) -> List[Tuple[Any, float]]:
+        """
+        Products trending in a scope.
+
+        Returns:
+            (product id, windowed score) pairs, hottest first
+        """
+        with self._lock:
+            if self.sketch.advance(time.time() if now is None else now):
+                self._refresh()
+            leaders = self.scopes.get((category or ANY, location or ANY))
+            return leaders.top(limit) if leaders else []
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "events": self.events,
+            "scopes": len(self.scopes),
+            "window_seconds": self.sketch.bucket_seconds * len(self.sketch.buckets)
+        }
+
+# Create a singleton instance
+trending_engine = TrendingEngine()
@@ -7,19 +7,12 @@ from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
 
-from src.main import app
-from src.database.base import Base
-from src.database.session import get_db
+from src.database import get_db
+from src.models import Base
 from src.config import settings
 
-# Create in-memory SQLite database for testing
+# In-memory SQLite database for testing; StaticPool keeps it on one connection across threads
 SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL,
-    connect_args={"check_same_thread": False},
-    poolclass=StaticPool,
-)
-TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 @pytest.fixture(scope="session")
 def event_loop() -> Generator:
@@ -28,12 +21,19 @@ def event_loop() -> Generator:
     yield loop
     loop.close()
 
-@pytest.fixture(scope="session")
+@pytest.fixture(scope="function")
 def db() -> Generator:
-    """Create a fresh database for each test session."""
+    """Create a fresh database with the src.models tables for each test function."""
+    engine = create_engine(
+        SQLALCHEMY_DATABASE_URL,
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
     Base.metadata.create_all(bind=engine)
-    yield TestingSessionLocal()
-    Base.metadata.drop_all(bind=engine)
+    session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
 
 @pytest.fixture(scope="function")
 def db_session(db) -> Generator:
@@ -50,6 +50,9 @@ def db_session(db) -> Generator:
 @pytest.fixture(scope="function")
 def client(db_session) -> Generator:
     """Create a test client that uses the test database."""
+    # Imported here so that unit tests do not need every dependency of the full app
+    from src.main import app
+    
     def override_get_db():
         try:
             yield db_session
@@ -64,6 +67,8 @@ def client(db_session) -> Generator:
 @pytest.fixture(scope="function")
 async def async_client(db_session) -> AsyncGenerator:
     """Create an async test client that uses the test database."""
+    from src.main import app
+    
     def override_get_db():
         try:
             yield db_session
@@ -1,3 +1,4 @@
+import asyncio
 import pytest
 from unittest.mock import AsyncMock, patch
 from typing import Dict, Any
@@ -278,7 +279,7 @@ class TestRecommendationAgent(unittest.TestCase):
     def setUp(self):
         self.agent = RecommendationAgent("test_api_key")
         
-    def test_calculate_match_score(self):
+    def test_calculate_match_scores(self):
         # Test data
         customer = Mock(spec=Customer)
         product = Mock(spec=Product)
@@ -286,15 +287,15 @@ class TestRecommendationAgent(unittest.TestCase):
         
         # Mock Gemini response
         with patch.object(self.agent.model, 'generate_content') as mock_generate:
-            mock_generate.return_value = Mock(text='0.8')
+            mock_generate.return_value = Mock(text='[0.8]')
             
             # Test
-            score = self.agent._calculate_match_score(customer, product, recent_mood)
+            scores = asyncio.run(self.agent._calculate_match_scores(customer, [product], recent_mood))
             
             # Assertions
-            self.assertIsInstance(score, float)
-            self.assertGreaterEqual(score, 0)
-            self.assertLessEqual(score, 1)
+            self.assertEqual(len(scores), 1)
+            self.assertGreaterEqual(scores[0], 0)
+            self.assertLessEqual(scores[0], 1)
             mock_generate.assert_called_once()
             
     def test_generate_explanation(self):
@@ -0,0 +1,65 @@
+from types import SimpleNamespace
+import pytest
+from src.services.basket_rules import AssociationRules, BasketRules, BoughtTogetherService
+from src.services.scoring_engine import ProductMatrix, ScoringEngine
+
+def product(pid, subcategory, stock=5, popularity=0.5):
+    return SimpleNamespace(
+        id=pid, category="Fashion", subcategory=subcategory, price=50.0, stock=stock,
+        probability_of_recommendation=popularity
+    )
+
+PRODUCTS = [
+    product(1, "Jeans"),
+    product(2, "Shoes"),
+    product(3, "T-shirt"),
+    product(4, "Lipstick"),
+    product(5, "Shoes", popularity=0.9),
+    product(6, "Shoes", stock=0),
+]
+
+ORDERS = [[1, 2], [1, 2], [1, 2, 3], [3, 4], [3, 4], [1, 3]]
+
+def test_pairwise_support_confidence_and_lift():
+    rules = AssociationRules.mine(ORDERS, k=10, min_support=2, min_lift=0.0)
+
+    (consequent, confidence, lift), = [rule for rule in rules.related(2) if rule[0] == 1]
+    assert consequent == 1
+    assert confidence == pytest.approx(1.0)  # every order with 2 also has 1
+    assert lift == pytest.approx(1.0 * 6 / 4)
+    assert [rule[0] for rule in rules.related(1)] == [2, 3]
+    # (1, 4) never co-occur and (2, 3) only once
+    assert 4 not in [rule[0] for rule in rules.related(1)]
+    assert 3 not in [rule[0] for rule in rules.related(2)]
+    assert rules.related(99) == []
+
+def test_rules_are_filtered_by_lift_and_truncated():
+    rules = AssociationRules.mine(ORDERS, k=1, min_support=2, min_lift=1.0)
+
+    assert len(rules.related(1, limit=10)) == 1
+    # 1 -> 3 has lift 2/4 * 6/4 = 0.75 and is dropped
+    assert all(lift > 1.0 for item in (1, 2, 3, 4) for _, _, lift in rules.related(item))
+
+def test_cart_combines_product_and_subcategory_rules(tmp_path):
+    engine = ScoringEngine(ProductMatrix(PRODUCTS), version="v1")
+    histories = [["Jeans", "Shoes"], ["Jeans", "Shoes"], ["Jeans", "Shoes", "Lipstick"], ["Lipstick"]]
+    path = str(tmp_path / "rules.npz")
+    BasketRules.mine(engine.matrix, ORDERS, histories, min_support=2, min_lift=1.0).save(path)
+
+    service = BoughtTogetherService(path)
+    assert service.load()
+    together = [pid for pid, _ in service.for_basket(engine, [1], limit=5)]
+    cart = [pid for pid, _ in service.for_basket(engine, [1, 2], limit=5)]
+
+    assert together[0] == 2  # product rule first
+    assert 5 in together  # filled from Jeans -> Shoes
+    assert 6 not in together  # out of stock
+    assert 1 not in cart and 2 not in cart
+    assert service.stats()["order_baskets"] == len(ORDERS)
+
+def test_unloaded_service_returns_nothing(tmp_path):
+    service = BoughtTogetherService(str(tmp_path / "missing.npz"))
+    engine = ScoringEngine(ProductMatrix(PRODUCTS), version="v1")
+
+    assert not service.load()
+    assert service.bought_together(engine, 1) == []
@@ -0,0 +1,47 @@
+from types import SimpleNamespace
+import numpy as np
+import pytest
+from src.services.bitmap_index import BitmapIndex
+from src.services.scoring_engine import ProductMatrix
+
+def product(pid, category, subcategory, brand, season, stock=5, price=None, rating=None):
+    return SimpleNamespace(
+        id=pid, category=category, subcategory=subcategory, brand=brand, season=season,
+        holiday="No", geographical_location="India", stock=stock, price=price, rating=rating
+    )
+
+@pytest.fixture
+def index():
+    return BitmapIndex(ProductMatrix([
+        product(1, "Books", "Fiction", "Penguin", "Winter", price=10.0, rating=3.2),
+        product(2, "Books", "Comics", "Marvel", "Summer", stock=0, price=15.0, rating=4.5),
+        product(3, "Fashion", "Jeans", "Levi's", "Winter", price=40.0),
+        product(4, "Fitness", "Yoga Mat", None, "Spring"),
+    ]))
+
+def ids(index, mask):
+    return index.matrix.ids[np.flatnonzero(mask)].tolist()
+
+def test_and_across_attributes_or_within(index):
+    assert ids(index, index.select(category=["Books", "Fashion"], season="Winter")) == [1, 3]
+    assert ids(index, index.select(category="Books", in_stock=False)) == [2]
+    assert ids(index, index.select(brand=None, subcategory=[])) == [1, 2, 3, 4]
+
+def test_bitmaps_compose_with_bitwise_ops(index):
+    mask = (index.bitmap("season", "Winter") | index.bitmap("category", "Fitness")) & ~index.bitmap("brand", "Levi's")
+
+    assert ids(index, mask) == [1, 4]
+    assert index.values("category") == {"Books": 2, "Fashion": 1, "Fitness": 1}
+
+def test_unknown_values_and_attributes(index):
+    assert not index.select(category="Garden").any()
+    assert not index.any_of("brand", [None]).any()
+    with pytest.raises(ValueError):
+        index.select(colour="Red")
+
+def test_ranges_compare_stored_values_and_skip_nulls(index):
+    assert ids(index, index.between("price", high=15)) == [1, 2]
+    assert ids(index, index.between("rating", 3.2)) == [1, 2]
+    assert ids(index, index.between("price", 12, 50) & index.select(season="Winter")) == [3]
+    with pytest.raises(ValueError):
+        index.between("weight", 1)
@@ -0,0 +1,58 @@
+from types import SimpleNamespace
+import pytest
+from src.services.candidate_retrieval import CandidateRetriever
+from src.services.scoring_engine import ProductMatrix
+
+def make_product(id, category, subcategory, stock=10, popularity=0.5, season="Winter"):
+    return SimpleNamespace(
+        id=id,
+        price=100.0,
+        product_rating=4.0,
+        customer_review_sentiment_score=0.5,
+        probability_of_recommendation=popularity,
+        stock=stock,
+        category=category,
+        subcategory=subcategory,
+        season=season,
+        holiday="No",
+        geographical_location="India",
+    )
+
+@pytest.fixture
+def retriever():
+    products = [
+        make_product(1, "Books", "Biography", season="Summer"),
+        make_product(2, "Books", "Fiction"),
+        make_product(3, "Books", "Comics", stock=0),
+        make_product(4, "Fashion", "Jeans", popularity=0.9),
+        make_product(5, "Electronics", "Laptop", popularity=0.1),
+    ]
+    return CandidateRetriever(ProductMatrix(products))
+
+def ids(retriever, rows):
+    return sorted(retriever.matrix.ids[row] for row in rows)
+
+def test_retrieves_in_stock_products_from_affinity_categories(retriever):
+    rows = retriever.retrieve({"category_affinity": {"Books": 1.0}}, limit=2)
+
+    assert ids(retriever, rows) == [1, 2]
+
+def test_subcategory_affinity_is_indexed(retriever):
+    rows = retriever.retrieve({"category_affinity": {"Jeans": 2.0}}, limit=1)
+
+    assert ids(retriever, rows) == [4]
+
+def test_pool_is_capped_by_season_fit(retriever):
+    profile = {"category_affinity": {"Books": 1.0}, "season": "Winter"}
+
+    rows = retriever.retrieve(profile, limit=1)
+
+    assert ids(retriever, rows) == [2]
+
+def test_thin_history_is_filled_with_popular_products(retriever):
+    rows = retriever.retrieve({"category_affinity": {}}, limit=2)
+
+    assert list(retriever.matrix.ids[rows]) == [4, 1]
+
+def test_zero_limit_returns_nothing(retriever):
+    assert retriever.retrieve({"category_affinity": {"Books": 1.0}}, limit=0).size == 0
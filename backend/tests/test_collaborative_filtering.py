@@ -0,0 +1,79 @@
+from types import SimpleNamespace
+import numpy as np
+import pytest
+from src.services.collaborative_filtering import (
+    CollaborativeFilteringModel,
+    CollaborativeFilteringService,
+    load_csv_interactions,
+)
+from src.services.scoring_engine import ProductMatrix, ScoringEngine
+
+def make_product(id, category, subcategory, stock=10):
+    return SimpleNamespace(id=id, category=category, subcategory=subcategory, stock=stock)
+
+@pytest.fixture
+def interactions():
+    # Two taste clusters: readers and fashion shoppers
+    readers = [(f"R{i}", item, 3.0) for i in range(5) for item in ("Books", "Fiction", "Biography")]
+    shoppers = [(f"S{i}", item, 3.0) for i in range(5) for item in ("Fashion", "Jeans", "Shoes")]
+    # R0 has not touched Biography yet
+    return [row for row in readers + shoppers if row[:2] != ("R0", "Biography")]
+
+@pytest.fixture
+def engine():
+    products = [
+        make_product(1, "Books", "Biography"),
+        make_product(2, "Fashion", "Shoes"),
+        make_product(3, "Books", "Fiction", stock=0),
+    ]
+    return ScoringEngine(ProductMatrix(products))
+
+def test_model_ranks_unseen_items_from_similar_customers(interactions):
+    model = CollaborativeFilteringModel.fit(interactions, factors=4, iterations=10)
+
+    scores = model.item_scores("R0")
+
+    assert scores[model.item_index["Biography"]] > scores[model.item_index["Shoes"]]
+    assert model.item_scores("unknown") is None
+
+def test_save_and_load_round_trip(tmp_path, interactions):
+    model = CollaborativeFilteringModel.fit(interactions, factors=4, iterations=2)
+    path = str(tmp_path / "cf.npz")
+
+    model.save(path)
+    loaded = CollaborativeFilteringModel.load(path)
+
+    assert loaded.user_ids == model.user_ids
+    np.testing.assert_allclose(loaded.item_factors, model.item_factors)
+
+def test_incremental_fit_keeps_factor_size_and_adds_customers(interactions):
+    model = CollaborativeFilteringModel.fit(interactions, factors=4, iterations=5)
+
+    updated = CollaborativeFilteringModel.fit(
+        interactions + [("NEW", "Jeans", 5.0)], factors=8, iterations=1, initial=model
+    )
+
+    assert updated.item_factors.shape[1] == 4
+    assert "NEW" in updated.user_index
+
+def test_service_recommends_in_stock_products(interactions, engine):
+    service = CollaborativeFilteringService(path="unused.npz")
+    service.model = CollaborativeFilteringModel.fit(interactions, factors=4, iterations=10)
+
+    top = service.recommend("R0", engine, 3)
+
+    assert [engine.matrix.ids[row] for row, _ in top] == [1, 2]
+    assert service.recommend("unknown", engine, 3) == []
+
+def test_load_csv_interactions_expands_history_columns(tmp_path):
+    path = tmp_path / "customers.csv"
+    path.write_text(
+        "Customer_ID,Browsing_History,Purchase_History\n"
+        "C1,\"['Books', 'Fashion']\",\"['Fiction']\"\n"
+    )
+
+    interactions = load_csv_interactions(str(path))
+
+    assert ("C1", "Books", 1.0) in interactions
+    assert ("C1", "Fiction", 3.0) in interactions
+    assert len(interactions) == 3
@@ -0,0 +1,71 @@
+from datetime import datetime, timedelta
+import pytest
+from src.models import Customer, Product, Recommendation, RecommendationDirty
+from src.services.dirty_tracker import CUSTOMER, PRODUCT, DirtyTracker
+
+@pytest.fixture
+def tracker():
+    return DirtyTracker()
+
+def later():
+    return datetime.utcnow() + timedelta(seconds=1)
+
+def test_marks_are_deduplicated(db, tracker):
+    tracker.mark_customer(db, 1, "cart_add")
+    tracker.mark_customer(db, "1", "mood")
+
+    assert db.query(RecommendationDirty).count() == 1
+    assert db.query(RecommendationDirty).one().reason == "mood"
+    assert tracker.stats(db)["pending"] == {CUSTOMER: 1}
+
+def test_non_numeric_ids_are_ignored(db, tracker):
+    tracker.mark_customer(db, "C1000", "mood")
+
+    assert db.query(RecommendationDirty).count() == 0
+
+def test_public_ids_are_resolved(db, tracker):
+    db.add(Customer(id=7, customer_id="C1000", email="c1000@example.com"))
+    db.commit()
+
+    tracker.mark_customer(db, "C1000", "behavior")
+
+    assert tracker.pending(db, later(), CUSTOMER) == {7}
+
+def test_affected_customers_include_holders_of_dirty_products(db, tracker):
+    db.add_all([
+        Recommendation(customer_id=10, product_id=1, generation=1),
+        Recommendation(customer_id=11, product_id=2, generation=1),
+        Recommendation(customer_id=12, product_id=1, generation=2),
+    ])
+    db.commit()
+    tracker.mark_customer(db, 5, "order")
+    tracker.mark_product(db, 1, "updated")
+
+    assert tracker.affected_customers(db, later(), published=1) == {5, 10}
+    assert tracker.affected_customers(db, later(), published=2) == {5, 10, 12}
+
+def test_created_products_mark_holders_of_their_category(db, tracker):
+    db.add_all([
+        Product(id=1, category="Books"),
+        Product(id=2, category="Fashion"),
+        Product(id=3, category="Books"),
+        Recommendation(customer_id=10, product_id=1, generation=1),
+        Recommendation(customer_id=11, product_id=2, generation=1),
+    ])
+    db.commit()
+    tracker.mark_product(db, 3, "created")
+    tracker.mark_product(db, 3, "updated")
+
+    assert db.query(RecommendationDirty).one().reason == "created"
+    assert tracker.affected_customers(db, later(), published=1) == {10}
+
+def test_clear_keeps_marks_made_after_cutoff(db, tracker):
+    tracker.mark_product(db, 1, "updated")
+    cutoff = later()
+    db.add(RecommendationDirty(entity=CUSTOMER, entity_id=3, reason="mood", marked_at=cutoff + timedelta(seconds=5)))
+    db.commit()
+
+    tracker.clear(db, cutoff)
+
+    assert tracker.pending(db, later(), PRODUCT) == set()
+    assert db.query(RecommendationDirty).count() == 1
@@ -0,0 +1,59 @@
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+import pytest
+from src.services.explanation_engine import ExplanationEngine, ExplanationEnricher
+from src.services.scoring_engine import ProductMatrix, ScoringEngine
+
+PRODUCTS = [
+    SimpleNamespace(id=1, category="Books", subcategory="Fiction", product_rating=4.8, season="Winter",
+                    mood_tags=["cozy", "comforting"]),
+    SimpleNamespace(id=2, category="Fashion", subcategory="Jeans", product_rating=2.0, season="Summer"),
+]
+
+@pytest.fixture
+def engine():
+    return ScoringEngine(ProductMatrix(PRODUCTS), version="v1")
+
+def test_explanation_names_the_top_features(engine):
+    profile = {"category_affinity": {"Books": 1.0}, "season": "Winter"}
+
+    explanation, = ExplanationEngine().explain(engine, profile, [0])
+
+    assert explanation == "Recommended because it fits your interest in Books and it's rated 4.8/5."
+
+def test_mood_reason_uses_the_matching_tag(engine):
+    profile = {"mood": "sad"}
+
+    explanation, = ExplanationEngine(max_reasons=1).explain(engine, profile, [0])
+
+    assert explanation == "Recommended because its comforting feel matches your sad mood."
+
+def test_localized_templates_and_fallback(engine):
+    explainer = ExplanationEngine()
+    profile = {"category_affinity": {"Books": 1.0}}
+
+    german, = explainer.explain(engine, profile, [0], locale="de-DE")
+    unknown, = explainer.explain(engine, profile, [0], locale="xx")
+    nothing, = ExplanationEngine(max_reasons=0).explain(engine, profile, [1])
+
+    assert german.startswith("Empfohlen, weil es zu Ihrem Interesse an Books passt")
+    assert unknown.startswith("Recommended because")
+    assert nothing == "A popular pick with shoppers like you."
+
+def test_enrichment_runs_in_the_background():
+    enricher = ExplanationEnricher(max_entries=1)
+    pushed = []
+
+    async def run():
+        with patch("src.services.explanation_engine.llm_gateway.generate", AsyncMock(return_value=" Rich text ")):
+            assert enricher.schedule(object(), "C1", "P1", "prompt", on_ready=pushed.append)
+            assert not enricher.schedule(object(), "C1", "P1", "prompt")
+            assert enricher.get("C1", "P1") is None
+            await asyncio.gather(*enricher.pending.values())
+
+    asyncio.run(run())
+
+    assert enricher.get("C1", "P1") == "Rich text"
+    assert pushed == ["Rich text"]
+    assert enricher.stats()["completed"] == 1
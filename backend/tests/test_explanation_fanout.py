@@ -0,0 +1,94 @@
+import asyncio
+import time
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from src.agents.recommendation_agent import RecommendationAgent
+from src.services.explanation_engine import explanation_enricher
+
+@pytest.fixture
+def mock_generate():
+    with patch('src.agents.recommendation_agent.llm_gateway.generate', new_callable=AsyncMock) as mock:
+        yield mock
+
+@pytest.fixture
+def recommendation_agent():
+    agent = RecommendationAgent(gemini_service=MagicMock())
+    agent._explanation_writer = MagicMock(return_value=MagicMock())
+    return agent
+
+@pytest.fixture
+def customer():
+    customer = MagicMock()
+    customer.id = 1
+    customer.customer_id = "C1"
+    customer.persona.psychographic_traits = {"traits": ["adventurous"]}
+    return customer
+
+def make_products(count):
+    products = []
+    for i in range(count):
+        product = MagicMock()
+        product.id = i
+        product.product_id = f"P{i}"
+        product.name = f"Product {i}"
+        products.append((product, 0.9))
+    return products
+
+def delayed(delays):
+    async def generate(model, prompt):
+        product = next(name for name in delays if f"Name: {name}\n" in prompt)
+        await asyncio.sleep(delays[product])
+        return f"LLM {product}"
+    return generate
+
+@pytest.mark.asyncio
+async def test_calls_run_concurrently_under_the_limit(recommendation_agent, customer, mock_generate, monkeypatch):
+    # Setup
+    monkeypatch.setattr("src.agents.recommendation_agent.settings.EXPLANATION_CONCURRENCY", 2)
+    mock_generate.side_effect = delayed({f"Product {i}": 0.05 for i in range(4)})
+    products = make_products(4)
+
+    # Execute
+    started = time.perf_counter()
+    explanations, pending = await recommendation_agent._explain_with_llm(
+        customer, None, products, ["template"] * 4, deadline=1.0
+    )
+
+    # Assert
+    assert explanations == [f"LLM Product {i}" for i in range(4)]
+    assert pending == set()
+    assert 0.09 < time.perf_counter() - started < 0.5
+
+@pytest.mark.asyncio
+async def test_late_calls_get_a_placeholder_and_finish_later(recommendation_agent, customer, mock_generate):
+    # Setup
+    mock_generate.side_effect = delayed({"Product 0": 0.0, "Product 1": 0.2})
+    products = make_products(2)
+
+    # Execute
+    explanations, pending = await recommendation_agent._explain_with_llm(
+        customer, None, products, ["template 0", "template 1"], deadline=0.05
+    )
+
+    # Assert
+    assert explanations == ["LLM Product 0", "template 1"]
+    assert pending == {"P1"}
+    assert explanation_enricher.is_pending("C1", "P1")
+    await asyncio.gather(*explanation_enricher.pending.values())
+    assert explanation_enricher.get("C1", "P1") == "LLM Product 1"
+    recommendation_agent._explanation_writer.assert_called_once_with(1, 1)
+    recommendation_agent._explanation_writer.return_value.assert_called_once_with("LLM Product 1")
+
+@pytest.mark.asyncio
+async def test_failed_calls_fall_back_to_the_placeholder(recommendation_agent, customer, mock_generate):
+    # Setup
+    mock_generate.side_effect = RuntimeError("quota exceeded")
+
+    # Execute
+    explanations, pending = await recommendation_agent._explain_with_llm(
+        customer, None, make_products(1), ["template"], deadline=1.0
+    )
+
+    # Assert
+    assert explanations == ["template"]
+    assert pending == set()
@@ -0,0 +1,60 @@
+from types import SimpleNamespace
+import pytest
+from src.services.item_similarity import ItemSimilarityIndex, taxonomy_similarity
+from src.services.scoring_engine import ProductMatrix
+
+def make_product(id, category, subcategory, brand="Acme", price=100.0):
+    return SimpleNamespace(
+        id=id,
+        price=price,
+        category=category,
+        subcategory=subcategory,
+        brand=brand,
+        season="Winter",
+        geographical_location="India",
+    )
+
+@pytest.fixture
+def matrix():
+    return ProductMatrix([
+        make_product(1, "Books", "Fiction"),
+        make_product(2, "Books", "Fiction", price=120.0),
+        make_product(3, "Books", "Biography"),
+        make_product(4, "Fashion", "Jeans", brand="Other", price=2000.0),
+        make_product(5, "Fashion", "Shoes", brand="Other", price=2000.0),
+    ])
+
+def test_attribute_similarity_ranks_same_subcategory_first(matrix):
+    index = ItemSimilarityIndex.build(matrix, k=3)
+
+    similar = index.similar(1, limit=3)
+
+    assert [pid for pid, _ in similar][:2] == [2, 3]
+    assert 1 not in dict(similar)
+
+def test_baskets_boost_co_ordered_products(matrix):
+    without = ItemSimilarityIndex.build(matrix, k=4).similar(4, limit=4)
+    with_baskets = ItemSimilarityIndex.build(matrix, baskets=[[4, 1], [4, 1]], k=4).similar(4, limit=4)
+
+    assert dict(with_baskets)[1] > dict(without)[1]
+
+def test_taxonomy_similarity_from_histories():
+    items, similarity = taxonomy_similarity([
+        ("C1", "Books", 1.0), ("C1", "Fiction", 3.0),
+        ("C2", "Books", 1.0), ("C2", "Fiction", 3.0),
+        ("C3", "Fashion", 1.0),
+    ])
+
+    assert similarity[items["Books"], items["Fiction"]] == pytest.approx(1.0)
+    assert similarity[items["Books"], items["Fashion"]] == 0
+    assert similarity[-1].sum() == 0
+
+def test_save_load_round_trip(tmp_path, matrix):
+    index = ItemSimilarityIndex.build(matrix, k=2)
+    path = str(tmp_path / "similar.npz")
+
+    index.save(path)
+    loaded = ItemSimilarityIndex.load(path)
+
+    assert loaded.similar(3, limit=2) == index.similar(3, limit=2)
+    assert loaded.similar(99) == []
@@ -0,0 +1,96 @@
+import threading
+import pytest
+from unittest.mock import AsyncMock
+from src.services.llm_cache import LLMCache
+
+@pytest.fixture
+def cache_path(tmp_path):
+    return str(tmp_path / "llm_cache.db")
+
+@pytest.fixture
+def cache(cache_path):
+    return LLMCache(db_path=cache_path, max_entries=2)
+
+def test_key_ignores_cosmetic_differences():
+    first = LLMCache.make_key("product_story", "gemini-pro", "1", {"name": "Laptop  Pro", "price": 10})
+    second = LLMCache.make_key("product_story", "gemini-pro", "1", {"price": 10, "name": " Laptop Pro "})
+    assert first == second
+
+def test_key_depends_on_model_and_version():
+    payload = {"name": "Laptop"}
+    base = LLMCache.make_key("product_story", "gemini-pro", "1", payload)
+    assert base != LLMCache.make_key("product_story", "gemini-pro", "2", payload)
+    assert base != LLMCache.make_key("product_story", "gemini-2.0-flash-001", "1", payload)
+    assert base != LLMCache.make_key("explanation", "gemini-pro", "1", payload)
+
+@pytest.mark.asyncio
+async def test_get_or_generate_reuses_output(cache):
+    generate = AsyncMock(return_value="story")
+
+    first = await cache.get_or_generate("product_story", "gemini-pro", "1", {"id": 1}, generate)
+    second = await cache.get_or_generate("product_story", "gemini-pro", "1", {"id": 1}, generate)
+
+    assert first == second == "story"
+    generate.assert_awaited_once()
+    stats = cache.stats()
+    assert stats["misses"] == 1
+    assert stats["memory_hits"] == 1
+
+@pytest.mark.asyncio
+async def test_persistent_tier_survives_restart(cache, cache_path):
+    await cache.get_or_generate("persona", "gemini-pro", "1", {"id": 1}, AsyncMock(return_value="{}"))
+
+    restarted = LLMCache(db_path=cache_path)
+    generate = AsyncMock(return_value="other")
+    result = await restarted.get_or_generate("persona", "gemini-pro", "1", {"id": 1}, generate)
+
+    assert result == "{}"
+    generate.assert_not_awaited()
+    assert restarted.stats()["disk_hits"] == 1
+
+@pytest.mark.asyncio
+async def test_expired_entries_are_regenerated(cache_path):
+    cache = LLMCache(db_path=cache_path, ttls={"explanation": -1})
+    generate = AsyncMock(side_effect=["old", "new"])
+
+    await cache.get_or_generate("explanation", "gemini-pro", "1", {"id": 1}, generate)
+    result = await cache.get_or_generate("explanation", "gemini-pro", "1", {"id": 1}, generate)
+
+    assert result == "new"
+    assert cache.stats()["misses"] == 2
+
+@pytest.mark.asyncio
+async def test_invalid_output_is_not_cached(cache):
+    generate = AsyncMock(side_effect=["not json", "{}"])
+
+    await cache.get_or_generate("persona", "gemini-pro", "1", {"id": 1}, generate, validate=lambda text: text == "{}")
+    result = await cache.get_or_generate("persona", "gemini-pro", "1", {"id": 1}, generate)
+
+    assert result == "{}"
+    assert generate.await_count == 2
+
+def test_memory_tier_is_bounded(cache):
+    for i in range(3):
+        cache.set("persona", f"key{i}", "value")
+    assert cache.stats()["memory_entries"] == 2
+    # Evicted entries are still served from disk
+    assert cache.get("persona", "key0") == "value"
+
+def test_persistent_tier_is_opened_lazily_under_the_artifact_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr("src.services.llm_cache.settings.RECOMMENDER_ARTIFACT_DIR", str(tmp_path / "artifacts"))
+    cache = LLMCache()
+
+    assert cache.db_path == str(tmp_path / "artifacts" / "llm_cache.db")
+    assert not (tmp_path / "artifacts").exists()
+    cache.set("persona", "key", "value")
+    assert (tmp_path / "artifacts" / "llm_cache.db").exists()
+
+@pytest.mark.asyncio
+async def test_disk_lookups_run_off_the_event_loop(cache):
+    calls = []
+    original = cache._get_disk
+    cache._get_disk = lambda *args: calls.append(threading.get_ident()) or original(*args)
+
+    await cache.get_or_generate("persona", "gemini-pro", "1", {"id": 1}, AsyncMock(return_value="{}"))
+
+    assert calls and calls[0] != threading.get_ident()
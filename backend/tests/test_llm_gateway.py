@@ -0,0 +1,86 @@
+import asyncio
+import time
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from src.services.llm_gateway import LLMGateway
+
+@pytest.fixture
+def gateway():
+    gateway = LLMGateway(max_concurrency=2, timeout=5)
+    yield gateway
+    gateway.shutdown()
+
+@pytest.mark.asyncio
+async def test_generate_uses_native_async_client(gateway):
+    # Setup
+    model = MagicMock()
+    model.generate_content_async = AsyncMock(return_value=MagicMock(text="hello"))
+
+    # Execute
+    result = await gateway.generate(model, "prompt")
+
+    # Assert
+    assert result == "hello"
+    model.generate_content_async.assert_awaited_once_with("prompt")
+    model.generate_content.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_sync_client_does_not_block_event_loop(gateway):
+    # Setup
+    class SlowModel:
+        def generate_content(self, prompt):
+            time.sleep(0.2)
+            return MagicMock(text=prompt)
+
+    started = time.monotonic()
+
+    async def heartbeat():
+        await asyncio.sleep(0.01)
+        return time.monotonic() - started
+
+    # Execute
+    first, second, elapsed = await asyncio.gather(
+        gateway.generate(SlowModel(), "a"),
+        gateway.generate(SlowModel(), "b"),
+        heartbeat()
+    )
+
+    # Assert
+    assert (first, second) == ("a", "b")
+    assert elapsed < 0.1
+    assert gateway.stats()["calls"] == 2
+
+@pytest.mark.asyncio
+async def test_generate_counts_errors(gateway):
+    # Setup
+    model = MagicMock()
+    model.generate_content_async = AsyncMock(side_effect=RuntimeError("boom"))
+
+    # Execute and Assert
+    with pytest.raises(RuntimeError):
+        await gateway.generate(model, "prompt")
+    assert gateway.stats()["errors"] == 1
+
+@pytest.mark.asyncio
+async def test_generate_requires_model(gateway):
+    with pytest.raises(ValueError):
+        await gateway.generate(None, "prompt")
+
+@pytest.mark.asyncio
+async def test_identical_prompts_are_coalesced(gateway):
+    # Setup
+    async def slow_response(prompt):
+        await asyncio.sleep(0.05)
+        return MagicMock(text="shared")
+
+    model = MagicMock()
+    model.model_name = "models/gemini-pro"
+    model.generate_content_async = AsyncMock(side_effect=slow_response)
+
+    # Execute
+    results = await asyncio.gather(*[gateway.generate(model, "same prompt") for _ in range(4)])
+
+    # Assert
+    assert results == ["shared"] * 4
+    model.generate_content_async.assert_awaited_once()
+    assert gateway.stats()["coalesced"] == 3
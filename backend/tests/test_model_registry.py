@@ -0,0 +1,47 @@
+import pytest
+from unittest.mock import patch
+from src.services.model_registry import ModelRegistry
+
+@pytest.fixture
+def mock_genai():
+    with patch('src.services.model_registry.genai') as mock:
+        yield mock
+
+def test_start_configures_client_once(mock_genai):
+    registry = ModelRegistry()
+
+    registry.start("test_key", model_names=["gemini-pro"])
+    registry.start("other_key", model_names=["gemini-pro"])
+
+    mock_genai.configure.assert_called_once_with(api_key="test_key")
+    mock_genai.GenerativeModel.assert_called_once_with("gemini-pro")
+
+def test_start_warns_about_a_conflicting_api_key(mock_genai):
+    registry = ModelRegistry()
+    registry.start("test_key", model_names=[])
+
+    with patch('src.services.model_registry.logger') as logger:
+        registry.start("test_key", model_names=[])
+        logger.warning.assert_not_called()
+        registry.start("other_key", model_names=[])
+
+    logger.warning.assert_called_once()
+    mock_genai.configure.assert_called_once_with(api_key="test_key")
+
+def test_get_returns_shared_handle(mock_genai):
+    registry = ModelRegistry()
+    registry.start("test_key", model_names=[])
+
+    first = registry.get("gemini-pro")
+    second = registry.get("gemini-pro")
+
+    assert first is second
+    assert registry.model_names() == ["gemini-pro"]
+
+def test_get_without_api_key_returns_none(mock_genai, monkeypatch):
+    monkeypatch.delenv("GEMINI_API_KEY", raising=False)
+    monkeypatch.setattr("src.services.model_registry.settings.GEMINI_API_KEY", None)
+    registry = ModelRegistry()
+
+    assert registry.get("gemini-pro") is None
+    mock_genai.configure.assert_not_called()
@@ -0,0 +1,57 @@
+from types import SimpleNamespace
+import pytest
+from src.services.mood_affinity import MoodAffinity, parse_mood
+from src.services.scoring_engine import ProductMatrix, ScoringEngine
+
+PRODUCTS = [
+    SimpleNamespace(id="p1", category="Fitness", subcategory="Treadmill", mood_tags=["Energetic", "bold"]),
+    SimpleNamespace(id="p2", category="Home Decor", subcategory="Cushions", mood_tags=["cozy", "calming"]),
+    SimpleNamespace(id="p3", category="Books", subcategory="Fiction", mood_tags=None,
+                    product_metadata={"mood_tags": ["comforting"]}),
+    SimpleNamespace(id="p4", category="Electronics", subcategory="Laptop", mood_tags=[]),
+]
+
+@pytest.fixture
+def engine():
+    return ScoringEngine(ProductMatrix(PRODUCTS), version="v1")
+
+def test_parse_mood_accepts_enum_values_and_rows():
+    assert parse_mood("happy") == "Happy"
+    assert parse_mood(SimpleNamespace(mood="RELAXED")) == "Relaxed"
+    assert parse_mood("hungry") is None
+
+def test_mood_tags_are_indexed(engine):
+    matrix = engine.matrix
+    assert matrix.mood_tags.shape == (4, len(matrix.mood_tag_index))
+    assert matrix.mood_tags[0, matrix.mood_tag_index["energetic"]] == 1
+    assert matrix.mood_tags[2, matrix.mood_tag_index["comforting"]] == 1
+
+def test_boost_is_scaled_per_mood(engine):
+    affinity = MoodAffinity()
+
+    excited = affinity.boost(engine, "Excited")
+    relaxed = affinity.boost(engine, "Relaxed")
+
+    assert excited.max() == pytest.approx(1.0)
+    assert excited.argmax() == 0
+    assert relaxed.argmax() == 1
+    assert affinity.boost(engine, "Excited") is excited
+
+def test_switching_moods_reorders_the_same_candidates(engine):
+    affinity = MoodAffinity()
+    base = [(3, 0.6), (0, 0.5), (1, 0.5), (2, 0.4)]
+
+    excited = affinity.rerank(engine, base, "excited", k=2, strength=0.5)
+    sad = affinity.rerank(engine, base, "sad", k=2, strength=0.5)
+
+    assert [row for row, _ in excited] == [0, 3]
+    assert sad[0][0] in (1, 2)
+    assert affinity.rerank(engine, base, "unknown", k=2) == base[:2]
+
+def test_catalog_change_rebuilds_boosts(engine):
+    affinity = MoodAffinity()
+    affinity.boost(engine, "Happy")
+
+    changed = ScoringEngine(ProductMatrix(PRODUCTS[:2]), version="v2")
+
+    assert affinity.boost(changed, "Happy").shape == (2,)
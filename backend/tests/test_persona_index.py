@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+from src.services.persona_index import (
+    HashedTfidfEmbedder,
+    PersonaProductIndex,
+    persona_text,
+    product_text,
+)
+
+PRODUCTS = [
+    {"id": 1, "name": "Trail Running Shoes", "category": "Fashion", "subcategory": "Shoes",
+     "brand": "Acme", "mood_tags": ["energetic", "outdoor"]},
+    {"id": 2, "name": "Mystery Novel", "category": "Books", "subcategory": "Fiction",
+     "brand": "Penguin", "story": "A cozy read for quiet evenings", "mood_tags": ["relaxed"]},
+    {"id": 3, "name": "Gaming Laptop", "category": "Electronics", "subcategory": "Laptop",
+     "brand": "Zen", "mood_tags": ["excited"]},
+]
+
+@pytest.fixture
+def index():
+    return PersonaProductIndex.build(PRODUCTS, dim=256, tables=4, bits=4)
+
+def test_text_extraction():
+    assert "relaxed" in product_text(PRODUCTS[1])
+    assert persona_text({"traits": ["outdoor", "energetic"], "age": 30, "notes": {"likes": "books"}}) \
+        == "outdoor energetic  books"
+
+def test_embeddings_are_normalized():
+    embedder = HashedTfidfEmbedder(dim=64).fit([product_text(p) for p in PRODUCTS])
+
+    vector = embedder.embed("cozy fiction")
+
+    assert np.linalg.norm(vector) == pytest.approx(1.0)
+    assert not embedder.embed("").any()
+
+def test_persona_query_returns_closest_product(index):
+    persona = {"interests": ["reading fiction", "cozy evenings"], "mood": "relaxed"}
+
+    matches = index.query_persona(persona, k=2)
+
+    assert matches[0][0] == 2
+    assert matches[0][1] > matches[1][1]
+
+def test_empty_persona_matches_nothing(index):
+    assert index.query_persona({}, k=3) == []
+
+def test_saved_index_is_memory_mapped(tmp_path, index):
+    index.save(str(tmp_path))
+
+    loaded = PersonaProductIndex.load(str(tmp_path))
+
+    assert isinstance(loaded.vectors, np.memmap)
+    assert loaded.query_persona({"hobby": "laptop gaming"}, k=1) == index.query_persona({"hobby": "laptop gaming"}, k=1)
@@ -0,0 +1,68 @@
+from types import SimpleNamespace
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from src.database import get_db
+from src.database.models import CustomerBehavior
+from src.models import Customer, Product, RecommendationDirty
+from src.routes.auth import get_current_user
+from src.routes.products import router
+from src.services.trending import TrendingEngine
+
+@pytest.fixture
+def db(db):
+    CustomerBehavior.__table__.create(bind=db.get_bind())
+    db.add_all([
+        Customer(id=7, customer_id="C7", email="c7@example.com", location="Mumbai"),
+        Product(id=1, product_id="P1", name="Fiction", description="Novel", price=10.0, category="Books", stock=5),
+        Product(id=2, product_id="P2", name="Jeans", description="Denim", price=20.0, category="Fashion", stock=5),
+    ])
+    db.commit()
+    return db
+
+@pytest.fixture
+def client(db):
+    app = FastAPI()
+    app.include_router(router, prefix="/api")
+    app.dependency_overrides[get_db] = lambda: db
+    # The auth dependency returns database.models.Customer, which has no location
+    app.dependency_overrides[get_current_user] = lambda: SimpleNamespace(id=7, email="c7@example.com")
+    return TestClient(app)
+
+def test_deleting_a_product_marks_it_dirty(client, db):
+    assert client.delete("/api/products/1").status_code == 200
+
+    dirty = db.query(RecommendationDirty).one()
+    assert (dirty.entity, dirty.entity_id, dirty.reason) == ("product", 1, "deleted")
+
+def test_views_are_trending_in_the_customer_location(client, monkeypatch):
+    trending = TrendingEngine(bucket_seconds=60, buckets=3, width=512, depth=4, capacity=3)
+    monkeypatch.setattr("src.services.recommendation_events.trending_engine", trending)
+    monkeypatch.setattr("src.routes.products.trending_engine", trending)
+
+    assert client.post("/api/products/2/view").status_code == 204
+
+    for location in ("India", "Mumbai"):
+        assert [p["id"] for p in client.get(f"/api/products/trending?location={location}").json()] == [2]
+    assert client.get("/api/products/trending?location=USA").json() == []
+
+@pytest.mark.parametrize("query, expected", [
+    # Exact boundary: a float32 round trip used to turn 3.2 into 3.1999998
+    ("min_rating=3.2", [3, 4]),
+    # The stored rating is filtered, not product_rating
+    ("min_rating=4.0", [4]),
+    # A NULL price is not within a price range
+    ("max_price=15", [1]),
+])
+def test_listing_filters_match_sql_semantics(client, db, query, expected):
+    db.add_all([
+        Product(id=3, product_id="P3", name="Lamp", description="Desk lamp", price=30.0, category="Home", rating=3.2),
+        Product(
+            id=4, product_id="P4", name="Mat", description="Yoga mat", price=25.0, category="Fitness",
+            rating=4.5, product_rating=2.0
+        ),
+        Product(id=5, product_id="P5", name="Gift card", description="Any amount", price=None, category="Gifts"),
+    ])
+    db.commit()
+
+    assert [p["id"] for p in client.get(f"/api/products/?{query}").json()] == expected
@@ -0,0 +1,88 @@
+import os
+from unittest.mock import patch
+import numpy as np
+import pandas as pd
+import pytest
+from src.services.product_service import ProductService
+
+def write_catalog(path):
+    pd.DataFrame({
+        "Product_ID": ["P1", "P2", "P3", None],
+        "Category": ["Books", "Fashion", "Books", "Books"],
+        "Subcategory": ["Fiction", "Jeans", "Comics", "Fiction"],
+        "Price": [10, 20.5, 30, 40],
+        "Brand": ["Brand A", "Brand B", "Brand A", "Brand C"],
+        "Product_Rating": [4.5, None, 3.0, 5.0],
+    }).to_csv(path, index=False)
+
+@pytest.fixture
+def service(tmp_path):
+    write_catalog(tmp_path / "products.csv")
+    return ProductService(str(tmp_path / "products.csv"), str(tmp_path / "snapshot"))
+
+def test_records_are_formatted(service):
+    assert service.get_product_by_id("P2") == {
+        "id": "P2",
+        "name": "Brand B Jeans",
+        "description": "Fashion - Jeans",
+        "price": 20.5,
+        "category": "Fashion",
+        "subcategory": "Jeans",
+        "brand": "Brand B",
+        "rating": 0.0,
+        "image": "/images/products/P2.jpg",
+    }
+    assert service.get_product_by_id("P404") == {}
+
+def test_group_indexes_keep_catalog_order(service):
+    assert [p["id"] for p in service.get_all_products()] == ["P1", "P2", "P3"]
+    assert [p["id"] for p in service.get_products_by_category("Books")] == ["P1", "P3"]
+    assert [p["id"] for p in service.get_products_by_subcategory("Fiction")] == ["P1"]
+    assert service.get_products_by_category("Garden") == []
+
+def test_missing_file_gives_empty_catalog(tmp_path):
+    service = ProductService(str(tmp_path / "missing.csv"), str(tmp_path / "snapshot"))
+
+    assert service.get_all_products() == []
+    assert service.get_product_by_id("P1") == {}
+
+def test_snapshot_is_reused_until_the_csv_changes(tmp_path):
+    path, snapshot = str(tmp_path / "products.csv"), str(tmp_path / "snapshot")
+    write_catalog(path)
+    first = ProductService(path, snapshot)
+
+    with patch("src.services.product_service.read_product_csv") as read_csv:
+        second = ProductService(path, snapshot)
+        # Same content with a new mtime is only re-hashed
+        os.utime(path, ns=(0, 0))
+        third = ProductService(path, snapshot)
+    read_csv.assert_not_called()
+    assert second.get_all_products() == first.get_all_products() == third.get_all_products()
+    assert isinstance(second.products["Category"].dtype, pd.CategoricalDtype)
+
+    with open(path, "a") as f:
+        f.write("P9,Garden,Tools,5,Brand D,4.0\n")
+    assert ProductService(path, snapshot).get_product_by_id("P9")["category"] == "Garden"
+
+def test_unwritable_manifest_still_uses_the_snapshot(tmp_path):
+    path, snapshot = str(tmp_path / "products.csv"), str(tmp_path / "snapshot")
+    write_catalog(path)
+    ProductService(path, snapshot)
+    os.utime(path, ns=(0, 0))
+
+    with patch("src.services.catalog_snapshot.CatalogSnapshot._write_manifest", side_effect=PermissionError("read-only")), \
+            patch("src.services.product_service.read_product_csv") as read_csv:
+        service = ProductService(path, snapshot)
+    read_csv.assert_not_called()
+    assert [p["id"] for p in service.get_all_products()] == ["P1", "P2", "P3"]
+
+def test_inconsistent_snapshot_falls_back_to_the_csv(tmp_path):
+    path, snapshot = str(tmp_path / "products.csv"), str(tmp_path / "snapshot")
+    write_catalog(path)
+    ProductService(path, snapshot)
+    # A column file of the wrong length, e.g. left over from an interrupted rebuild
+    np.save(os.path.join(snapshot, "column_3.npy"), np.zeros(7))
+
+    service = ProductService(path, snapshot)
+
+    assert [p["id"] for p in service.get_all_products()] == ["P1", "P2", "P3"]
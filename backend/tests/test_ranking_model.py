@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+from src.models import Customer, Product
+from src.services.ranking_model import RankingModel
+from src.services.scoring_engine import FEATURES, weights_vector
+
+CATEGORY = FEATURES.index("category_match")
+RATING = FEATURES.index("rating")
+
+@pytest.fixture
+def db(db):
+    db.add(Customer(email="c@example.com", customer_id="C1", customer_segment="Frequent Buyer",
+                    browsing_history=["Books"]))
+    db.add_all([
+        Product(product_id="P1", name="Novel", category="Books", price=10.0, product_rating=2.0, stock=5),
+        Product(product_id="P2", name="Jeans", category="Fashion", price=10.0, product_rating=5.0, stock=5),
+    ])
+    db.commit()
+    return db
+
+def test_untrained_segments_use_default_weights():
+    assert RankingModel().weights_for("New Visitor") is None
+
+def test_positive_feedback_raises_the_weights_of_present_features():
+    model = RankingModel(learning_rate=0.5, l2=0.0)
+    features = np.zeros(len(FEATURES), dtype=np.float32)
+    features[CATEGORY] = 1.0
+
+    model.update("Frequent Buyer", features, label=1.0)
+    clicked = model.weights_for("Frequent Buyer")
+    model.update("Frequent Buyer", features, label=0.0, sample_weight=10.0)
+
+    assert clicked[CATEGORY] > weights_vector()[CATEGORY]
+    assert clicked[RATING] == pytest.approx(weights_vector()[RATING])
+    assert model.weights_for("Frequent Buyer")[CATEGORY] == 0.0  # projected onto non-negative weights
+    assert model.version("Frequent Buyer") == 2
+
+def test_feedback_is_persisted_per_segment(db):
+    model = RankingModel(learning_rate=0.5)
+
+    update = model.record_feedback(db, "C1", "P1", "click")
+    restored = RankingModel()
+    restored.load(db)
+
+    assert update["segment"] == "Frequent Buyer"
+    assert update["weights"]["category_match"] > weights_vector()[CATEGORY]
+    np.testing.assert_allclose(restored.weights_for("Frequent Buyer"), model.weights_for("Frequent Buyer"))
+    assert restored.version("Frequent Buyer") == 1
+    assert restored.weights_for(None) is None
+
+def test_unknown_event_is_rejected(db):
+    with pytest.raises(ValueError):
+        RankingModel().record_feedback(db, "C1", "P1", "stare")
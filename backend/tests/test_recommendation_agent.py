@@ -23,17 +23,18 @@ def recommendation_agent(mock_gemini, mock_db):
     return RecommendationAgent(api_key="test_key", db=mock_db)
 
 @pytest.mark.asyncio
-async def test_calculate_match_score(recommendation_agent, mock_gemini):
+async def test_calculate_match_scores(recommendation_agent, mock_gemini):
     # Setup
     customer = Customer(id="1", name="Test User", preferences={"category": "electronics"})
     product = Product(id="1", name="Test Product", category="electronics")
-    mock_gemini.generate_content.return_value.text = "0.85"
+    mock_gemini.generate_content.return_value.text = '[{"product_id": "1", "score": 0.85}]'
 
     # Execute
-    score = await recommendation_agent._calculate_match_score(customer, product)
+    scores = await recommendation_agent._calculate_match_scores(customer, [product], None)
 
     # Assert
-    assert 0 <= score <= 1
+    assert len(scores) == 1
+    assert 0 <= scores[0] <= 1
     mock_gemini.generate_content.assert_called_once()
 
 @pytest.mark.asyncio
@@ -0,0 +1,133 @@
+from datetime import datetime
+from unittest.mock import patch
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from src.database.models import CustomerMood
+from src.models import Base, Customer, Product, Recommendation, RecommendationGeneration
+from src.services.dirty_tracker import DirtyTracker
+from src.services.recommendation_batch import (
+    MaterializedRecommendations,
+    materialize_recommendations,
+    shard_customers,
+)
+from src.services.recommendation_service import RecommendationService
+from src.services.scoring_engine import get_scoring_engine
+
+@pytest.fixture
+def database_url(tmp_path):
+    url = f"sqlite:///{tmp_path / 'batch.db'}"
+    engine = create_engine(url)
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    for i in range(5):
+        db.add(Customer(
+            email=f"c{i}@example.com",
+            customer_id=f"C{i}",
+            browsing_history=["Books"],
+            purchase_history=["Fiction"],
+            season="Winter",
+        ))
+    for i, (category, subcategory) in enumerate([("Books", "Fiction"), ("Books", "Biography"), ("Fashion", "Jeans")]):
+        db.add(Product(
+            product_id=f"P{i}",
+            name=f"Product {i}",
+            price=100.0,
+            category=category,
+            subcategory=subcategory,
+            stock=10,
+            season="Winter",
+        ))
+    db.commit()
+    db.close()
+    return url
+
+@pytest.fixture
+def db(database_url):
+    session = sessionmaker(bind=create_engine(database_url))()
+    yield session
+    session.close()
+
+def test_shards_cover_all_ids_in_order():
+    assert shard_customers([9, 1, 5, 2, 8], 2) == [[1, 2], [5, 8], [9]]
+    assert shard_customers([], 2) == []
+
+def test_materialize_writes_and_publishes_generation(database_url, db):
+    summary = materialize_recommendations(database_url, top_n=2, workers=1, shard_size=2)
+
+    assert summary["customers"] == 5
+    assert summary["rows"] == 10
+    assert summary["shards"] == 3
+    assert db.query(RecommendationGeneration).one().status == "published"
+    assert db.query(Recommendation).filter(Recommendation.generation == summary["generation"]).count() == 10
+
+def test_materialized_rows_are_served_and_cold_customers_fall_back(database_url, db):
+    materialize_recommendations(database_url, top_n=2, workers=1)
+    materialized = MaterializedRecommendations(refresh_seconds=0)
+
+    served = materialized.get(db, customer_id=1, limit=2)
+
+    assert [r["product_id"] for r in served] == ["P0", "P1"]
+    assert served[0]["match_score"] >= served[1]["match_score"]
+    assert materialized.get(db, customer_id=99, limit=2) is None
+    assert materialized.get(db, customer_id=1, limit=5) is None
+    assert materialized.stats()["served"] == 1
+
+def test_nothing_is_served_before_first_generation(db):
+    assert MaterializedRecommendations(refresh_seconds=0).get(db, customer_id=1, limit=2) is None
+
+def test_incremental_run_only_rescores_dirty_customers(database_url, db):
+    first = materialize_recommendations(database_url, top_n=2)
+    tracker = DirtyTracker()
+    tracker.mark_customer(db, 2, "cart_add")
+
+    with patch("src.services.recommendation_batch.dirty_tracker", tracker):
+        second = materialize_recommendations(database_url, top_n=2, incremental=True)
+
+    assert second["incremental"]
+    assert second["customers"] == 1
+    materialized = MaterializedRecommendations(refresh_seconds=0)
+    assert materialized.get(db, customer_id=1, limit=2) is not None
+    assert db.query(Recommendation).filter(Recommendation.generation == second["generation"]).count() == 2
+    assert not tracker.pending(db, datetime.utcnow(), "customer")
+    assert first["generation"] < second["generation"]
+
+def test_unpublished_rows_are_discarded_by_next_run(database_url, db):
+    materialize_recommendations(database_url, top_n=2)
+    crashed = RecommendationGeneration(status="running")
+    db.add(crashed)
+    db.commit()
+    db.add(Recommendation(customer_id=1, product_id=3, match_score=9.9, generation=crashed.id))
+    db.commit()
+
+    materialize_recommendations(database_url, top_n=2, incremental=True)
+
+    db.expire_all()
+    assert db.query(Recommendation).filter(Recommendation.generation == crashed.id).count() == 0
+    assert db.get(RecommendationGeneration, crashed.id).status == "failed"
+
+def test_batch_ranks_with_the_latest_mood(database_url, db):
+    CustomerMood.__table__.create(bind=db.get_bind())
+    db.add_all([
+        CustomerMood(id="m1", customer_id=1, mood="Happy", created_at=datetime(2024, 1, 1)),
+        CustomerMood(id="m2", customer_id=1, mood="Relaxed", created_at=datetime(2024, 1, 2)),
+    ])
+    db.commit()
+
+    summary = materialize_recommendations(database_url, top_n=2)
+
+    def stored(customer_id):
+        return db.query(Recommendation.product_id, Recommendation.match_score)\
+            .filter(Recommendation.customer_id == customer_id, Recommendation.generation == summary["generation"])\
+            .order_by(Recommendation.match_score.desc())\
+            .all()
+
+    service = RecommendationService()
+    engine = get_scoring_engine(db, Product)
+    profile, candidates = service.retrieve_candidates(db.get(Customer, 1), engine)
+    profile["mood"] = "Relaxed"
+    online = service.rank_candidates(engine, profile, candidates, 2)
+    assert [(product_id, pytest.approx(score)) for product_id, score in stored(1)] == \
+        [(engine.matrix.ids[row], score) for row, score in online]
+    # Customer 2 has the same history but no tracked mood
+    assert stored(1) != stored(2)
@@ -0,0 +1,73 @@
+import json
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from src.agents.recommendation_agent import RecommendationAgent
+
+@pytest.fixture
+def mock_generate():
+    with patch('src.agents.recommendation_agent.llm_gateway.generate', new_callable=AsyncMock) as mock:
+        yield mock
+
+@pytest.fixture
+def recommendation_agent():
+    return RecommendationAgent(gemini_service=MagicMock())
+
+@pytest.fixture
+def customer():
+    customer = MagicMock()
+    customer.persona.psychographic_traits = {"traits": ["adventurous"]}
+    return customer
+
+def make_products(count):
+    products = []
+    for i in range(count):
+        product = MagicMock()
+        product.id = f"P{i}"
+        product.name = f"Product {i}"
+        products.append(product)
+    return products
+
+def scores_for(prompt, value):
+    products = json.loads(prompt.split("Products (JSON):")[1].split("Consider:")[0])
+    return json.dumps([{"product_id": p["product_id"], "score": value} for p in products])
+
+@pytest.mark.asyncio
+async def test_scores_are_requested_in_chunks(recommendation_agent, customer, mock_generate, monkeypatch):
+    # Setup
+    monkeypatch.setattr("src.agents.recommendation_agent.settings.RECOMMENDATION_SCORING_BATCH_SIZE", 2)
+    mock_generate.side_effect = lambda model, prompt: scores_for(prompt, 0.8)
+    products = make_products(5)
+
+    # Execute
+    scores = await recommendation_agent._calculate_match_scores(customer, products, None)
+
+    # Assert
+    assert scores == [0.8] * 5
+    assert mock_generate.await_count == 3
+
+@pytest.mark.asyncio
+async def test_failed_chunk_falls_back_to_default(recommendation_agent, customer, mock_generate, monkeypatch):
+    # Setup
+    monkeypatch.setattr("src.agents.recommendation_agent.settings.RECOMMENDATION_SCORING_BATCH_SIZE", 2)
+    mock_generate.side_effect = [
+        json.dumps([{"product_id": "P0", "score": 0.9}, {"product_id": "P1", "score": 0.7}]),
+        RuntimeError("boom")
+    ]
+
+    # Execute
+    scores = await recommendation_agent._calculate_match_scores(customer, make_products(4), None)
+
+    # Assert
+    assert scores == [0.9, 0.7, 0.5, 0.5]
+
+def test_parse_batch_scores_handles_code_fences_and_missing_items():
+    products = make_products(3)
+    response = '```json\n[{"product_id": "P2", "score": 1.4}, {"product_id": "P0", "score": 0.3}]\n```'
+
+    assert RecommendationAgent._parse_batch_scores(response, products) == [0.3, 0.5, 1]
+
+def test_parse_batch_scores_accepts_plain_arrays():
+    products = make_products(2)
+
+    assert RecommendationAgent._parse_batch_scores("[0.2, 0.6]", products) == [0.2, 0.6]
+    assert RecommendationAgent._parse_batch_scores("not json", products) == [0.5, 0.5]
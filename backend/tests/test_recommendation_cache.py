@@ -0,0 +1,51 @@
+from unittest.mock import patch
+import pytest
+from src.services.recommendation_cache import RecommendationCache, fingerprint
+
+RESULTS = [{"product_id": "P1", "explanation": "", "match_score": 0.9}]
+
+@pytest.fixture
+def cache():
+    return RecommendationCache(max_entries=2, ttl=60)
+
+def test_fingerprint_is_order_independent():
+    assert fingerprint(mood="Happy", cart=[(1, 2)]) == fingerprint(cart=[(1, 2)], mood="Happy")
+    assert fingerprint(mood="Happy") != fingerprint(mood="Sad")
+
+def test_hit_requires_matching_fingerprint(cache):
+    cache.set(1, "abc", RESULTS)
+
+    assert cache.get(1, "abc") == RESULTS
+    assert cache.get(1, "changed") is None
+    assert cache.get(1, "abc") is None
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 2
+    assert stats["stale_rejections"] == 1
+
+def test_invalidate_drops_customer_entry(cache):
+    cache.set("7", "abc", RESULTS)
+
+    cache.invalidate(7)
+
+    assert cache.get("7", "abc") is None
+    assert cache.stats()["invalidations"] == 1
+
+def test_lru_eviction_and_invalidate_all(cache):
+    cache.set(1, "a", RESULTS)
+    cache.set(2, "b", RESULTS)
+    cache.get(1, "a")
+    cache.set(3, "c", RESULTS)
+
+    assert cache.get(2, "b") is None
+    assert cache.get(1, "a") == RESULTS
+
+    cache.invalidate_all()
+    assert cache.stats()["entries"] == 0
+
+def test_expired_entries_are_not_served(cache):
+    with patch("src.services.recommendation_cache.time.time", return_value=1000.0):
+        cache.set(1, "a", RESULTS)
+    with patch("src.services.recommendation_cache.time.time", return_value=1061.0):
+        assert cache.get(1, "a") is None
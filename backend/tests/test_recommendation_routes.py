@@ -0,0 +1,146 @@
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+import numpy as np
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from src.agents.recommendation_agent import RecommendationAgent
+from src.database import get_db
+from src.database.models import CustomerMood
+from src.models import Customer, Product, RecommendationDirty
+from src.routes.auth import get_current_user
+from src.routes.recommendations import get_recommendation_agent, router
+from src.services.item_similarity import ItemSimilarityIndex
+from src.services.model_registry import ModelRegistry
+from src.services.ranking_model import RankingModel
+from src.services.session_store import SessionStore
+
+def make_product(pid, category, subcategory, season="Winter", price=1000.0):
+    return Product(
+        product_id=pid, name=f"{subcategory} {pid}", price=price, category=category, subcategory=subcategory,
+        brand="Brand", product_rating=4.0, customer_review_sentiment_score=0.5,
+        probability_of_recommendation=0.5, stock=10, season=season, holiday="No", geographical_location="India"
+    )
+
+@pytest.fixture
+def db(db):
+    CustomerMood.__table__.create(bind=db.get_bind())
+    db.add_all([
+        make_product("P1", "Books", "Fiction"),
+        make_product("P2", "Fashion", "Jeans", season="Summer"),
+        make_product("P3", "Electronics", "Laptop", price=50000.0),
+        Customer(
+            customer_id="C1", email="c1@example.com", name="C1", location="Chennai", season="Winter",
+            holiday="No", browsing_history="['Books']", purchase_history="['Fiction']",
+            customer_segment="Regular", avg_order_value=1000.0
+        ),
+    ])
+    db.commit()
+    return db
+
+@pytest.fixture
+def client(db):
+    app = FastAPI()
+    app.include_router(router, prefix="/api")
+    app.dependency_overrides[get_db] = lambda: db
+    app.dependency_overrides[get_recommendation_agent] = lambda: RecommendationAgent(gemini_service=MagicMock())
+    return TestClient(app)
+
+def test_personalized_recommendations_match_the_response_schema(client):
+    response = client.get("/api/recommendations?customer_id=C1&limit=2")
+
+    assert response.status_code == 200
+    recommendations = response.json()
+    assert len(recommendations) == 2
+    for rec in recommendations:
+        assert set(rec) == {"product_id", "match_score", "explanation"}
+        assert rec["product_id"] in {"P1", "P2", "P3"}
+
+def test_mood_recommendations_are_ranked_for_the_mood(client):
+    response = client.post("/api/recommendations/mood", json={
+        "mood": "happy",
+        "customer_data": {"browsing_history": ["Books"], "season": "Winter"},
+        "limit": 2
+    })
+
+    assert response.status_code == 200
+    recommendations = response.json()["recommendations"]
+    assert len(recommendations) == 2
+    assert {rec["product_id"] for rec in recommendations} <= {"P1", "P2", "P3"}
+
+def test_mood_recommendations_need_no_api_key(client, monkeypatch):
+    monkeypatch.delenv("GEMINI_API_KEY", raising=False)
+    monkeypatch.setattr("src.services.model_registry.settings.GEMINI_API_KEY", None)
+    registry = ModelRegistry()
+    monkeypatch.setattr("src.agents.base_agent.model_registry", registry)
+    monkeypatch.setattr("src.services.gemini_service.model_registry", registry)
+    del client.app.dependency_overrides[get_recommendation_agent]
+
+    response = client.post("/api/recommendations/mood", json={"mood": "relaxed", "limit": 2})
+
+    assert response.status_code == 200
+    assert len(response.json()["recommendations"]) == 2
+
+def test_unknown_mood_is_rejected(client):
+    response = client.post("/api/recommendations/mood", json={"mood": "hangry"})
+
+    assert response.status_code == 400
+
+def test_tracked_mood_is_stored_and_marks_the_customer_dirty(client, db):
+    response = client.post("/api/mood/track", json={"customer_id": "C1", "mood": "relaxed"})
+
+    assert response.status_code == 200
+    customer = db.query(Customer).filter(Customer.customer_id == "C1").one()
+    assert [mood.mood for mood in db.query(CustomerMood).filter(CustomerMood.customer_id == customer.id)] == ["Relaxed"]
+    dirty = db.query(RecommendationDirty).one()
+    assert (dirty.entity, dirty.entity_id, dirty.reason) == ("customer", customer.id, "mood")
+
+def test_tracking_mood_requires_a_known_customer(client):
+    assert client.post("/api/mood/track", json={"customer_id": "C404", "mood": "happy"}).status_code == 404
+    assert client.post("/api/mood/track", json={"customer_id": "C1"}).status_code == 400
+
+def test_feedback_updates_the_segment_weights(client, monkeypatch):
+    model = RankingModel(learning_rate=0.5)
+    monkeypatch.setattr("src.routes.recommendations.ranking_model", model)
+    assert model.weights_for("Regular") is None
+
+    response = client.post("/api/recommendations/feedback", json={
+        "recommendation": {"customer_id": "C1", "product_id": "P1"},
+        "feedback": {"type": "purchase"}
+    })
+
+    assert response.status_code == 200
+    assert response.json()["model_update"]["segment"] == "Regular"
+    learned = model.weights_for("Regular").copy()
+    assert not (learned == model.prior).all()
+
+    client.post("/api/recommendations/feedback", json={"customer_id": "C1", "product_id": "P3", "feedback": {"type": "dismiss"}})
+    assert not (model.weights_for("Regular") == learned).all()
+
+def test_feedback_on_unknown_ids_or_events_is_rejected(client):
+    unknown = {"customer_id": "C404", "product_id": "P1", "feedback": {"type": "click"}}
+    invalid = {"customer_id": "C1", "product_id": "P1", "feedback": {"type": "stare"}}
+
+    assert client.post("/api/recommendations/feedback", json=unknown).status_code == 404
+    assert client.post("/api/recommendations/feedback", json=invalid).status_code == 400
+
+def test_continue_shopping_requires_a_signed_in_customer(client):
+    assert client.get("/api/recommendations/continue-shopping").status_code == 401
+
+def test_continue_shopping_returns_public_product_ids(client, db, monkeypatch):
+    customer = db.query(Customer).filter(Customer.customer_id == "C1").one()
+    products = {p.product_id: p.id for p in db.query(Product)}
+    store = SessionStore(history=5, max_sessions=10, idle_seconds=60)
+    store.record(customer.id, products["P1"], "view")
+    monkeypatch.setattr("src.routes.recommendations.session_store", store)
+    client.app.dependency_overrides[get_current_user] = lambda: SimpleNamespace(id=customer.id)
+    ids = np.array(sorted(products.values()))
+    neighbours = ItemSimilarityIndex(
+        ids, np.array([0, 2, 4, 6]), np.array([1, 2, 0, 2, 0, 1], dtype=np.int32), np.full(6, 0.5, dtype=np.float32)
+    )
+
+    with patch("src.services.session_store.item_similarity_service.index", neighbours):
+        response = client.get("/api/recommendations/continue-shopping")
+
+    assert response.status_code == 200
+    assert sorted(rec["product_id"] for rec in response.json()) == ["P2", "P3"]
@@ -0,0 +1,92 @@
+import pytest
+from src.models import Recommendation, RecommendationGeneration
+from src.services.recommendation_store import (
+    RecommendationCompactor,
+    bulk_upsert,
+    prune_generations,
+    replace_live_recommendations,
+)
+
+def add_generation(db, generation_id, customers, status="published"):
+    db.add(RecommendationGeneration(id=generation_id, status=status))
+    for customer_id in customers:
+        db.add(Recommendation(customer_id=customer_id, product_id=1, match_score=0.5, generation=generation_id))
+    db.commit()
+
+def generations(db, customer_id):
+    rows = db.query(Recommendation.generation).filter(Recommendation.customer_id == customer_id).all()
+    return sorted(generation for (generation,) in rows)
+
+def test_bulk_upsert_updates_existing_keys(db):
+    key = ("customer_id", "product_id")
+    live = Recommendation.generation.is_(None)
+    add_generation(db, 1, [1])  # materialized (1, 1) row, not part of the live key
+
+    bulk_upsert(db, Recommendation, [
+        {"customer_id": 1, "product_id": 1, "match_score": 0.2, "explanation": "old"},
+        {"customer_id": 1, "product_id": 2, "match_score": 0.4, "explanation": "old"},
+    ], key, ("match_score", "explanation"), key_where=live)
+    bulk_upsert(db, Recommendation, [
+        {"customer_id": 1, "product_id": 1, "match_score": 0.9, "explanation": "new"},
+    ], key, ("match_score", "explanation"), key_where=live)
+    db.commit()
+
+    rows = {r.product_id: r for r in db.query(Recommendation).filter(live).all()}
+    assert len(rows) == 2
+    assert rows[1].match_score == 0.9
+    assert rows[1].explanation == "new"
+    assert rows[2].explanation == "old"
+    materialized = db.query(Recommendation).filter(Recommendation.generation == 1).one()
+    assert materialized.match_score == 0.5
+
+def test_live_recommendations_are_replaced_per_customer(db):
+    live = Recommendation.generation.is_(None)
+    add_generation(db, 1, [1])
+    replace_live_recommendations(db, 1, [
+        {"customer_id": 1, "product_id": product_id, "match_score": 0.5, "explanation": "old"}
+        for product_id in (1, 2, 3)
+    ])
+    replace_live_recommendations(db, 2, [{"customer_id": 2, "product_id": 1, "match_score": 0.5, "explanation": "old"}])
+
+    deleted = replace_live_recommendations(db, 1, [
+        {"customer_id": 1, "product_id": 3, "match_score": 0.9, "explanation": "new"},
+        {"customer_id": 1, "product_id": 4, "match_score": 0.8, "explanation": "new"},
+    ])
+    db.commit()
+
+    assert deleted == 2
+    rows = {r.product_id: r.explanation for r in db.query(Recommendation).filter(live, Recommendation.customer_id == 1)}
+    assert rows == {3: "new", 4: "new"}
+    # Other customers' live rows and materialized rows are untouched
+    assert db.query(Recommendation).filter(live, Recommendation.customer_id == 2).count() == 1
+    assert db.query(Recommendation).filter(Recommendation.generation == 1).count() == 1
+
+def test_prune_keeps_latest_generations_per_customer(db):
+    add_generation(db, 1, [10, 11])
+    add_generation(db, 2, [10])
+    add_generation(db, 3, [10])
+
+    deleted = prune_generations(db, keep=2, batch_size=100)
+
+    assert deleted == 1
+    assert generations(db, 10) == [2, 3]
+    # Customer 11 was skipped by incremental runs; its only generation is still its latest
+    assert generations(db, 11) == [1]
+
+def test_prune_ignores_unpublished_generations(db):
+    add_generation(db, 1, [10])
+    add_generation(db, 2, [10], status="running")
+
+    assert prune_generations(db, keep=1, batch_size=100) == 0
+    assert generations(db, 10) == [1, 2]
+
+def test_compactor_prunes_in_batches(db):
+    for generation in range(1, 6):
+        add_generation(db, generation, [10, 11, 12])
+    compactor = RecommendationCompactor(keep=1, batch_size=5, interval=60)
+
+    deleted = compactor.run_once(db)
+
+    assert deleted == 12
+    assert generations(db, 12) == [5]
+    assert compactor.stats()["rows_pruned"] == 12
@@ -0,0 +1,54 @@
+from sqlalchemy import create_engine, inspect, text
+from src.database.upgrade import upgrade_schema
+
+def legacy_engine():
+    """A database created before recommendations had generations"""
+    engine = create_engine("sqlite://")
+    with engine.begin() as connection:
+        connection.execute(text(
+            "CREATE TABLE recommendations ("
+            "id INTEGER PRIMARY KEY, customer_id INTEGER, product_id INTEGER, match_score FLOAT, "
+            "explanation VARCHAR, feedback VARCHAR, created_at DATETIME, updated_at DATETIME)"
+        ))
+        connection.execute(text("INSERT INTO recommendations (customer_id, product_id, match_score) VALUES (1, 1, 0.5)"))
+    return engine
+
+def test_upgrade_adds_generation_column_indexes_and_tables():
+    engine = legacy_engine()
+
+    upgrade_schema(engine)
+
+    inspector = inspect(engine)
+    assert "generation" in {column["name"] for column in inspector.get_columns("recommendations")}
+    assert {
+        "ix_recommendations_customer_generation",
+        "ix_recommendations_product_generation",
+        "uq_recommendations_customer_product_generation",
+        "uq_recommendations_customer_product_live",
+    } <= {index["name"] for index in inspector.get_indexes("recommendations")}
+    assert {"recommendation_generations", "recommendation_dirty"} <= set(inspector.get_table_names())
+    with engine.connect() as connection:
+        assert connection.execute(text("SELECT generation FROM recommendations")).all() == [(None,)]
+
+def test_upgrade_is_idempotent():
+    engine = legacy_engine()
+
+    upgrade_schema(engine)
+    upgrade_schema(engine)
+
+    fresh = create_engine("sqlite://")
+    upgrade_schema(fresh)
+    upgrade_schema(fresh)
+
+def test_upgrade_keeps_the_newest_of_legacy_duplicates():
+    engine = legacy_engine()
+    with engine.begin() as connection:
+        connection.execute(text(
+            "INSERT INTO recommendations (customer_id, product_id, match_score) VALUES (1, 1, 0.9), (1, 2, 0.4)"
+        ))
+
+    upgrade_schema(engine)
+
+    with engine.connect() as connection:
+        rows = connection.execute(text("SELECT customer_id, product_id, match_score FROM recommendations ORDER BY id")).all()
+    assert rows == [(1, 1, 0.9), (1, 2, 0.4)]
@@ -0,0 +1,89 @@
+from types import SimpleNamespace
+import numpy as np
+import pytest
+from src.services.scoring_engine import (
+    FEATURES,
+    ProductMatrix,
+    ScoringEngine,
+    as_list,
+    build_customer_profile,
+)
+
+def make_product(id, category, subcategory, season="Winter", location="India", price=1000.0, rating=4.0):
+    return SimpleNamespace(
+        id=id,
+        price=price,
+        product_rating=rating,
+        customer_review_sentiment_score=0.5,
+        probability_of_recommendation=0.5,
+        stock=10,
+        category=category,
+        subcategory=subcategory,
+        season=season,
+        holiday="No",
+        geographical_location=location,
+    )
+
+@pytest.fixture
+def engine():
+    products = [
+        make_product(1, "Books", "Biography"),
+        make_product(2, "Fashion", "Jeans", season="Summer", location="USA"),
+        make_product(3, "Electronics", "Laptop", price=50000.0),
+        make_product(4, "Books", "Fiction", season="Summer"),
+    ]
+    return ScoringEngine(ProductMatrix(products))
+
+@pytest.fixture
+def profile():
+    customer = {
+        "browsing_history": "['Books']",
+        "purchase_history": "['Biography']",
+        "location": "Chennai",
+        "season": "Winter",
+        "holiday": "No",
+        "avg_order_value": 1000.0,
+    }
+    return build_customer_profile(customer, "Happy")
+
+def test_as_list_parses_csv_literals():
+    assert as_list("['Books', 'Fashion']") == ["Books", "Fashion"]
+    assert as_list('["Books"]') == ["Books"]
+    assert as_list({"Books": 1}) == ["Books"]
+    assert as_list(None) == []
+
+def test_profile_maps_city_to_country(profile):
+    assert profile["location"] == "India"
+    assert profile["category_affinity"] == {"Books": 1.0, "Biography": 2.0}
+    assert profile["mood"] == "Happy"
+
+def test_profile_reads_preferred_categories_from_persona():
+    as_json = {"persona": {"recommendation_preferences": {"preferred_categories": ["Books"]}}}
+    as_relationship = SimpleNamespace(persona=SimpleNamespace(interests=["Books"]))
+
+    assert build_customer_profile(as_json)["category_affinity"] == {"Books": 1.0}
+    assert build_customer_profile(as_relationship)["category_affinity"] == {"Books": 1.0}
+
+def test_feature_matrix_shape_and_range(engine, profile):
+    features = engine.feature_matrix(profile)
+
+    assert features.shape == (4, len(FEATURES))
+    assert features.min() >= 0
+    assert features.max() <= 1
+
+def test_top_k_prefers_matching_products(engine, profile):
+    top = engine.top_k(profile, 2)
+
+    assert [engine.matrix.ids[row] for row, _ in top] == [1, 4]
+    assert top[0][1] >= top[1][1]
+
+def test_top_k_respects_candidate_rows(engine, profile):
+    top = engine.top_k(profile, 5, rows=np.array([1, 2]))
+
+    assert sorted(row for row, _ in top) == [1, 2]
+
+def test_unknown_profile_values_do_not_match(engine):
+    features = engine.feature_matrix(build_customer_profile({}))
+    season_column = FEATURES.index("season_match")
+
+    assert not features[:, season_column].any()
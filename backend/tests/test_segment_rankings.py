@@ -0,0 +1,74 @@
+from datetime import datetime
+from types import SimpleNamespace
+import numpy as np
+import pytest
+from src.models import Customer
+from src.services.scoring_engine import ProductMatrix, ScoringEngine
+from src.services.segment_rankings import SegmentRankings, load_segment_profiles
+
+def product(pid, category, season, holiday, location, rating, stock=5, updated_at=datetime(2024, 1, 1)):
+    return SimpleNamespace(
+        id=pid, category=category, subcategory=None, price=50.0, product_rating=rating,
+        season=season, holiday=holiday, geographical_location=location, stock=stock, updated_at=updated_at
+    )
+
+PRODUCTS = [
+    product(1, "Books", "Winter", "Yes", "India", 4.0),
+    product(2, "Fashion", "Summer", "No", "USA", 4.5),
+    product(3, "Books", "Summer", "No", "India", 3.0),
+    product(4, "Fitness", "Winter", "No", "USA", 5.0, stock=0),
+]
+
+@pytest.fixture
+def rankings():
+    rankings = SegmentRankings(size=10)
+    rankings.segment_profiles = {"Frequent Buyer": {"category_affinity": {"Books": 2.0}, "target_price": 50.0}}
+    return rankings
+
+def test_ranking_matches_live_scoring(rankings):
+    engine = ScoringEngine(ProductMatrix(PRODUCTS), version="v1")
+
+    ranked = rankings.ranked(engine, season="Summer", location="India", limit=3)
+    live = engine.top_k({"season": "Summer", "location": "India"}, 3, rows=np.flatnonzero(engine.matrix.in_stock))
+
+    assert [row for row, _ in ranked] == [row for row, _ in live]
+    assert [score for _, score in ranked] == pytest.approx([score for _, score in live])
+
+def test_segment_and_unknown_values(rankings):
+    engine = ScoringEngine(ProductMatrix(PRODUCTS), version="v1")
+
+    frequent = rankings.ranked(engine, segment="Frequent Buyer", limit=2)
+    unknown = rankings.ranked(engine, season="Monsoon", segment="Unknown", limit=10)
+
+    assert {engine.matrix.ids[row] for row, _ in frequent} == {1, 3}
+    assert len(unknown) == 3  # the sold-out product is never ranked
+    assert rankings.stats()["contexts"] == 2 * 3 * 3 * 3
+
+def test_changed_products_are_rescored_incrementally(rankings):
+    rankings.ranked(ScoringEngine(ProductMatrix(PRODUCTS), version="v1"))
+    updated = PRODUCTS[:2] + [product(3, "Books", "Summer", "No", "India", 5.0, updated_at=datetime(2024, 2, 1))]
+    updated.append(product(5, "Books", "Winter", "Yes", "USA", 4.0))
+    engine = ScoringEngine(ProductMatrix(updated), version="v2")
+
+    rankings.ranked(engine)
+
+    full = SegmentRankings(size=10)
+    full.segment_profiles = rankings.segment_profiles
+    full.sync(engine)
+    assert rankings.stats()["incremental_syncs"] == 1
+    assert rankings.stats()["rows_rescored"] == 2
+    np.testing.assert_allclose(rankings.table, full.table)
+
+def test_segment_profiles_aggregate_customers(db):
+    db.add_all([
+        Customer(email="a@example.com", customer_segment="New Visitor", browsing_history=["Books"], avg_order_value=20.0),
+        Customer(email="b@example.com", customer_segment="New Visitor", purchase_history=["Fiction"], avg_order_value=40.0),
+        Customer(email="c@example.com", customer_segment=None, browsing_history=["Fashion"]),
+    ])
+    db.commit()
+
+    profiles = load_segment_profiles(db)
+
+    assert list(profiles) == ["New Visitor"]
+    assert profiles["New Visitor"]["category_affinity"] == {"Books": 0.5, "Fiction": 1.0}
+    assert profiles["New Visitor"]["target_price"] == 30.0
@@ -0,0 +1,60 @@
+import time
+from unittest.mock import patch
+import numpy as np
+from src.services.item_similarity import ItemSimilarityIndex
+from src.services.session_store import SessionStore
+
+def index():
+    """Products 1..4; every product's neighbours are the others, closest ids first"""
+    ids = np.array([1, 2, 3, 4])
+    neighbours = [[1, 2, 3], [0, 2, 3], [1, 3, 0], [2, 1, 0]]
+    scores = [[0.9, 0.5, 0.1], [0.9, 0.6, 0.2], [0.6, 0.8, 0.5], [0.8, 0.2, 0.1]]
+    return ItemSimilarityIndex(
+        ids,
+        np.arange(0, 13, 3),
+        np.array(neighbours, dtype=np.int32).ravel(),
+        np.array(scores, dtype=np.float32).ravel()
+    )
+
+def test_continue_shopping_excludes_session_products():
+    store = SessionStore(history=5, max_sessions=10, idle_seconds=60)
+    store.record(7, 1, "view", now=0)
+    store.record(7, 2, "cart_add", now=1)
+    store.record(7, 3, "purchase", now=2)  # not a session event
+
+    with patch("src.services.session_store.item_similarity_service.index", index()):
+        recommended = store.continue_shopping(7, limit=5, now=3)
+
+    assert [product_id for product_id, _ in recommended] == [3, 4]
+    assert store.recent(7, now=3) == [(2, "cart_add"), (1, "view")]
+
+def test_history_is_bounded():
+    store = SessionStore(history=2, max_sessions=10, idle_seconds=60)
+    for product_id in (1, 2, 3):
+        store.record(7, product_id, "view", now=0)
+
+    assert [product_id for product_id, _ in store.recent(7, now=0)] == [3, 2]
+
+def test_idle_and_least_recently_used_sessions_are_evicted():
+    store = SessionStore(history=5, max_sessions=2, idle_seconds=60)
+    store.record("a", 1, "view", now=0)
+    store.record("b", 1, "view", now=10)
+    store.record("a", 2, "view", now=20)
+    store.record("c", 1, "view", now=30)  # over capacity: "b" is the least recently used
+
+    assert set(store.sessions) == {"a", "c"}
+    assert store.recent("a", now=85) == []  # idle for 65s
+    assert store.stats()["evicted"] == 2
+
+def test_reads_are_fast_without_database():
+    store = SessionStore(history=20, max_sessions=10, idle_seconds=60)
+    for product_id in (1, 2) * 10:
+        store.record(7, product_id, "view")
+
+    with patch("src.services.session_store.item_similarity_service.index", index()):
+        start = time.perf_counter()
+        recommended = store.continue_shopping(7)
+        elapsed = time.perf_counter() - start
+
+    assert [product_id for product_id, _ in recommended] == [3, 4]
+    assert elapsed < 0.005
@@ -0,0 +1,49 @@
+import pytest
+from src.services.trending import CountMinSketch, SlidingWindowSketch, TrendingEngine
+
+@pytest.fixture
+def engine():
+    return TrendingEngine(bucket_seconds=60, buckets=3, width=512, depth=4, capacity=3)
+
+def test_count_min_sketch_never_undercounts():
+    sketch = CountMinSketch(width=16, depth=3)
+    for i in range(100):
+        sketch.add(sketch.columns(f"p{i}"), 1.0)
+    sketch.add(sketch.columns("hot"), 50.0)
+
+    assert sketch.estimate(sketch.columns("hot")) >= 50.0
+    assert all(sketch.estimate(sketch.columns(f"p{i}")) >= 1.0 for i in range(100))
+
+def test_window_expires_old_buckets():
+    window = SlidingWindowSketch(bucket_seconds=10, buckets=2, width=64, depth=2)
+    window.advance(0)
+    window.add("p", 4.0)
+    window.advance(10)
+    window.add("p", 1.0)
+
+    assert window.estimate("p") == 5.0
+    window.advance(20)
+    assert window.estimate("p") == 1.0
+    window.advance(1000)
+    assert window.estimate("p") == 0.0
+
+def test_trending_is_scoped_by_category_and_location(engine):
+    engine.record(1, "Books", "view", now=0)
+    engine.record(2, "Books", "cart_add", location="Mumbai", now=1)
+    engine.record(3, "Fashion", "purchase", quantity=2, location="Delhi", now=2)
+
+    assert engine.trending(now=3) == [(3, 10.0), (2, 3.0), (1, 1.0)]
+    assert engine.trending(category="Books", now=3) == [(2, 3.0), (1, 1.0)]
+    assert engine.trending(location="Mumbai", now=3) == [(2, 3.0)]
+    assert engine.trending(category="Fashion", location="Mumbai", now=3) == []
+
+def test_leaders_are_bounded_and_decay(engine):
+    for product_id in range(5):
+        engine.record(product_id, "Books", "view", quantity=product_id + 1, now=0)
+
+    assert [pid for pid, _ in engine.trending(limit=10, now=1)] == [4, 3, 2]
+
+    assert engine.trending(now=200) == []  # every bucket with those views expired
+
+    engine.record(0, "Books", "view", now=200)
+    assert engine.trending(now=201) == [(0, 1.0)]